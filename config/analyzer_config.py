@@ -6,8 +6,8 @@ TOP_N_PLAYERS = 20
 # Columns to display in various outputs
 DISPLAY_COLUMNS = ['web_name', 'team', 'now_cost', 'total_points']
 
-# File name format for data source
-DATA_FILE_FORMAT = 'data_source/fpl_data_{}.csv'
+# Number of upcoming gameweeks averaged for fixture difficulty
+FDR_HORIZON = 5
 
 # Full season Fixture Difficulty Ratings 2024/2025
 FIXTURE_DIFFICULTY = {
@@ -33,6 +33,12 @@ FIXTURE_DIFFICULTY = {
     'Wolves': [4,2,2,4,3,5,2,5,2,2,2,3,2,2,3,2,1,3,4,2,4,2,4,3,2,2,3,2,2,3,2,1,4,4,3,5,2,2]
 }
 
+# Teams the API names differently from FIXTURE_DIFFICULTY and data_source/team_mapping.csv;
+# FDR lookups try the other spelling when a name is not found
+TEAM_NAME_ALIASES = {
+    "Nott'm Forest": 'Nottingham Forest',
+}
+
 # FDR color mapping
 FDR_COLORS = {
     1: 'dark green',
@@ -0,0 +1,41 @@
+# config/backtest_config.py
+
+import os
+
+# Base directory
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Gameweeks a recommendation is scored over: a move made before gameweek g earns the realized
+# points of gameweeks g .. g + BACKTEST_HORIZON - 1 (script/backtester.py)
+BACKTEST_HORIZON = 3
+
+# Recommended transfers scored per gameweek; the best one not already in the squad is made
+BACKTEST_TOP_MOVES = 5
+
+# A gameweek's deadline is taken as this long before its first kickoff in the history table,
+# and only snapshots created before it (and at most this many days before it) are used
+BACKTEST_DEADLINE_OFFSET_MINUTES = 90
+BACKTEST_MAX_STALENESS_DAYS = 10
+
+# Worker processes for parameter sweeps; 1 evaluates every combination in this process
+BACKTEST_WORKERS = 4
+
+# Parameter grid for sweeps: every combination is replayed over the whole season. The first
+# entry of each list is the recommenders' current setting (config/transfer_recommender_config.py).
+BACKTEST_GRID = {
+    'future_fixtures': [5, 1, 3, 8],
+    'max_price_increase': [0.5, 1.0, 2.0, 5.0],
+    'max_prices': [
+        {1: 5.5, 2: 6.0, 3: 8.0, 4: 9.0},
+        {1: 5.0, 2: 5.0, 3: 7.0, 4: 7.5},
+        {1: 6.0, 2: 7.0, 3: 10.0, 4: 11.0},
+    ],
+    'weights': [
+        {'form': 10, 'price': 1, 'fixtures': 1},
+        {'form': 5, 'price': 1, 'fixtures': 2},
+        {'form': 10, 'price': 0, 'fixtures': 3},
+    ],
+}
+
+# Sweep results table (.csv, .jsonl or .parquet)
+BACKTEST_OUTPUT_PATH = os.path.join(BASE_DIR, 'data_source', 'backtest_{}.csv')
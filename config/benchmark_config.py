@@ -0,0 +1,31 @@
+# config/benchmark_config.py
+
+import os
+
+# Base directory
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Synthetic bootstrap-static payloads (script/synthetic_data.py): players at scale 1, teams,
+# gameweeks, the gameweek treated as current, and the seed every generated payload derives from
+SYNTHETIC_PLAYERS = 700
+SYNTHETIC_TEAMS = 20
+SYNTHETIC_GAMEWEEKS = 38
+SYNTHETIC_CURRENT_GAMEWEEK = 8
+SYNTHETIC_SEED = 2024
+
+# Share of generated players per position (1 GKP, 2 DEF, 3 MID, 4 FWD)
+SYNTHETIC_POSITION_SHARES = {1: 0.1, 2: 0.33, 3: 0.4, 4: 0.17}
+
+# Benchmark runs (script/benchmark.py): player-count multipliers, managers whose transfers are
+# recommended at every scale, and timed repeats per stage
+BENCHMARK_SCALES = [1, 10, 100]
+BENCHMARK_MANAGERS = 500
+BENCHMARK_REPEATS = 5
+
+# Latency percentiles recorded per stage
+BENCHMARK_PERCENTILES = [50, 90, 99]
+
+# Recorded results, and how much slower than the baseline a stage's median may get before the
+# comparison fails (0.25 = 25%)
+BENCHMARK_BASELINE = os.path.join(BASE_DIR, 'data_source', 'benchmarks', 'baseline.json')
+BENCHMARK_TOLERANCE = 0.25
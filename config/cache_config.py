@@ -0,0 +1,32 @@
+# config/cache_config.py
+
+import os
+
+# Base directory
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# On-disk HTTP response cache shared by every script
+CACHE_DIR = os.path.join(BASE_DIR, 'data_source', 'cache', 'http')
+
+# Set FPL_CACHE=0 to bypass the cache entirely
+CACHE_ENABLED = os.environ.get('FPL_CACHE', '1') != '0'
+
+# Set FPL_OFFLINE=1 to never touch the network and serve the last good copy
+OFFLINE_MODE = os.environ.get('FPL_OFFLINE', '0') == '1'
+
+# Least recently used responses are evicted above this size
+CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# Seconds a cached response is served without revalidation, per endpoint.
+# Endpoints missing here are never cached; 0 means always revalidate (ETag/Last-Modified).
+CACHE_TTLS = {
+    'bootstrap_static': 15 * 60,
+    'fixtures': 60 * 60,
+    'element_summary': 6 * 60 * 60,
+    'entry': 5 * 60,
+    'entry_history': 60 * 60,
+    'entry_picks': 5 * 60,
+    'league_standings': 5 * 60,
+    'event_live': 0,
+    'event_fixtures': 0,
+}
@@ -0,0 +1,31 @@
+# config/chip_config.py
+
+import os
+
+# Base directory
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Expected-points model behind the per-player, per-gameweek matrix (script/expected_points.py).
+# 'linear' learns points per game, so chip gains come out in points.
+CHIP_MODEL = 'linear'
+
+# Points multiplier for the captain, and for the captain under triple captain
+CAPTAIN_MULTIPLIER = 2
+TRIPLE_CAPTAIN_MULTIPLIER = 3
+
+# Chips the engine times, and the names the API uses for them in entry history
+CHIPS = ['bench_boost', 'triple_captain', 'free_hit', 'wildcard']
+API_CHIP_NAMES = {'bboost': 'bench_boost', '3xc': 'triple_captain', 'freehit': 'free_hit', 'wildcard': 'wildcard'}
+
+# Every chip is granted again from this gameweek; chips played before it don't count against it
+CHIP_RESET_GAMEWEEK = 20
+
+# Free hit and wildcard squads are built for the squad's value rounded down to this step (£m),
+# so managers with nearly the same budget share one optimized squad
+CHIP_BUDGET_STEP = 0.5
+
+# Captain/vice pairs printed per team
+TOP_CAPTAIN_PAIRS = 5
+
+# Combined output table for chip gains (.csv, .jsonl or .parquet)
+CHIP_OUTPUT_PATH = os.path.join(BASE_DIR, 'data_source', 'chips_{}.csv')
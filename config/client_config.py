@@ -0,0 +1,23 @@
+# config/client_config.py
+
+# (connect, read) timeouts in seconds for every API request
+REQUEST_TIMEOUT = (5, 30)
+
+# Keep-alive connections and in-flight requests allowed per host
+MAX_CONNECTIONS_PER_HOST = 8
+
+# Retries after the first attempt for throttled, failing or unreachable requests
+MAX_RETRIES = 4
+
+# Status codes that are retried with backoff
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Full-jitter exponential backoff: sleep uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30
+
+USER_AGENT = "xGreenArrow/1.0"
+
+# Bytes of a response body decoded at a time when bootstrap-static is parsed as a stream
+# (script/bootstrap_parser.py); only this much text plus one player object is held at once
+STREAM_CHUNK_SIZE = 64 * 1024
@@ -0,0 +1,51 @@
+# config/history_config.py
+
+import os
+
+# Base directory
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Per-gameweek player histories from element-summary (script/history_backfill.py): raw gzipped
+# responses in raw/, a checkpoint of what was fetched, and the columnar table in the snapshot format
+HISTORY_DIR = os.path.join(BASE_DIR, 'data_source', 'history')
+HISTORY_RAW_DIR = os.path.join(HISTORY_DIR, 'raw')
+HISTORY_CHECKPOINT = os.path.join(HISTORY_DIR, 'checkpoint.json')
+HISTORY_TABLE = 'gameweeks'
+
+# Concurrent element-summary requests, and players per checkpointed batch
+BACKFILL_WORKERS = 8
+BACKFILL_BATCH_SIZE = 50
+
+# Seconds to wait between batches, on top of the client's 429/Retry-After backoff
+BACKFILL_BATCH_PAUSE = 0.0
+
+# Storage type per history column; columns not listed are stored as float32
+HISTORY_DTYPES = {
+    'element': 'int32',
+    'fixture': 'int16',
+    'opponent_team': 'int8',
+    'round': 'int8',
+    'was_home': 'int8',
+    'kickoff_time': 'str',
+    'minutes': 'int16',
+    'goals_scored': 'int8',
+    'assists': 'int8',
+    'clean_sheets': 'int8',
+    'goals_conceded': 'int8',
+    'own_goals': 'int8',
+    'penalties_saved': 'int8',
+    'penalties_missed': 'int8',
+    'yellow_cards': 'int8',
+    'red_cards': 'int8',
+    'saves': 'int8',
+    'bonus': 'int8',
+    'bps': 'int16',
+    'total_points': 'int16',
+    'value': 'int16',
+    'selected': 'int32',
+    'transfers_in': 'int32',
+    'transfers_out': 'int32',
+    'transfers_balance': 'int32',
+    'team_h_score': 'int8',
+    'team_a_score': 'int8',
+}
@@ -0,0 +1,21 @@
+# config/instrumentation_config.py
+
+import os
+
+# Base directory
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Set FPL_INSTRUMENT to record stage timers and counters for a run (script/instrumentation.py):
+# 'timers' (or '1') for timers only, 'cprofile' to add a cProfile dump, 'sample' to add a
+# sampling profiler. Unset or '0' leaves every hook a no-op.
+INSTRUMENT_MODE = os.environ.get('FPL_INSTRUMENT', '')
+
+# Per-run reports: <script>_<timestamp>_<pid>.json plus a Chrome trace (.trace.json, open in
+# chrome://tracing or ui.perfetto.dev) and the profile (.prof or .folded) when one is enabled
+PROFILE_DIR = os.path.join(BASE_DIR, 'data_source', 'profiles')
+
+# Seconds between stack samples in 'sample' mode
+SAMPLE_INTERVAL = 0.005
+
+# Functions listed in the report for either profiler
+PROFILE_TOP = 25
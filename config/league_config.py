@@ -0,0 +1,22 @@
+# config/league_config.py
+
+import os
+
+# Base directory
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Classic league tracked by default (script/league.py)
+LEAGUE_ID = 314
+
+# Standings pages (50 entries each) requested concurrently per round
+LEAGUE_PAGE_WORKERS = 8
+
+# Compact standings per league: data_source/leagues/<league_id>.npz
+LEAGUE_DIR = os.path.join(BASE_DIR, 'data_source', 'leagues')
+
+# Score range covered by the rank index; totals outside it are clipped
+LEAGUE_POINTS_RANGE = (-200, 5000)
+
+# A player owned by at least TEMPLATE_OWNERSHIP of the league is template, below DIFFERENTIAL_OWNERSHIP a differential
+TEMPLATE_OWNERSHIP = 0.5
+DIFFERENTIAL_OWNERSHIP = 0.1
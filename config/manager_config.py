@@ -0,0 +1,15 @@
+# config/manager_config.py
+
+import os
+
+# Base directory
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Unix socket `manager.py serve` listens on and `manager.py remote` connects to
+MANAGER_SOCKET = os.path.join(BASE_DIR, 'data_source', 'manager.sock')
+
+# Seconds a remote command may take before the client gives up
+MANAGER_TIMEOUT = 300
+
+# Line history kept between `manager.py shell` sessions
+MANAGER_HISTORY = os.path.join(BASE_DIR, 'data_source', '.manager_history')
@@ -0,0 +1,25 @@
+# config/model_config.py
+
+import os
+
+# Base directory
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Feature matrices cached per snapshot content hash (script/expected_points.py)
+FEATURE_CACHE_DIR = os.path.join(BASE_DIR, 'data_source', 'snapshots', 'features')
+
+# Snapshot columns copied into the feature matrix as float32
+NUMERIC_FEATURES = [
+    'element_type', 'now_cost', 'form', 'points_per_game', 'total_points', 'minutes', 'selected_by_percent',
+    'influence', 'creativity', 'threat', 'ict_index'
+]
+
+# Season totals turned into per-90-minute rates
+PER90_FEATURES = ['goals_scored', 'assists', 'clean_sheets', 'goals_conceded', 'saves', 'bonus', 'bps']
+
+# Model used when none is named, and the column the trainable models learn to predict
+DEFAULT_MODEL = 'heuristic'
+MODEL_TARGET = 'points_per_game'
+
+# L2 penalty for the linear model (features are standardized first)
+LINEAR_RIDGE = 1.0
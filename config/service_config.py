@@ -0,0 +1,27 @@
+# config/service_config.py
+
+# Local HTTP/JSON recommendation service (script/recommendation_service.py)
+SERVICE_HOST = '127.0.0.1'
+SERVICE_PORT = 8780
+
+# Seconds between checks for a new snapshot; a changed snapshot is precomputed in the background
+# and swapped in whole
+SERVICE_POLL_INTERVAL = 30
+
+# Rows returned by /players when no limit is given, and the most a request may ask for
+SERVICE_DEFAULT_LIMIT = 20
+SERVICE_MAX_LIMIT = 1000
+
+# Columns /players can sort by, each with a presorted index per position. Ascending keys list the
+# smallest first by default (easiest fixtures, cheapest players).
+SERVICE_SORT_KEYS = {
+    'score': 'desc',
+    'adjusted_value': 'desc',
+    'value': 'desc',
+    'total_points': 'desc',
+    'points_per_game': 'desc',
+    'form': 'desc',
+    'now_cost': 'desc',
+    'avg_fdr': 'asc',
+}
+SERVICE_DEFAULT_SORT = 'score'
@@ -0,0 +1,34 @@
+# config/simulator_config.py
+
+# Simulated gameweeks per run, per chunk handed to a worker, and the default seed
+NUM_SIMULATIONS = 100_000
+SIMULATION_CHUNK = 10_000
+SIMULATION_SEED = 2024
+
+# Worker processes for the simulator; 1 runs every chunk in this process
+SIMULATION_WORKERS = 4
+
+# Percentiles reported for player and squad scores
+SIMULATION_PERCENTILES = [5, 25, 50, 75, 95]
+
+# Scoring rules per position (1 GKP, 2 DEF, 3 MID, 4 FWD)
+GOAL_POINTS = {1: 10, 2: 6, 3: 5, 4: 4}
+CLEAN_SHEET_POINTS = {1: 4, 2: 4, 3: 1, 4: 0}
+GOALS_CONCEDED_POINTS = {1: -1, 2: -1, 3: 0, 4: 0}  # per GOALS_CONCEDED_STEP conceded
+GOALS_CONCEDED_STEP = 2
+ASSIST_POINTS = 3
+SAVES_STEP = 3  # one point per SAVES_STEP saves
+YELLOW_CARD_POINTS = -1
+RED_CARD_POINTS = -3
+MAX_BONUS = 3
+
+# Per-player, per-gameweek event counts are truncated here when drawn
+MAX_EVENTS = 8
+MAX_SAVES = 15
+
+# Attacking rates scale by 1 + FDR_SCALE * (3 - fdr) and goals conceded by the inverse
+FDR_SCALE = 0.1
+
+# Histogram ranges used to merge results across chunks: one player's gameweek and a whole lineup
+PLAYER_POINTS_RANGE = (-10, 60)
+LINEUP_POINTS_RANGE = (-60, 400)
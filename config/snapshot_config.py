@@ -0,0 +1,60 @@
+# config/snapshot_config.py
+
+import os
+
+# Base directory
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Snapshot metadata per date (data_source/snapshots/YYYYMMDD/meta.json) plus shared column objects;
+# FPL_SNAPSHOT_DIR points every script at another store, e.g. one filled with synthetic data
+SNAPSHOT_DIR = os.environ.get('FPL_SNAPSHOT_DIR', os.path.join(BASE_DIR, 'data_source', 'snapshots'))
+
+# Per-team, per-gameweek fixture table built from the fixtures endpoint (script/fixture_table.py)
+FIXTURES_FILE = os.path.join(SNAPSHOT_DIR, 'fixtures.npz')
+
+# Team registry from the bootstrap-static teams array (script/team_registry.py)
+TEAMS_FILE = os.path.join(SNAPSHOT_DIR, 'teams.json')
+
+# Team id to name table used before the registry was fetched
+LEGACY_TEAM_MAPPING = os.path.join(BASE_DIR, 'data_source', 'team_mapping.csv')
+
+# Daily CSV snapshots written before the columnar store existed
+LEGACY_CSV_FORMAT = os.path.join(BASE_DIR, 'data_source', 'fpl_data_{}.csv')
+
+# Storage type per column: a NumPy dtype, 'category' (int8 codes + category list) or 'str'.
+# Columns not listed are stored as float32.
+SNAPSHOT_DTYPES = {
+    'id': 'int32',
+    'web_name': 'str',
+    'team': 'category',
+    'name_team': 'category',
+    'element_type': 'category',
+    'selected_by_percent': 'float32',
+    'now_cost': 'float32',
+    'minutes': 'int16',
+    'goals_scored': 'int16',
+    'assists': 'int16',
+    'clean_sheets': 'int16',
+    'goals_conceded': 'int16',
+    'own_goals': 'int16',
+    'penalties_saved': 'int16',
+    'penalties_missed': 'int16',
+    'yellow_cards': 'int16',
+    'red_cards': 'int16',
+    'saves': 'int16',
+    'bonus': 'int16',
+    'bps': 'int16',
+    'influence': 'float32',
+    'creativity': 'float32',
+    'threat': 'float32',
+    'ict_index': 'float32',
+    'form': 'float32',
+    'points_per_game': 'float32',
+    'total_points': 'int16',
+}
+
+# Metrics indexed by script/player_timeseries.py for trend queries
+TIMESERIES_METRICS = ['now_cost', 'form', 'selected_by_percent', 'total_points', 'points_per_game', 'minutes']
+
+# Default look-back window in days for trend features
+TREND_WINDOW_DAYS = 7
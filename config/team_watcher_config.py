@@ -1,3 +1,8 @@
+import os
+
+# Base directory
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
 # Base URL for the FPL API
 BASE_URL = "https://fantasy.premierleague.com/api/"
 
@@ -5,4 +10,24 @@ BASE_URL = "https://fantasy.premierleague.com/api/"
 TEAM_ID = 4193107
 
 # Columns to display in various outputs
-DISPLAY_COLUMNS = ['web_name', 'team', 'now_cost', 'total_points']
\ No newline at end of file
+DISPLAY_COLUMNS = ['web_name', 'team', 'now_cost', 'total_points']
+
+# Watcher service (python3 script/team_watcher.py watch): poll every WATCH_FAST_INTERVAL seconds
+# within WATCH_FAST_WINDOW seconds of a deadline, every WATCH_SLOW_INTERVAL seconds otherwise
+WATCH_FAST_INTERVAL = 60
+WATCH_SLOW_INTERVAL = 30 * 60
+WATCH_FAST_WINDOW = 3 * 60 * 60
+
+# Team requests per poll: at most this many ranks and this many picks are refreshed, round-robin,
+# so the request volume of one poll does not grow with the number of watched teams
+WATCH_BATCH_SIZE = 200
+WATCH_MAX_WORKERS = 16
+
+# Last seen ranks, picks and prices, so a restart does not re-emit every change
+WATCH_STATE_FILE = os.path.join(BASE_DIR, 'data_source', 'watch_state.npz')
+
+# Change events sink: .jsonl appends one JSON object per line, .db/.sqlite inserts into an events table
+WATCH_EVENTS_PATH = os.path.join(BASE_DIR, 'data_source', 'watch_events.jsonl')
+
+# Seconds between polls of the live gameweek endpoint (script/live_points.py)
+LIVE_POLL_INTERVAL = 60
@@ -8,9 +8,6 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 # API base URL
 BASE_URL = "https://fantasy.premierleague.com/api/"
 
-# Data source path
-DATA_SOURCE_PATH = os.path.join(BASE_DIR, 'data_source', 'fpl_data_{}.csv')
-
 # Team ID for analysis
 TEAM_ID = 4193107
 
@@ -37,12 +34,51 @@ DISPLAY_COLUMNS_2 = ['web_name', 'team', 'now_cost', 'total_points', 'points_per
 # Number of future fixtures to consider for FDR
 FUTURE_FIXTURES = 5
 
-# Maximum price increase for transfer recommendations
-MAX_PRICE_INCREASE = 5  # 0.5m
+# Transfer score weights: form * 'form' - price (£m) * 'price' + (5 - avg_fdr) * 'fixtures'
+SCORE_WEIGHTS = {'form': 10, 'price': 1, 'fixtures': 1}
+
+# Maximum price increase for transfer recommendations, in £m like the snapshots' now_cost
+MAX_PRICE_INCREASE = 0.5
 
 # Number of top recommendations to show
 TOP_RECOMMENDATIONS = 20
 
+# Score all players in one batched NumPy pass instead of nested iterrows loops
+VECTORIZED_SCORING = True
+
+# Concurrent picks requests when recommending for many teams at once
+BATCH_MAX_WORKERS = 16
+
+# Combined output table for batch recommendations (.csv, .jsonl or .parquet)
+BATCH_OUTPUT_PATH = os.path.join(BASE_DIR, 'data_source', 'recommendations_{}.csv')
+
+# Squad rules for the optimal squad builder (script/squad_optimizer.py)
+SQUAD_BUDGET = 100.0
+SQUAD_QUOTAS = {1: 2, 2: 5, 3: 5, 4: 3}
+MAX_PER_CLUB = 3
+
+# Starting XI: exactly one goalkeeper and at least this many players per outfield position
+XI_SIZE = 11
+XI_MIN_PLAYERS = {1: 1, 2: 3, 3: 2, 4: 1}
+
+# States kept per step by the beam search used when scipy is not installed
+SQUAD_BEAM_WIDTH = 64
+
+# Multi-week transfer planner (script/transfer_planner.py). Hits are charged in score units.
+FREE_TRANSFERS = 1
+MAX_FREE_TRANSFERS = 5
+TRANSFER_HIT_COST = 4
+MAX_TRANSFERS_PER_WEEK = 3
+
+# Plans kept per gameweek, best single moves combined into 2- and 3-transfer weeks, and the
+# seconds one plan may take before the best plan found so far is returned
+PLANNER_BEAM_WIDTH = 16
+PLANNER_MOVES = 10
+PLANNER_TIME_BUDGET = 2.0
+
+# Combined output table for planned transfers (.csv, .jsonl or .parquet)
+PLANNER_OUTPUT_PATH = os.path.join(BASE_DIR, 'data_source', 'plans_{}.csv')
+
 # FDR color mapping
 FDR_COLORS = {
     1: 'dark green',
@@ -1,6 +1,18 @@
-BASE_URL = "https://fantasy.premierleague.com/api/"
+import os
+
+# Point FPL_BASE_URL at a local stub server (script/fpl_stub_server.py) for offline runs
+BASE_URL = os.environ.get("FPL_BASE_URL", "https://fantasy.premierleague.com/api/")
 
 ENDPOINTS = {
     "bootstrap_static": "bootstrap-static/",
+    "fixtures": "fixtures/",
+    # Same resource, cached under the live TTL while a gameweek is being polled
+    "event_fixtures": "fixtures/",
+    "entry": "entry/{team_id}/",
+    "entry_history": "entry/{team_id}/history/",
+    "entry_picks": "entry/{team_id}/event/{event_id}/picks/",
+    "event_live": "event/{event_id}/live/",
+    "element_summary": "element-summary/{player_id}/",
+    "league_standings": "leagues-classic/{league_id}/standings/",
     # Add more endpoints here as needed
-}
\ No newline at end of file
+}
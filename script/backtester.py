@@ -0,0 +1,381 @@
+# script/backtester.py
+#
+# Replays a season of stored snapshots through the transfer and preseason recommenders and
+# scores what they picked with the points players actually went on to score (the per-gameweek
+# history table from script/history_backfill.py). Each gameweek is decided from the latest
+# snapshot created before its deadline, so no decision sees later prices, form or points.
+#
+# The season is loaded once into a SeasonPanel: dense (decision x player id) arrays plus the
+# realized points prefix sums. A sweep writes the panel to .npy files that every worker maps
+# read-only, and fans the parameter grid out over a process pool.
+#
+#   python3 script/backtester.py run
+#   python3 script/backtester.py sweep --workers 8
+
+import argparse
+import itertools
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+# Add the parent directory to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from config.backtest_config import (
+    BACKTEST_HORIZON, BACKTEST_TOP_MOVES, BACKTEST_DEADLINE_OFFSET_MINUTES, BACKTEST_MAX_STALENESS_DAYS,
+    BACKTEST_WORKERS, BACKTEST_GRID, BACKTEST_OUTPUT_PATH
+)
+from config.transfer_recommender_config import (
+    FUTURE_FIXTURES, MAX_PRICE_INCREASE, MAX_PRICES, SCORE_WEIGHTS, SQUAD_BUDGET, SQUAD_QUOTAS, MAX_PER_CLUB,
+    TOP_N_PLAYERS
+)
+from snapshot_store import SnapshotStore
+from squad_optimizer import to_tenths
+from transfer_planner import selling_prices
+from transfer_preseason_recommender import affordable, preseason_values
+from transfer_recommender import player_scores, rank_transfer_rows
+
+PANEL_COLUMNS = ['id', 'web_name', 'team', 'element_type', 'now_cost', 'total_points', 'form']
+PANEL_ARRAYS = ['gameweeks', 'element_type', 'team', 'now_cost', 'total_points', 'form', 'realized_prefix']
+
+def gameweek_deadlines(history, offset_minutes=BACKTEST_DEADLINE_OFFSET_MINUTES):
+    # {gameweek: UTC deadline}, taken as the first kickoff of the round minus the offset
+    kickoffs = pd.to_datetime(history['kickoff_time'], utc=True, errors='coerce')
+    first = kickoffs.groupby(np.asarray(history['round'], dtype=int)).min().dropna()
+    return {int(gameweek): kickoff.to_pydatetime() - timedelta(minutes=offset_minutes)
+            for gameweek, kickoff in first.items()}
+
+def snapshot_times(store):
+    # [(created_at in UTC, date)] in creation order; created_at is written in local time
+    times = []
+    for date in store.dates():
+        created_at = datetime.fromisoformat(store.meta(date)['created_at'])
+        if created_at.tzinfo is None:
+            created_at = created_at.astimezone()
+        times.append((created_at.astimezone(timezone.utc), date))
+    return sorted(times)
+
+def decision_snapshots(times, deadlines, max_staleness_days=BACKTEST_MAX_STALENESS_DAYS):
+    # {gameweek: date} of the latest snapshot created before each deadline, if one is recent enough
+    decisions = {}
+    for gameweek, deadline in sorted(deadlines.items()):
+        before = [(created_at, date) for created_at, date in times if created_at < deadline]
+        if before and deadline - before[-1][0] <= timedelta(days=max_staleness_days):
+            decisions[gameweek] = before[-1][1]
+    return decisions
+
+class SeasonPanel:
+    # Row k holds the snapshot gameweek gameweeks[k] was decided from, with players in the
+    # column of their id (element_type 0 = not in that snapshot). realized_prefix[g, id] is the
+    # player's points over gameweeks 1..g, so any window of realized points is one subtraction.
+    # fdr[h] is the average difficulty of each player's team over the next h fixtures.
+    def __init__(self, arrays, fdr, dates=None, names=None):
+        self.gameweeks = arrays['gameweeks']
+        self.element_type = arrays['element_type']
+        self.team = arrays['team']
+        self.now_cost = arrays['now_cost']
+        self.total_points = arrays['total_points']
+        self.form = arrays['form']
+        self.realized_prefix = arrays['realized_prefix']
+        self.fdr = fdr
+        self.dates = dates or []
+        self.names = names
+
+    def __len__(self):
+        return len(self.gameweeks)
+
+    @classmethod
+    def build(cls, horizons, store=None, history=None, teams=None):
+        from history_backfill import load_history
+        from team_registry import get_team_registry
+
+        store = store or SnapshotStore()
+        teams = teams or get_team_registry()
+        if history is None:
+            history = load_history(columns=['element', 'round', 'total_points', 'kickoff_time'])
+        decisions = decision_snapshots(snapshot_times(store), gameweek_deadlines(history))
+        if not decisions:
+            raise FileNotFoundError(f"No snapshot in {store.root} was created before a gameweek deadline")
+
+        snapshots = [store.load(date, columns=PANEL_COLUMNS, fallback=False) for date in decisions.values()]
+        elements = np.asarray(history['element'], dtype=np.int64)
+        rounds = np.asarray(history['round'], dtype=np.int64)
+        width = int(max([elements.max()] + [players['id'].max() for players in snapshots])) + 1
+        num_gameweeks = int(max(rounds.max(), max(decisions)))
+
+        shape = (len(decisions), width)
+        arrays = {
+            'gameweeks': np.array(list(decisions), dtype=np.int16),
+            'element_type': np.zeros(shape, dtype=np.int8),
+            'team': np.zeros(shape, dtype=np.int16),
+            'now_cost': np.full(shape, np.nan, dtype=np.float32),
+            'total_points': np.full(shape, np.nan, dtype=np.float32),
+            'form': np.full(shape, np.nan, dtype=np.float32),
+        }
+        fdr = {horizon: np.full(shape, np.nan, dtype=np.float32) for horizon in horizons}
+        names = np.full(width, '', dtype=object)
+        for k, (gameweek, players) in enumerate(zip(decisions, snapshots)):
+            ids = players['id'].to_numpy(dtype=np.int64)
+            team_ids = np.asarray(players['team'], dtype=np.int64)
+            arrays['element_type'][k, ids] = np.asarray(players['element_type'], dtype=np.int8)
+            arrays['team'][k, ids] = team_ids
+            for column in ('now_cost', 'total_points', 'form'):
+                arrays[column][k, ids] = players[column].to_numpy(dtype=np.float32)
+            for horizon in horizons:
+                fdr[horizon][k, ids] = teams.fdr(team_ids, gameweek, horizon)
+            names[ids] = players['web_name'].to_numpy()
+
+        realized = np.zeros((num_gameweeks + 1, width), dtype=np.float32)
+        np.add.at(realized, (rounds, elements), np.asarray(history['total_points'], dtype=np.float32))
+        arrays['realized_prefix'] = np.cumsum(realized, axis=0)
+        return cls(arrays, fdr, list(decisions.values()), names)
+
+    def save(self, directory):
+        for name in PANEL_ARRAYS:
+            np.save(os.path.join(directory, f"{name}.npy"), getattr(self, name))
+        for horizon, values in self.fdr.items():
+            np.save(os.path.join(directory, f"fdr_{horizon}.npy"), values)
+        return directory
+
+    @classmethod
+    def load(cls, directory, mmap=True):
+        mode = 'r' if mmap else None
+        arrays = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mode) for name in PANEL_ARRAYS}
+        fdr = {
+            int(name[len('fdr_'):-len('.npy')]): np.load(os.path.join(directory, name), mmap_mode=mode)
+            for name in os.listdir(directory) if name.startswith('fdr_')
+        }
+        return cls(arrays, fdr)
+
+    def realized(self, gameweek, horizon):
+        # Points per player id over gameweeks [gameweek, gameweek + horizon), clipped to the season
+        last = min(gameweek + horizon - 1, len(self.realized_prefix) - 1)
+        return self.realized_prefix[last] - self.realized_prefix[gameweek - 1]
+
+def preseason_picks(ids, positions, costs, adjusted, max_prices, top_n=TOP_N_PLAYERS):
+    # {position: (picked ids best first, ids of every affordable player)} as
+    # TransferPreseasonRecommender.recommendations ranks them
+    picks = {}
+    for position, max_price in max_prices.items():
+        pool = np.flatnonzero((positions == position) & affordable(costs, max_price) & ~np.isnan(adjusted))
+        order = pool[np.argsort(-adjusted[pool], kind='stable')]
+        picks[position] = (ids[order[:top_n]], ids[pool])
+    return picks
+
+def starting_squad(picks, clubs, costs, budget=SQUAD_BUDGET, quotas=SQUAD_QUOTAS, max_per_club=MAX_PER_CLUB):
+    # The best-ranked preseason picks per position that keep the squad legal: at most
+    # max_per_club per club, and room left in the budget (£m) to fill every open slot with the
+    # cheapest player of its position. Short positions are filled cheapest first. `costs` are
+    # tenths by player id; returns the squad and what it cost in tenths.
+    budget = int(round(budget * 10))
+    cheapest = {position: int(costs[pool].min()) if len(pool) else 0 for position, (_, pool) in picks.items()}
+    squad, club_counts, spent = [], {}, 0
+    for position, quota in quotas.items():
+        picked, pool = picks.get(position, ((), ()))
+        candidates = list(picked) + [player for player in pool[np.argsort(costs[pool], kind='stable')]
+                                     if player not in picked]
+        taken = 0
+        for player in candidates:
+            if taken == quota:
+                break
+            reserve = sum(cheapest.get(other, 0) * quotas[other] for other in quotas if other > position) + \
+                cheapest.get(position, 0) * (quota - taken - 1)
+            if club_counts.get(clubs[player], 0) >= max_per_club or spent + costs[player] + reserve > budget:
+                continue
+            squad.append(int(player))
+            club_counts[clubs[player]] = club_counts.get(clubs[player], 0) + 1
+            spent += int(costs[player])
+            taken += 1
+    return squad, spent
+
+def legal_move(out_rows, in_rows, ids, squad, clubs, costs, sell, bank, max_per_club=MAX_PER_CLUB):
+    # Index of the best-ranked recommendation the squad can make: the incoming player is not
+    # already in it, the bank plus the outgoing player's selling price covers them, and their
+    # club stays within max_per_club (unless the outgoing player is from the same club)
+    squad_clubs = clubs[squad]
+    for i, (out_row, in_row) in enumerate(zip(out_rows, in_rows)):
+        player_out, player_in = int(ids[out_row]), int(ids[in_row])
+        if player_in in squad:
+            continue
+        slot = squad.index(player_out)
+        if costs[player_in] > bank + sell[slot]:
+            continue
+        if clubs[player_in] != clubs[player_out] and (squad_clubs == clubs[player_in]).sum() >= max_per_club:
+            continue
+        return i, slot
+    return None, None
+
+def default_params():
+    return {
+        'future_fixtures': FUTURE_FIXTURES,
+        'max_price_increase': MAX_PRICE_INCREASE,
+        'max_prices': MAX_PRICES,
+        'weights': SCORE_WEIGHTS,
+    }
+
+def evaluate(params, panel=None, horizon=BACKTEST_HORIZON, top_moves=BACKTEST_TOP_MOVES, details=False):
+    # Replay the season with one parameter set. The squad starts as the preseason picks of the
+    # first decision that fit SQUAD_BUDGET and the club limit, and each gameweek makes the best
+    # recommended transfer it can afford from its bank and selling prices without breaking the
+    # club limit (one free transfer, no hits); `hold` keeps the starting squad all season.
+    panel = _panel if panel is None else panel
+    fdr = panel.fdr[params['future_fixtures']]
+    max_prices = {int(position): price for position, price in params['max_prices'].items()}
+    squad = hold = purchase = None
+    bank = 0
+    squad_points = hold_points = 0.0
+    transfers = 0
+    top_gains, move_gains, pick_points, pool_points, rows = [], [], [], [], []
+
+    for k, gameweek in enumerate(panel.gameweeks.tolist()):
+        ids = np.flatnonzero(panel.element_type[k])
+        positions = np.asarray(panel.element_type[k, ids])
+        costs = panel.now_cost[k, ids].astype(float)
+        avg_fdr = fdr[k, ids].astype(float)
+        clubs = panel.team[k]
+        # Prices in tenths by player id; players gone from the snapshot keep their purchase price
+        all_costs = to_tenths(np.nan_to_num(panel.now_cost[k].astype(float)))
+        realized = panel.realized(gameweek, horizon)
+        week = panel.realized(gameweek, 1)
+
+        # Preseason ranking as of this snapshot; the first one also picks the starting squad
+        _, adjusted = preseason_values(panel.total_points[k, ids].astype(float), costs, avg_fdr)
+        picks = preseason_picks(ids, positions, costs, adjusted, max_prices)
+        for picked, pool in picks.values():
+            pick_points.extend(realized[picked].tolist())
+            pool_points.append(realized[pool])
+        if squad is None:
+            squad, spent = starting_squad(picks, clubs, all_costs)
+            bank = int(round(SQUAD_BUDGET * 10)) - spent
+            purchase = all_costs[squad]
+            hold = list(squad)
+
+        # Transfer recommendations for the current squad, scored by realized points in minus out
+        scores = player_scores(panel.form[k, ids], costs, avg_fdr, params['weights'])
+        out_rows, in_rows, _ = rank_transfer_rows(ids, costs, positions, scores, squad,
+                                                  params['max_price_increase'], top_moves)
+        gains = realized[ids[in_rows]] - realized[ids[out_rows]]
+        if len(gains):
+            top_gains.append(float(gains[0]))
+            move_gains.extend(gains.tolist())
+        now = np.where(panel.element_type[k, squad] > 0, all_costs[squad], purchase)
+        sell = selling_prices(now, purchase)
+        move, slot = legal_move(out_rows, in_rows, ids, squad, clubs, all_costs, sell, bank)
+        if move is not None:
+            transfers += 1
+            player_in = int(ids[in_rows[move]])
+            bank += int(sell[slot]) - int(all_costs[player_in])
+            squad[slot] = player_in
+            purchase[slot] = all_costs[player_in]
+
+        squad_points += float(week[squad].sum())
+        hold_points += float(week[hold].sum())
+        if details:
+            label = (lambda row: panel.names[ids[row]]) if panel.names is not None else (lambda row: int(ids[row]))
+            rows.append({
+                'gameweek': gameweek,
+                'snapshot': panel.dates[k] if panel.dates else None,
+                'out': label(out_rows[move]) if move is not None else None,
+                'in': label(in_rows[move]) if move is not None else None,
+                'move_gain': float(gains[move]) if move is not None else None,
+                'bank': bank / 10,
+                'squad_points': float(week[squad].sum()),
+                'hold_points': float(week[hold].sum()),
+            })
+
+    pool_points = np.concatenate(pool_points) if pool_points else np.empty(0)
+    result = {
+        'future_fixtures': params['future_fixtures'],
+        'max_price_increase': params['max_price_increase'],
+        'max_prices': '/'.join(f"{max_prices[position]:g}" for position in sorted(max_prices)),
+        'weights': ' '.join(f"{name}={weight:g}" for name, weight in params['weights'].items()),
+        'gameweeks': len(panel),
+        'transfers': transfers,
+        'top_move_gain': float(np.mean(top_gains)) if top_gains else np.nan,
+        'move_gain': float(np.mean(move_gains)) if move_gains else np.nan,
+        'hit_rate': float(np.mean(np.array(move_gains) > 0)) if move_gains else np.nan,
+        'squad_points': squad_points,
+        'hold_points': hold_points,
+        'transfer_gain': squad_points - hold_points,
+        'preseason_points': float(np.mean(pick_points)) if pick_points else np.nan,
+        'preseason_lift': float(np.mean(pick_points) - pool_points.mean()) if pick_points else np.nan,
+    }
+    return (result, pd.DataFrame(rows)) if details else result
+
+_panel = None
+
+def _init_worker(directory):
+    # Each worker maps the panel files read-only; the pages are shared through the page cache
+    global _panel
+    _panel = SeasonPanel.load(directory)
+
+def grid_params(grid=BACKTEST_GRID):
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[key] for key in keys))]
+
+def sweep(panel, grid=BACKTEST_GRID, workers=BACKTEST_WORKERS, horizon=BACKTEST_HORIZON, top_moves=BACKTEST_TOP_MOVES):
+    params = grid_params(grid)
+    options = {'horizon': horizon, 'top_moves': top_moves}
+    if workers <= 1:
+        results = [evaluate(p, panel, **options) for p in params]
+    else:
+        with tempfile.TemporaryDirectory(prefix='fpl-backtest-') as directory:
+            panel.save(directory)
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(directory,)) as pool:
+                chunksize = max(1, len(params) // (workers * 4))
+                results = list(pool.map(_evaluate_with, params, itertools.repeat(options), chunksize=chunksize))
+    return pd.DataFrame(results).sort_values('squad_points', ascending=False, kind='stable').reset_index(drop=True)
+
+def _evaluate_with(params, options):
+    return evaluate(params, **options)
+
+def main():
+    from transfer_batch_recommender import write_table
+
+    parser = argparse.ArgumentParser(description="Backtest the transfer and preseason recommenders on stored snapshots")
+    parser.add_argument('command', choices=['run', 'sweep'], nargs='?', default='run',
+                        help="run: replay the current settings gameweek by gameweek; sweep: the whole parameter grid")
+    parser.add_argument('--horizon', type=int, default=BACKTEST_HORIZON, help="Gameweeks a move is scored over")
+    parser.add_argument('--top-moves', type=int, default=BACKTEST_TOP_MOVES, help="Recommended moves scored per gameweek")
+    parser.add_argument('--workers', type=int, default=BACKTEST_WORKERS)
+    parser.add_argument('--output', nargs='?', const=BACKTEST_OUTPUT_PATH.format(datetime.now().strftime("%Y%m%d")),
+                        help="Write the sweep table; format is chosen by extension (.csv, .jsonl, .parquet)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    horizons = sorted({FUTURE_FIXTURES, *BACKTEST_GRID['future_fixtures']})
+    try:
+        panel = SeasonPanel.build(horizons)
+    except FileNotFoundError as e:
+        print(f"Error: {e}")
+        print("The backtest needs stored snapshots and the gameweek history table (make backfill).")
+        sys.exit(1)
+    print(f"Loaded {len(panel)} gameweeks ({panel.dates[0]} to {panel.dates[-1]}) in {time.perf_counter() - start:.2f}s")
+
+    if args.command == 'run':
+        summary, rows = evaluate(default_params(), panel, args.horizon, args.top_moves, details=True)
+        print(rows.to_string(index=False, float_format='%.1f', na_rep=''))
+        print()
+        for name, value in summary.items():
+            print(f"{name:20s} {value:.2f}" if isinstance(value, float) else f"{name:20s} {value}")
+        return
+
+    start = time.perf_counter()
+    results = sweep(panel, BACKTEST_GRID, args.workers, args.horizon, args.top_moves)
+    print(f"Replayed {len(results)} parameter sets over {len(panel)} gameweeks in {time.perf_counter() - start:.1f}s "
+          f"({args.workers} workers)")
+    print(results.head(TOP_N_PLAYERS).to_string(index=False, float_format='%.2f'))
+    if args.output:
+        write_table(results, args.output)
+        print(f"\nSaved {len(results)} rows to {args.output}")
+
+if __name__ == "__main__":
+    main()
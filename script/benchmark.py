@@ -0,0 +1,351 @@
+# script/benchmark.py
+#
+# Times the fetch -> analyze -> recommend pipeline on synthetic data at several multiples of the
+# real player count, with no network and no real snapshot. Each scale runs in its own process
+# against a temporary snapshot store (FPL_SNAPSHOT_DIR) and an in-process stub server, so the
+# module-level registries, FDR index and peak memory never leak between scales.
+#
+#   python3 script/benchmark.py run --scales 1 10 --save-baseline
+#   python3 script/benchmark.py run            # fails when a stage got slower than the baseline
+#   python3 script/benchmark.py ingest         # bootstrap-static parse: whole-payload vs streaming
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+
+# Add the parent directory to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from config.benchmark_config import (
+    BENCHMARK_SCALES, BENCHMARK_MANAGERS, BENCHMARK_REPEATS, BENCHMARK_PERCENTILES, BENCHMARK_BASELINE,
+    BENCHMARK_TOLERANCE, SYNTHETIC_SEED
+)
+
+STAGES = ['fetch', 'analyze', 'preseason', 'recommend_load', 'recommend']
+
+def summarize(samples, rows):
+    # Latency percentiles over the timed samples; throughput is rows per second at the median
+    samples = np.asarray(samples, dtype=float)
+    summary = {f"p{q}": float(np.percentile(samples, q)) for q in BENCHMARK_PERCENTILES}
+    summary.update({
+        'first': float(samples[0]),
+        'mean': float(samples.mean()),
+        'samples': len(samples),
+        'rows': rows,
+        'throughput': rows / summary['p50'] if summary['p50'] > 0 else None,
+    })
+    return summary
+
+def timed(function, repeats):
+    samples, result = [], None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function()
+        samples.append(time.perf_counter() - start)
+    return samples, result
+
+def peak_memory(function):
+    # Peak bytes allocated while `function` runs (NumPy buffers included), measured in a
+    # separate untimed call because tracing slows allocation-heavy code down several times
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+class ScaleBenchmark:
+    # One scale in this process. Expects FPL_SNAPSHOT_DIR to point at an empty store; the stub
+    # server serves the generated payloads on a free port.
+    def __init__(self, scale, managers, repeats, workdir, seed=SYNTHETIC_SEED):
+        from fpl_client import FPLClient
+        from fpl_stub_server import make_server
+        from synthetic_data import generate, write_payloads
+
+        self.scale = scale
+        self.repeats = repeats
+        self.team_ids = list(range(1, managers + 1))
+        payloads = generate(scale, managers, seed)
+        self.player_ids = np.array([element['id'] for element in payloads['bootstrap-static/']['elements']])
+        self.players = len(self.player_ids)
+        self.gameweek = next(event['id'] for event in payloads['bootstrap-static/']['events'] if event['is_current'])
+        root = write_payloads(os.path.join(workdir, 'api'), payloads)
+        del payloads
+
+        self.server = make_server(root, port=0)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.client = FPLClient(base_url=f"http://127.0.0.1:{self.server.server_address[1]}/api/", use_cache=False)
+
+    def stage(self, function, rows):
+        samples, result = timed(function, self.repeats)
+        summary = summarize(samples, rows)
+        summary['peak_bytes'] = peak_memory(function)
+        return summary, result
+
+    def run(self):
+        import data_analyzer
+        from data_fetcher import FPLDataFetcher
+        from transfer_preseason_recommender import TransferPreseasonRecommender
+        from transfer_recommender import TransferRecommender
+
+        stages = {}
+        fetcher = FPLDataFetcher()
+        fetcher.client = self.client
+        stages['fetch'], (players, _) = self.stage(fetcher.fetch_data, self.players)
+        # Everything below reads what a real fetch would have stored
+        date = datetime.now().strftime("%Y%m%d")
+        fetcher.store.save(players, date)
+        # A dtype too narrow for this scale wraps ids silently; fail rather than time corrupt data
+        stored_ids = fetcher.store.load(date, columns=['id'])['id'].to_numpy()
+        if not np.array_equal(stored_ids, self.player_ids):
+            raise ValueError(f"Player ids did not survive the snapshot store at scale {self.scale}x: "
+                             f"{len(np.unique(stored_ids))} unique of {len(self.player_ids)}, "
+                             f"range {stored_ids.min()}..{stored_ids.max()}")
+        if fetcher.fixture_table is not None:
+            fetcher.fixture_table.save()
+        fetcher.team_registry.save()
+
+        def analyze():
+            df = data_analyzer.add_fixture_difficulty(data_analyzer.load_data(), data_analyzer.DEFAULT_GAMEWEEK)
+            data_analyzer.basic_stats(df)
+            data_analyzer.price_vs_points_analysis(df)
+            data_analyzer.best_value_players(df)
+
+        def preseason():
+            TransferPreseasonRecommender(self.team_ids[0] if self.team_ids else 1).run()
+
+        def recommend_load():
+            recommender = TransferRecommender(self.team_ids[0], client=self.client)
+            recommender.fetch_data()
+            return recommender
+
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            stages['analyze'], _ = self.stage(analyze, self.players)
+            stages['preseason'], _ = self.stage(preseason, self.players)
+            if not self.team_ids:
+                return stages
+            stages['recommend_load'], recommender = self.stage(recommend_load, self.players)
+
+            # Picks are fetched once; each sample is one manager's recommend_transfers call
+            calls = [('entry_picks', {'team_id': team_id, 'event_id': self.gameweek}) for team_id in self.team_ids]
+            all_picks = self.client.get_many(calls)
+
+            def recommend_all():
+                samples = []
+                for picks in all_picks:
+                    recommender.team_picks = picks
+                    start = time.perf_counter()
+                    recommender.recommend_transfers()
+                    samples.append(time.perf_counter() - start)
+                return samples
+
+            samples = [sample for _ in range(self.repeats) for sample in recommend_all()]
+            stages['recommend'] = summarize(samples, 1)
+            stages['recommend']['throughput'] = len(samples) / sum(samples)
+            stages['recommend']['peak_bytes'] = peak_memory(recommend_all)
+        return stages
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+def eager_players(body):
+    # bootstrap-static to stored column arrays the way fetch_data did before it streamed:
+    # json.loads of the whole body, a frame of every element field, then projection and typing
+    import pandas as pd
+    from data_fetcher import RELEVANT_COLUMNS
+    from snapshot_store import to_typed_arrays
+    from team_registry import TeamRegistry
+
+    data = json.loads(body)
+    players = pd.DataFrame(data['elements'])
+    players['name_team'] = TeamRegistry.from_api(data['teams']).names_of(players['team'])
+    players_cleaned = players[players.columns.intersection(RELEVANT_COLUMNS)].copy()
+    players_cleaned['now_cost'] = players_cleaned['now_cost'] / 10
+    return to_typed_arrays(players_cleaned)
+
+def streaming_players(body):
+    from data_fetcher import players_from_bootstrap
+    from snapshot_store import to_typed_arrays
+
+    return to_typed_arrays(players_from_bootstrap(body)[0])
+
+def run_ingest(scales=BENCHMARK_SCALES, repeats=BENCHMARK_REPEATS, seed=SYNTHETIC_SEED):
+    # Peak traced memory and latency of turning one bootstrap-static body into stored column
+    # arrays, before (eager) and after (streaming) the streaming parser
+    from synthetic_data import generate
+
+    results = {}
+    for scale in scales:
+        body = json.dumps(generate(scale, 0, seed)['bootstrap-static/']).encode()
+        result = {'body_bytes': len(body)}
+        for name, function in (('eager', eager_players), ('streaming', streaming_players)):
+            samples, arrays = timed(lambda: function(body), repeats)
+            result[name] = summarize(samples, len(arrays['id'][1][0]))
+            result[name]['peak_bytes'] = peak_memory(lambda: function(body))
+        results[str(scale)] = result
+    return results
+
+def print_ingest(results):
+    print(f"{'scale':>6s} {'body':>10s} {'parser':>10s} {'p50':>10s} {'peak':>10s} {'peak/body':>10s}")
+    for scale, result in results.items():
+        for name in ('eager', 'streaming'):
+            summary = result[name]
+            print(f"{scale + 'x':>6s} {result['body_bytes'] / 2 ** 20:8.1f}MB {name:>10s} "
+                  f"{summary['p50'] * 1000:8.1f}ms {summary['peak_bytes'] / 2 ** 20:8.1f}MB "
+                  f"{summary['peak_bytes'] / result['body_bytes']:9.1f}x")
+        print(f"{'':>6s} peak memory {result['streaming']['peak_bytes'] / result['eager']['peak_bytes'] - 1:+.0%} "
+              f"with streaming, p50 {result['streaming']['p50'] / result['eager']['p50'] - 1:+.0%}")
+
+def run_worker(scale, managers, repeats, output, seed=SYNTHETIC_SEED):
+    workdir = os.path.dirname(output)
+    benchmark = ScaleBenchmark(scale, managers, repeats, workdir, seed)
+    try:
+        stages = benchmark.run()
+    finally:
+        benchmark.close()
+    result = {
+        'players': benchmark.players,
+        'managers': managers,
+        'max_rss_bytes': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+        'stages': stages,
+    }
+    with open(output, 'w') as f:
+        json.dump(result, f)
+
+def run_scale(scale, managers, repeats, seed=SYNTHETIC_SEED):
+    # A fresh interpreter per scale, reading and writing only its own temporary store
+    with tempfile.TemporaryDirectory(prefix='fpl-benchmark-') as workdir:
+        output = os.path.join(workdir, 'result.json')
+        env = dict(os.environ, FPL_SNAPSHOT_DIR=os.path.join(workdir, 'snapshots'), FPL_CACHE='0')
+        command = [sys.executable, os.path.abspath(__file__), 'worker', '--scale', str(scale),
+                   '--managers', str(managers), '--repeats', str(repeats), '--seed', str(seed), '--output', output]
+        process = subprocess.run(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        if process.returncode != 0:
+            raise RuntimeError(f"Scale {scale} failed:\n{process.stderr[-4000:]}")
+        with open(output) as f:
+            return json.load(f)
+
+def run(scales=BENCHMARK_SCALES, managers=BENCHMARK_MANAGERS, repeats=BENCHMARK_REPEATS, seed=SYNTHETIC_SEED):
+    import pandas as pd
+
+    results = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'machine': platform.machine(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'repeats': repeats,
+        'seed': seed,
+        'scales': {},
+    }
+    for scale in scales:
+        start = time.perf_counter()
+        results['scales'][str(scale)] = run_scale(scale, managers, repeats, seed)
+        print(f"Scale {scale}x done in {time.perf_counter() - start:.1f}s")
+    return results
+
+def compare(results, baseline, tolerance=BENCHMARK_TOLERANCE):
+    # (scale, stage, baseline p50, p50) for every stage whose median slowed beyond the tolerance
+    regressions = []
+    for scale, result in results['scales'].items():
+        base_stages = baseline.get('scales', {}).get(scale, {}).get('stages', {})
+        for stage, summary in result['stages'].items():
+            if stage in base_stages and summary['p50'] > base_stages[stage]['p50'] * (1 + tolerance):
+                regressions.append((scale, stage, base_stages[stage]['p50'], summary['p50']))
+    return regressions
+
+def print_results(results, baseline=None):
+    for scale, result in results['scales'].items():
+        print(f"\nScale {scale}x: {result['players']} players, {result['managers']} managers, "
+              f"max RSS {result['max_rss_bytes'] / 2 ** 20:.0f} MiB")
+        base_stages = (baseline or {}).get('scales', {}).get(scale, {}).get('stages', {})
+        for stage in STAGES:
+            if stage not in result['stages']:
+                continue
+            summary = result['stages'][stage]
+            percentiles = '  '.join(f"p{q} {summary[f'p{q}'] * 1000:9.2f}ms" for q in BENCHMARK_PERCENTILES)
+            change = ''
+            if stage in base_stages:
+                change = f"  ({summary['p50'] / base_stages[stage]['p50'] - 1:+.0%} vs baseline)"
+            print(f"  {stage:15s} {percentiles}  {summary['throughput']:12.0f}/s  "
+                  f"peak {summary['peak_bytes'] / 2 ** 20:7.1f} MiB{change}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the FPL pipelines on synthetic data")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help="Run every scale and compare against the baseline")
+    run_parser.add_argument('--scales', type=float, nargs='+', default=BENCHMARK_SCALES)
+    run_parser.add_argument('--managers', type=int, default=BENCHMARK_MANAGERS)
+    run_parser.add_argument('--repeats', type=int, default=BENCHMARK_REPEATS)
+    run_parser.add_argument('--seed', type=int, default=SYNTHETIC_SEED)
+    run_parser.add_argument('--baseline', default=BENCHMARK_BASELINE, help="Baseline JSON to compare against")
+    run_parser.add_argument('--tolerance', type=float, default=BENCHMARK_TOLERANCE)
+    run_parser.add_argument('--output', help="Also write these results to a JSON file")
+    run_parser.add_argument('--save-baseline', action='store_true', help="Record these results as the baseline")
+
+    worker_parser = subparsers.add_parser('worker', help="Run one scale in this process (used by run)")
+    worker_parser.add_argument('--scale', type=float, required=True)
+    worker_parser.add_argument('--managers', type=int, default=BENCHMARK_MANAGERS)
+    worker_parser.add_argument('--repeats', type=int, default=BENCHMARK_REPEATS)
+    worker_parser.add_argument('--seed', type=int, default=SYNTHETIC_SEED)
+    worker_parser.add_argument('--output', required=True)
+
+    ingest_parser = subparsers.add_parser('ingest', help="Compare bootstrap-static parsing before and after streaming")
+    ingest_parser.add_argument('--scales', type=float, nargs='+', default=BENCHMARK_SCALES)
+    ingest_parser.add_argument('--repeats', type=int, default=BENCHMARK_REPEATS)
+    ingest_parser.add_argument('--seed', type=int, default=SYNTHETIC_SEED)
+    ingest_parser.add_argument('--output', help="Also write these results to a JSON file")
+
+    args = parser.parse_args()
+    if args.command == 'ingest':
+        scales = [int(scale) if scale == int(scale) else scale for scale in args.scales]
+        results = run_ingest(scales, args.repeats, args.seed)
+        print_ingest(results)
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(results, f, indent=2)
+        return
+    if args.command == 'worker':
+        run_worker(args.scale, args.managers, args.repeats, args.output, args.seed)
+        return
+
+    scales = [int(scale) if scale == int(scale) else scale for scale in args.scales]
+    results = run(scales, args.managers, args.repeats, args.seed)
+
+    baseline = None
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+
+    for path in [args.output] + ([args.baseline] if args.save_baseline else []):
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with open(path, 'w') as f:
+                json.dump(results, f, indent=2)
+            print(f"\nResults saved to {path}")
+
+    regressions = compare(results, baseline, args.tolerance) if baseline else []
+    for scale, stage, before, after in regressions:
+        print(f"REGRESSION scale {scale}x {stage}: p50 {before * 1000:.2f}ms -> {after * 1000:.2f}ms")
+    if regressions:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
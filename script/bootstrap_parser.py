@@ -0,0 +1,199 @@
+# script/bootstrap_parser.py
+#
+# Incremental parsing of the bootstrap-static body. json.loads on the whole payload builds a dict
+# for every player with ~100 fields before anything is thrown away; here the body is decoded a
+# chunk at a time, each player object is parsed on its own, its wanted fields are appended to
+# flat per-column buffers and the object is dropped. Peak memory is the body, one chunk of text,
+# one player and the kept columns.
+#
+#   columns, rows, other = parse_bootstrap(iter_chunks(body), ['id', 'now_cost', ...])
+
+import array
+import codecs
+import json
+import math
+import os
+import re
+import sys
+
+# Add the parent directory to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from config.client_config import STREAM_CHUNK_SIZE
+from config.snapshot_config import SNAPSHOT_DTYPES
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+def iter_chunks(body, size=STREAM_CHUNK_SIZE):
+    # Zero-copy slices of an in-memory body
+    view = memoryview(body)
+    for start in range(0, len(view), size):
+        yield view[start:start + size]
+
+def to_number(value):
+    # The API sends most stats as strings ("5.2"); anything unparseable becomes NaN, as
+    # pd.to_numeric(errors='coerce') did for the frame-based fetch
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+class JsonStream:
+    # Walks one JSON document from an iterable of UTF-8 byte chunks. members() and items() step
+    # through an object or array without parsing it whole; the caller reads each value with
+    # value(), members() or items() before asking for the next one.
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._json = json.JSONDecoder()
+        self._done = False
+        self.buffer = ''
+        self.pos = 0
+
+    def _fill(self):
+        # Drop the consumed text and append the next decoded chunk; False at the end of input
+        while not self._done:
+            try:
+                chunk = next(self._chunks)
+            except StopIteration:
+                self._done = True
+                text = self._decoder.decode(b'', final=True)
+            else:
+                text = self._decoder.decode(chunk)
+            if text:
+                self.buffer = self.buffer[self.pos:] + text
+                self.pos = 0
+                return True
+        return False
+
+    def _error(self, message):
+        return json.JSONDecodeError(message, self.buffer, self.pos)
+
+    def peek(self):
+        # Next non-whitespace character, without consuming it
+        while True:
+            self.pos = WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                raise self._error("Unexpected end of JSON input")
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise self._error(f"Expected {char!r}")
+        self.pos += 1
+
+    def value(self):
+        # Parse the next complete value, pulling in more chunks while it is cut off
+        self.peek()
+        while True:
+            try:
+                value, end = self._json.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A number at the very end of the buffer may continue in the next chunk
+            if end == len(self.buffer) and self._fill():
+                continue
+            self.pos = end
+            return value
+
+    def _separator(self, close):
+        # After an element: True for ',' (more follow), False for the closing bracket
+        char = self.peek()
+        self.pos += 1
+        if char == close:
+            return False
+        if char != ',':
+            self.pos -= 1
+            raise self._error(f"Expected ',' or {close!r}")
+        return True
+
+    def items(self):
+        # Array elements one at a time
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            if not self._separator(']'):
+                return
+
+    def members(self):
+        # Object keys one at a time; the caller consumes each key's value
+        self.expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            if not isinstance(key, str):
+                raise self._error("Expected an object key")
+            self.expect(':')
+            yield key
+            if not self._separator('}'):
+                return
+
+    def skip(self):
+        # Consume the next value; arrays are walked so only one element is held at a time
+        if self.peek() == '[':
+            for _ in self.items():
+                pass
+        else:
+            self.value()
+
+class ColumnBuilder:
+    # Appends the wanted fields of each row to flat buffers: float64 array.arrays for numeric
+    # columns, lists for 'str' and 'category' ones. A column no row has is left out, as the
+    # projection of the full frame did.
+    def __init__(self, columns, dtypes=SNAPSHOT_DTYPES):
+        self.columns = list(columns)
+        self.numeric = [column for column in self.columns if dtypes.get(column, 'float32') not in ('str', 'category')]
+        self.other = [column for column in self.columns if column not in self.numeric]
+        self.values = {
+            column: array.array('d') if column in self.numeric else []
+            for column in self.columns
+        }
+        self.present = {}
+        self.rows = 0
+
+    def append(self, row):
+        for column in self.numeric:
+            self.values[column].append(to_number(row.get(column)))
+        for column in self.other:
+            self.values[column].append(row.get(column))
+        if not self.present:
+            self.present = {key: None for key in row if key in self.values}
+        elif len(self.present) < len(self.columns):
+            self.present.update((column, None) for column in self.columns if column in row)
+        self.rows += 1
+
+    def finish(self):
+        # {column: float64 ndarray or list} in the order the fields first appear in the rows,
+        # which is the column order a frame of the rows would have
+        import numpy as np
+        return {
+            column: np.frombuffer(self.values[column], dtype=np.float64) if column in self.numeric
+            else self.values[column]
+            for column in self.present
+        }
+
+def parse_bootstrap(chunks, columns, keep=('teams', 'events'), dtypes=SNAPSHOT_DTYPES):
+    # `columns` of every element as flat buffers, the element count and the `keep` keys parsed
+    # whole (teams and events are small); everything else is skipped
+    stream = JsonStream(chunks)
+    builder = ColumnBuilder(columns, dtypes)
+    other = {}
+    for key in stream.members():
+        if key == 'elements':
+            for element in stream.items():
+                builder.append(element)
+        elif key in keep:
+            other[key] = stream.value()
+        else:
+            stream.skip()
+    return builder.finish(), builder.rows, other
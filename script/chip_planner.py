@@ -0,0 +1,354 @@
+# script/chip_planner.py
+#
+# What-if engine for captaincy and chips. Every squad is scored per gameweek with its best XI and
+# every captain/vice-captain pair, then under bench boost, triple captain, free hit and wildcard in
+# each remaining gameweek, and each manager gets the chip timing with the largest expected gain.
+#
+#   python3 script/chip_planner.py --teams-file data_source/team_ids.txt --output
+
+import argparse
+import hashlib
+import os
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# Add the parent directory to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from config.chip_config import (
+    CHIP_MODEL, CAPTAIN_MULTIPLIER, TRIPLE_CAPTAIN_MULTIPLIER, CHIPS, API_CHIP_NAMES, CHIP_RESET_GAMEWEEK,
+    CHIP_BUDGET_STEP, TOP_CAPTAIN_PAIRS, CHIP_OUTPUT_PATH
+)
+from config.transfer_recommender_config import TEAM_ID, BATCH_MAX_WORKERS
+from expected_points import MODELS, get_feature_matrix, get_model
+from fpl_client import FPLClient
+from instrumentation import count
+from snapshot_store import SnapshotStore
+from squad_optimizer import SquadOptimizer, to_tenths
+from team_registry import get_team_registry
+from transfer_batch_recommender import read_team_ids, write_table
+from transfer_planner import selling_prices
+
+OUTPUT_COLUMNS = ['team_id', 'chip', 'gameweek', 'expected_points', 'gain', 'captain', 'vice_captain', 'planned']
+
+def play_probability(minutes, played):
+    # Share of the minutes available so far that a player has played; everyone plays before gameweek 1
+    if not played:
+        return np.ones(len(minutes))
+    return np.clip(np.nan_to_num(minutes) / (90 * played), 0, 1)
+
+def expected_points(features, teams, gameweek, horizon, model=CHIP_MODEL, played=None):
+    # (players x horizon) expected points and chance of playing: the model's per-match prediction
+    # with each gameweek's own difficulty, times the fixtures that week and the chance of playing.
+    # Blank gameweeks score 0, double gameweeks twice; negative predictions are clipped to 0.
+    fitted = get_model(model, features.with_fixtures(gameweek, 1, teams))
+    available = play_probability(features.column('minutes'), played)
+    points, plays = [], []
+    for week in range(gameweek, gameweek + horizon):
+        weekly = features.with_fixtures(week, 1, teams)
+        fixtures = weekly.column('fixtures')
+        points.append(np.where(fixtures > 0, np.maximum(fitted.predict(weekly), 0) * fixtures * available, 0.0))
+        plays.append(np.where(fixtures > 0, available, 0.0))
+    if not points:
+        return np.zeros((len(features), 0)), np.zeros((len(features), 0))
+    return np.nan_to_num(np.column_stack(points)), np.column_stack(plays)
+
+def chip_weeks(gameweek, horizon, reset=CHIP_RESET_GAMEWEEK):
+    # Weeks of the horizon in which the chips held now can be played: those granted for the first
+    # half of the season expire when they are granted again
+    return min(horizon, reset - gameweek) if gameweek < reset else horizon
+
+def available_chips(history, gameweek, chips=CHIPS, reset=CHIP_RESET_GAMEWEEK):
+    # Chips not yet played in the half of the season `gameweek` falls in (entry history 'chips')
+    played = {API_CHIP_NAMES.get(chip['name']) for chip in (history or {}).get('chips', [])
+              if (chip['event'] >= reset) == (gameweek >= reset)}
+    return [chip for chip in chips if chip not in played]
+
+def plan_chips(gains):
+    # Gameweek per chip that maximizes the total gain, one chip per gameweek and chips with no
+    # positive gain left unplayed. Gains are measured against keeping the current squad, so a
+    # wildcard squad is not carried into the chips planned after it.
+    chips = list(gains)
+    weeks = max((len(weekly) for weekly in gains.values()), default=0)
+    states = {0: (0.0, ())}
+    for week in range(weeks):
+        expanded = dict(states)
+        for mask, (total, choices) in states.items():
+            for i, chip in enumerate(chips):
+                gain = gains[chip][week] if week < len(gains[chip]) else np.nan
+                if mask & (1 << i) or not gain > 0:
+                    continue
+                state = (total + gain, choices + ((chip, week),))
+                if state[0] > expanded.get(mask | (1 << i), (-np.inf,))[0]:
+                    expanded[mask | (1 << i)] = state
+        states = expanded
+    return max(states.values(), key=lambda state: state[0])
+
+class ChipPlanner:
+    # Captaincy and chip evaluations for any number of squads over the next `horizon` gameweeks.
+    # Evaluations are memoized by (squad hash, gameweek, chip) and the free hit and wildcard
+    # squads by (chip, budget, gameweek), so managers holding the same players, or about the same
+    # money, share the work. The expected-points matrix and each week's XI picker are built once.
+    def __init__(self, features, names, teams, gameweek, horizon, model=CHIP_MODEL, played=None,
+                 budget_step=CHIP_BUDGET_STEP):
+        self.gameweek = gameweek
+        self.horizon = horizon
+        self.ids = pd.Index(features.ids)
+        self.names = np.asarray(names)
+        self.positions = features.column('element_type').astype(np.int64)
+        self.clubs = features.teams
+        self.now_costs = features.column('now_cost').astype(float)
+        self.costs = to_tenths(self.now_costs)
+        self.points, self.plays = expected_points(features, teams, gameweek, horizon, model, played)
+        # suffix[:, w] is a player's expected points from week w to the end of the horizon
+        self.suffix = np.zeros((len(self.ids), horizon + 1))
+        self.suffix[:, :horizon] = np.cumsum(self.points[:, ::-1], axis=1)[:, ::-1]
+        self.budget_step = int(round(budget_step * 10))
+        self.pickers = {}
+        self.pools = {}
+        self.evaluations = {}
+        self.chip_squads = {}
+        self.hits = 0
+
+    def rows_of(self, player_ids):
+        rows = self.ids.get_indexer(player_ids)
+        if (rows < 0).any():
+            raise KeyError(f"Players not in the snapshot: {list(np.asarray(player_ids)[rows < 0])}")
+        return rows
+
+    def squad_hash(self, rows):
+        # Same players, same hash, whatever order the picks came in
+        return hashlib.sha1(np.sort(self.ids[rows].to_numpy()).astype(np.int64).tobytes()).hexdigest()
+
+    def picker(self, week):
+        # SquadOptimizer over this week's expected points, used for its starting_xi rule
+        if week not in self.pickers:
+            self.pickers[week] = SquadOptimizer(self.positions, self.clubs, self.now_costs, self.points[:, week])
+        return self.pickers[week]
+
+    def captain_bonus(self, scorers, week):
+        # (captain x vice) expected extra points of a doubled captain: the captain's points, plus
+        # the vice-captain's when the captain doesn't play
+        points = self.points[scorers, week]
+        bonus = points[:, None] + (1 - self.plays[scorers, week])[:, None] * points[None, :]
+        np.fill_diagonal(bonus, -np.inf)
+        return bonus
+
+    def scorers(self, rows, week, chip=None):
+        # Players whose points count: the whole squad under bench boost, otherwise the best XI
+        return np.sort(rows) if chip == 'bench_boost' else self.picker(week).starting_xi(rows)
+
+    def captain_table(self, rows, week, chip=None):
+        # Expected points of the squad for every captain/vice-captain pair, best first
+        scorers = self.scorers(rows, week, chip)
+        multiplier = TRIPLE_CAPTAIN_MULTIPLIER if chip == 'triple_captain' else CAPTAIN_MULTIPLIER
+        bonus = self.captain_bonus(scorers, week)
+        captains, vices = np.nonzero(np.isfinite(bonus))
+        table = pd.DataFrame({
+            'captain': self.names[scorers[captains]],
+            'vice_captain': self.names[scorers[vices]],
+            'expected_points': self.points[scorers, week].sum() + (multiplier - 1) * bonus[captains, vices],
+        })
+        return table.sort_values('expected_points', ascending=False, kind='stable').reset_index(drop=True)
+
+    def evaluate(self, rows, week, chip=None, key=None):
+        # Expected points of the squad in one week (0-based) with the best captain and vice-captain,
+        # with no chip, bench boost or triple captain
+        key = (key or self.squad_hash(rows), week, chip)
+        if key in self.evaluations:
+            self.hits += 1
+            count('chip_cache_hits')
+            return self.evaluations[key]
+        scorers = self.scorers(rows, week, chip)
+        bonus = self.captain_bonus(scorers, week)
+        captain, vice = np.unravel_index(np.argmax(bonus), bonus.shape)
+        multiplier = TRIPLE_CAPTAIN_MULTIPLIER if chip == 'triple_captain' else CAPTAIN_MULTIPLIER
+        self.evaluations[key] = evaluation = {
+            'expected_points': float(self.points[scorers, week].sum() + (multiplier - 1) * bonus[captain, vice]),
+            'captain': scorers[captain],
+            'vice_captain': scorers[vice],
+        }
+        return evaluation
+
+    def chip_pool(self, chip, week):
+        # Players worth picking for a free hit or wildcard from `week`, and the values they are
+        # picked by; dominance pruning doesn't depend on the budget, so every budget shares it
+        if (chip, week) not in self.pools:
+            values = self.points[:, week] if chip == 'free_hit' else self.suffix[:, week]
+            self.pools[chip, week] = SquadOptimizer(self.positions, self.clubs, self.now_costs, values).prune(), values
+        return self.pools[chip, week]
+
+    def chip_squad(self, chip, budget, week):
+        # Best squad for a free hit (this week's points) or a wildcard (points to the end of the
+        # horizon) for `budget` tenths rounded down to the budget step; None if nothing is legal
+        budget = budget // self.budget_step * self.budget_step
+        key = (chip, budget, week)
+        if key not in self.chip_squads:
+            pool, values = self.chip_pool(chip, week)
+            squad = SquadOptimizer(self.positions[pool], self.clubs[pool], self.now_costs[pool], values[pool],
+                                   budget / 10).solve(prune=False)
+            self.chip_squads[key] = None if squad is None else (pool[squad], self.squad_hash(pool[squad]))
+        else:
+            self.hits += 1
+            count('chip_cache_hits')
+        return self.chip_squads[key]
+
+    def budget_of(self, rows, bank=0.0, purchase_prices=None):
+        # Squad selling value plus bank in tenths; players without a purchase price sell at their current price
+        purchase_prices = purchase_prices or {}
+        purchase = to_tenths([purchase_prices.get(self.ids[row], self.now_costs[row]) for row in rows])
+        return int(selling_prices(self.costs[rows], purchase).sum() + to_tenths(bank))
+
+    def chip_gains(self, rows, budget, chips=CHIPS):
+        # Per chip, one row per week it can be played: the week's expected points with the chip and
+        # the gain over playing no chip. A wildcard's points and gain run to the end of the horizon.
+        key = self.squad_hash(rows)
+        base = [self.evaluate(rows, week, key=key) for week in range(self.horizon)]
+        base_points = np.array([evaluation['expected_points'] for evaluation in base])
+        results = {}
+        for chip in chips:
+            weekly = []
+            for week in range(chip_weeks(self.gameweek, self.horizon)):
+                if chip in ('free_hit', 'wildcard'):
+                    squad = self.chip_squad(chip, budget, week)
+                    if squad is None:
+                        weekly.append(None)
+                        continue
+                    evaluations = [self.evaluate(squad[0], week, key=squad[1])]
+                    if chip == 'wildcard':
+                        evaluations += [self.evaluate(squad[0], later, key=squad[1])
+                                        for later in range(week + 1, self.horizon)]
+                else:
+                    evaluations = [self.evaluate(rows, week, chip, key)]
+                points = sum(evaluation['expected_points'] for evaluation in evaluations)
+                baseline = base_points[week:].sum() if chip == 'wildcard' else base_points[week]
+                weekly.append({**evaluations[0], 'expected_points': points, 'gain': points - baseline})
+            results[chip] = weekly
+        return base, results
+
+    def what_if(self, player_ids, bank=0.0, purchase_prices=None, chips=CHIPS):
+        # Captaincy and chip scan for one squad; `bank` and `purchase_prices` (player id -> price) are in £m
+        rows = self.rows_of(player_ids)
+        base, results = self.chip_gains(rows, self.budget_of(rows, bank, purchase_prices), chips)
+        gains = {chip: [np.nan if result is None else result['gain'] for result in weekly]
+                 for chip, weekly in results.items()}
+        total, plan = plan_chips(gains)
+        return {
+            'captains': self.captain_table(rows, 0),
+            'base': base,
+            'chips': results,
+            'plan': [(chip, self.gameweek + week) for chip, week in plan],
+            'plan_gain': total,
+        }
+
+    def output_rows(self, team_id, result):
+        planned = set(result['plan'])
+        rows = []
+        for week, evaluation in enumerate(result['base']):
+            rows.append(self.row(team_id, None, week, evaluation, 0.0, False))
+        for chip, weekly in result['chips'].items():
+            for week, evaluation in enumerate(weekly):
+                if evaluation is not None:
+                    rows.append(self.row(team_id, chip, week, evaluation, evaluation['gain'],
+                                         (chip, self.gameweek + week) in planned))
+        return rows
+
+    def row(self, team_id, chip, week, evaluation, gain, planned):
+        return {'team_id': team_id, 'chip': chip or 'none', 'gameweek': self.gameweek + week,
+                'expected_points': evaluation['expected_points'], 'gain': gain,
+                'captain': self.names[evaluation['captain']], 'vice_captain': self.names[evaluation['vice_captain']],
+                'planned': planned}
+
+def print_what_if(team_id, planner, result, top=TOP_CAPTAIN_PAIRS):
+    print(f"Team {team_id}: GW{planner.gameweek} expected {result['base'][0]['expected_points']:.2f} "
+          f"with the best captaincy")
+    print(result['captains'].head(top).to_string(index=False, float_format='%.2f'))
+    for chip, weekly in result['chips'].items():
+        best = max((evaluation for evaluation in weekly if evaluation is not None),
+                   key=lambda evaluation: evaluation['gain'], default=None)
+        if best is None:
+            print(f"  {chip}: no legal squad")
+            continue
+        week = next(week for week, evaluation in enumerate(weekly) if evaluation is best)
+        print(f"  {chip}: best in GW{planner.gameweek + week} (+{best['gain']:.2f})")
+    plan = ', '.join(f"{chip} GW{gameweek}" for chip, gameweek in result['plan']) or 'hold every chip'
+    print(f"  Plan: {plan} (+{result['plan_gain']:.2f})")
+
+def main():
+    parser = argparse.ArgumentParser(description="Captaincy and chip timing what-ifs for one or more teams")
+    parser.add_argument('team_ids', nargs='*', type=int, help=f"Team IDs to evaluate (default {TEAM_ID})")
+    parser.add_argument('--teams-file', help="File with team IDs (whitespace, comma or newline separated)")
+    parser.add_argument('--horizon', type=int, help="Gameweeks to scan (default the rest of the season)")
+    parser.add_argument('--model', choices=list(MODELS), default=CHIP_MODEL, help="Expected-points model")
+    parser.add_argument('--date', help="Snapshot date (YYYYMMDD), default today")
+    parser.add_argument('--output', nargs='?', const=CHIP_OUTPUT_PATH.format(datetime.now().strftime("%Y%m%d")),
+                        help="Also save every evaluation; format is chosen by extension (.csv, .jsonl, .parquet)")
+    parser.add_argument('--workers', type=int, default=BATCH_MAX_WORKERS, help="Concurrent picks requests")
+    args = parser.parse_args()
+
+    team_ids = read_team_ids(args.team_ids, args.teams_file) or [TEAM_ID]
+    client = FPLClient(max_per_host=args.workers)
+    events = client.get('bootstrap_static')['events']
+    event = next((event for event in events if event['is_current']), None) or \
+        next((event for event in events if event['is_next']), None)
+    # Chips and the armband are set before the next deadline; during the last gameweek none is left
+    if event:
+        gameweek = event['id'] + 1 if event['is_current'] else event['id']
+    else:
+        gameweek = len(events) + 1
+    horizon = min(args.horizon or len(events), len(events) - gameweek + 1)
+    if horizon <= 0:
+        print("No current or upcoming gameweek found. The season might be over or hasn't started yet.")
+        sys.exit(1)
+    # Chances of playing count finished gameweeks only, not one still in progress
+    played = max((finished['id'] for finished in events if finished['finished']), default=0)
+
+    start = time.perf_counter()
+    try:
+        features = get_feature_matrix(args.date)
+        names = SnapshotStore().load(args.date, columns=['id', 'web_name']).set_index('id')['web_name']
+        planner = ChipPlanner(features, names.reindex(features.ids).fillna('').to_numpy(), get_team_registry(),
+                              gameweek, horizon, args.model, played)
+    except (FileNotFoundError, ImportError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    print(f"Chips over GW{gameweek}-GW{gameweek + horizon - 1} "
+          f"(expected points built in {time.perf_counter() - start:.3f}s)")
+
+    calls = [call for team_id in team_ids for call in (
+        ('entry_picks', {'team_id': team_id, 'event_id': event['id']}),
+        ('entry_history', {'team_id': team_id}),
+    )]
+    responses = client.get_many(calls, return_exceptions=True)
+    rows = []
+    start = time.perf_counter()
+    for team_id, team_picks, history in zip(team_ids, responses[::2], responses[1::2]):
+        if isinstance(team_picks, Exception) or not team_picks or 'picks' not in team_picks:
+            print(f"Team {team_id}: no picks available")
+            continue
+        purchase_prices = {pick['element']: pick['purchase_price'] / 10
+                           for pick in team_picks['picks'] if 'purchase_price' in pick}
+        bank = team_picks.get('entry_history', {}).get('bank', 0) / 10
+        chips = available_chips(None if isinstance(history, Exception) else history, gameweek)
+        try:
+            result = planner.what_if([pick['element'] for pick in team_picks['picks']], bank, purchase_prices, chips)
+        except KeyError as e:
+            print(f"Team {team_id}: {e}")
+            continue
+        print_what_if(team_id, planner, result)
+        rows.extend(planner.output_rows(team_id, result))
+    print(f"Evaluated {len(team_ids)} teams in {time.perf_counter() - start:.3f}s: {len(planner.evaluations)} "
+          f"evaluations and {len(planner.chip_squads)} chip squads computed, {planner.hits} reused")
+
+    if args.output:
+        write_table(pd.DataFrame(rows, columns=OUTPUT_COLUMNS), args.output)
+        print(f"Saved {len(rows)} evaluations to {args.output}")
+
+if __name__ == "__main__":
+    main()
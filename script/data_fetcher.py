@@ -5,7 +5,16 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 parent_dir = os.path.dirname(current_dir)
 sys.path.append(parent_dir)
 
-from config.url_config import BASE_URL, ENDPOINTS
+from config.snapshot_config import SNAPSHOT_DTYPES
+from bootstrap_parser import iter_chunks, parse_bootstrap
+from fpl_client import get_client
+from instrumentation import count, instrumented, stage
+from snapshot_store import SnapshotStore, to_column, typed_column
+from delta_store import DeltaStore
+from fixture_table import FixtureTable
+from team_registry import TeamRegistry
+import argparse
+import json
 import requests
 import pandas as pd
 from datetime import datetime
@@ -13,44 +22,89 @@ import logging
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# Columns kept from each bootstrap-static element (in the API's field order), plus the team name
+# looked up from the registry, which comes last
+RELEVANT_COLUMNS = [
+    'id', 'web_name', 'team', 'name_team', 'element_type', 'selected_by_percent',
+    'now_cost', 'minutes', 'goals_scored', 'assists', 'clean_sheets',
+    'goals_conceded', 'own_goals', 'penalties_saved', 'penalties_missed',
+    'yellow_cards', 'red_cards', 'saves', 'bonus', 'bps', 'influence',
+    'creativity', 'threat', 'ict_index', 'form', 'points_per_game',
+    'total_points'
+]
+PLAYER_FIELDS = [column for column in RELEVANT_COLUMNS if column != 'name_team']
+
+def players_from_bootstrap(body):
+    # bootstrap-static is parsed as a stream straight into the relevant columns, typed as the
+    # snapshot store keeps them; no frame of every element field is ever built. Returns the
+    # players, the team registry and the other top-level arrays (teams, events).
+    with stage('fetch.parse'):
+        columns, rows, data = parse_bootstrap(iter_chunks(body), PLAYER_FIELDS)
+    team_registry = TeamRegistry.from_api(data['teams'])
+
+    with stage('fetch.typed_columns'):
+        if 'now_cost' in columns:
+            columns['now_cost'] = columns['now_cost'] / 10
+        if 'team' in columns:
+            columns['name_team'] = team_registry.names_of(columns['team'])
+        players = pd.DataFrame({
+            column: to_column(*typed_column(values, SNAPSHOT_DTYPES.get(column, 'float32')))
+            for column, values in columns.items()
+        }, index=pd.RangeIndex(rows), copy=False)
+    return players, team_registry, data
+
 class FPLDataFetcher:
     def __init__(self):
-        self.base_url = BASE_URL
-        self.session = requests.Session()
+        self.client = get_client()
+        self.store = SnapshotStore()
+        self.fixture_table = None
+        self.team_registry = None
 
+    @instrumented('fetch')
     def fetch_data(self):
         try:
-            response = self.session.get(f"{self.base_url}{ENDPOINTS['bootstrap_static']}")
-            response.raise_for_status()
-            data = response.json()
-           
-            players = pd.DataFrame(data['elements'])
-            teams = pd.DataFrame(data['teams'])
-            players = players.merge(teams[['id', 'name']], left_on='team', right_on='id', suffixes=('', '_team'))
-           
-            relevant_columns = [
-                'id', 'web_name', 'team', 'name_team', 'element_type', 'selected_by_percent',
-                'now_cost', 'minutes', 'goals_scored', 'assists', 'clean_sheets',
-                'goals_conceded', 'own_goals', 'penalties_saved', 'penalties_missed',
-                'yellow_cards', 'red_cards', 'saves', 'bonus', 'bps', 'influence',
-                'creativity', 'threat', 'ict_index', 'form', 'points_per_game',
-                'total_points'
-            ]
-            players_cleaned = players[players.columns.intersection(relevant_columns)].copy()
-           
-            players_cleaned.loc[:, 'now_cost'] = players_cleaned['now_cost'] / 10
-           
+            with stage('fetch.http'):
+                body, fixtures = self.client.get_many([
+                    ('bootstrap_static', {}),
+                    ('fixtures', {}),
+                ], return_exceptions=True, raw=True)
+            if isinstance(body, Exception):
+                raise body
+            players_cleaned, self.team_registry, data = players_from_bootstrap(body)
+            del body
+            # A failed fixtures request doesn't cost the player snapshot; the saved table is kept
+            if isinstance(fixtures, Exception):
+                logging.error(f"Error fetching fixtures, keeping the previous fixture table: {fixtures}")
+                self.fixture_table = None
+            else:
+                with stage('fetch.fixture_table'):
+                    self.fixture_table = FixtureTable.from_api(json.loads(fixtures), data['teams'],
+                                                               len(data['events']) or None)
+            count('rows_fetched', len(players_cleaned))
+
             return players_cleaned, data['events']
         except requests.RequestException as e:
             logging.error(f"Error fetching data: {e}")
             return None, None
 
-    def save_data(self):
+    def save_data(self, delta=False):
         players_data, events_data = self.fetch_data()
         if players_data is not None:
-            filename = os.path.join(parent_dir, f'data_source/fpl_data_{datetime.now().strftime("%Y%m%d")}.csv')
-            players_data.to_csv(filename, index=False)
-            logging.info(f"Data updated and saved to {filename}")
+            if delta:
+                path, changes = DeltaStore(self.store).save_delta(players_data)
+                if changes is None:
+                    logging.info(f"No snapshot for today yet, saved full data to {path}")
+                elif path:
+                    summary = ', '.join(f"{column}: {count}" for column, count in changes.items())
+                    logging.info(f"Changed rows saved to {path} ({summary})")
+                else:
+                    logging.info("No changes since the last poll")
+            else:
+                path = self.store.save(players_data, datetime.now().strftime("%Y%m%d"))
+                logging.info(f"Data updated and saved to {path}")
+            if self.fixture_table is not None:
+                logging.info(f"Fixture table saved to {self.fixture_table.save()}")
+            self.team_registry.save()
            
             print(f"Number of players: {len(players_data)}")
             print(f"Columns: {', '.join(players_data.columns)}")
@@ -62,5 +116,9 @@ class FPLDataFetcher:
             logging.error("Failed to fetch data")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fetch FPL player data into the snapshot store")
+    parser.add_argument('--delta', action='store_true', help="Only store rows and fields changed since the last poll")
+    args = parser.parse_args()
+
     fetcher = FPLDataFetcher()
-    fetcher.save_data()
\ No newline at end of file
+    fetcher.save_data(delta=args.delta)
\ No newline at end of file
@@ -0,0 +1,178 @@
+# script/delta_store.py
+
+import argparse
+import json
+import os
+import sys
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# Add the parent directory to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from snapshot_store import SnapshotStore, to_typed_arrays, to_typed_frame, to_column
+
+TIMESTAMP_FORMAT = "%Y%m%dT%H%M%S"
+
+def snapshot_timestamp(meta):
+    return datetime.fromisoformat(meta['created_at']).strftime(TIMESTAMP_FORMAT)
+
+def changed_mask(old, new):
+    old = np.asarray(old)
+    new = np.asarray(new)
+    if old.dtype.kind == 'f' or new.dtype.kind == 'f':
+        old = old.astype(float)
+        new = new.astype(float)
+        return ~((old == new) | (np.isnan(old) & np.isnan(new)))
+    return old != new
+
+class DeltaStore:
+    # Polls between full daily snapshots are kept as deltas: for each column, only the ids whose
+    # value changed and their new values, stored as column objects in the snapshot store.
+    # Any point in time is rebuilt as the latest full snapshot plus the deltas recorded after it.
+    def __init__(self, store=None):
+        self.store = store or SnapshotStore()
+        self.delta_dir = self.store.delta_dir
+
+    def timestamps(self):
+        if not os.path.isdir(self.delta_dir):
+            return []
+        return sorted(name[:-len('.json')] for name in os.listdir(self.delta_dir) if name.endswith('.json'))
+
+    def read_delta(self, timestamp):
+        with open(os.path.join(self.delta_dir, f"{timestamp}.json")) as f:
+            return json.load(f)
+
+    def base_snapshot(self, timestamp):
+        dates = [date for date in self.store.dates() if date <= timestamp[:8]]
+        return dates[-1] if dates else None
+
+    def state_at(self, timestamp=None):
+        # Full player table as it was at `timestamp` (YYYYMMDDTHHMMSS), or None if nothing is stored
+        timestamp = timestamp or datetime.now().strftime(TIMESTAMP_FORMAT)
+        base_date = self.base_snapshot(timestamp)
+        if base_date is None:
+            return None
+        since = snapshot_timestamp(self.store.meta(base_date))
+
+        state = self.store.load(base_date, mmap=False, deltas=False)
+        pending = [ts for ts in self.timestamps() if since < ts <= timestamp]
+        if not pending:
+            return state
+
+        # Apply deltas on plain values, then restore the stored dtypes once at the end
+        state = pd.DataFrame({name: np.asarray(state[name]) for name in state.columns}).set_index('id', drop=False)
+        for ts in pending:
+            state = self.apply_delta(state, self.read_delta(ts))
+        return to_typed_frame(state.reset_index(drop=True))
+
+    def rebuild(self, date):
+        return self.state_at(f"{date}T235959")
+
+    def _decode(self, change):
+        arrays = [self.store.read_object(obj, mmap=False) for obj in change['objects']]
+        return np.asarray(to_column(change['kind'], arrays, change['categories']))
+
+    def apply_delta(self, state, delta):
+        if delta.get('removed_ids'):
+            state = state.drop(index=self.store.read_object(delta['removed_ids'], mmap=False))
+        if delta.get('added_ids'):
+            added = self.store.read_object(delta['added_ids'], mmap=False)
+            state = pd.concat([state, pd.DataFrame({'id': added}, index=added)])
+        for column, change in delta['changes'].items():
+            ids = self.store.read_object(change['ids'], mmap=False)
+            if column not in state.columns:
+                state[column] = None
+            state[column] = state[column].astype(object)
+            state.loc[ids, column] = self._decode(change)
+        return state
+
+    def diff(self, old, new):
+        # Vectorized diff of two player tables aligned on id
+        old_ids = np.asarray(old['id'])
+        new_ids = np.asarray(new['id'])
+        order = np.argsort(old_ids)
+        pos = np.searchsorted(old_ids, new_ids, sorter=order).clip(max=max(len(old_ids) - 1, 0))
+        old_rows = order[pos] if len(old_ids) else np.zeros(len(new_ids), dtype=int)
+        existing = (old_ids[old_rows] == new_ids) if len(old_ids) else np.zeros(len(new_ids), dtype=bool)
+
+        changes = {}
+        for column in new.columns:
+            if column == 'id':
+                continue
+            new_values = np.asarray(new[column])
+            if column in old.columns:
+                mask = ~existing
+                mask[existing] = changed_mask(np.asarray(old[column])[old_rows[existing]], new_values[existing])
+            else:
+                mask = np.ones(len(new_ids), dtype=bool)
+            if mask.any():
+                changes[column] = (new_ids[mask], new_values[mask])
+
+        removed = np.setdiff1d(old_ids, new_ids)
+        return changes, new_ids[~existing], removed
+
+    def save_delta(self, players, timestamp=None):
+        # Records only what changed since the stored state; starts a new full snapshot each day
+        timestamp = timestamp or datetime.now().strftime(TIMESTAMP_FORMAT)
+        date = timestamp[:8]
+        current = self.state_at(timestamp)
+        if current is None or self.base_snapshot(timestamp) != date:
+            return self.store.save(players, date, created_at=datetime.strptime(timestamp, TIMESTAMP_FORMAT)), None
+
+        new = to_typed_frame(players)
+        changes, added, removed = self.diff(current, new)
+        if not changes and not len(removed):
+            return None, {}
+
+        record = {'timestamp': timestamp, 'rows': len(new), 'changes': {}}
+        if len(added):
+            record['added_ids'] = self.store.write_object(added.astype(np.int32))
+        if len(removed):
+            record['removed_ids'] = self.store.write_object(removed.astype(np.int32))
+        for column, (ids, values) in changes.items():
+            kind, arrays, categories = to_typed_arrays(pd.DataFrame({column: values}))[column]
+            record['changes'][column] = {
+                'ids': self.store.write_object(ids.astype(np.int32)),
+                'kind': kind,
+                'categories': categories,
+                'objects': [self.store.write_object(values) for values in arrays],
+            }
+
+        os.makedirs(self.delta_dir, exist_ok=True)
+        path = os.path.join(self.delta_dir, f"{timestamp}.json")
+        with open(f"{path}.tmp{os.getpid()}", 'w') as f:
+            json.dump(record, f)
+        os.replace(f"{path}.tmp{os.getpid()}", path)
+        return path, {column: len(ids) for column, (ids, _) in changes.items()}
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect deltas or rebuild a day's full player table")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('list')
+    rebuild_parser = subparsers.add_parser('rebuild', help="Rebuild a day's table and save it as a full snapshot")
+    rebuild_parser.add_argument('date')
+    args = parser.parse_args()
+
+    deltas = DeltaStore()
+    if args.command == 'list':
+        for timestamp in deltas.timestamps():
+            record = deltas.read_delta(timestamp)
+            changed = ', '.join(f"{column}={len(deltas.store.read_object(change['ids']))}"
+                                for column, change in record['changes'].items())
+            print(f"{timestamp}: {changed}")
+    elif args.command == 'rebuild':
+        table = deltas.rebuild(args.date)
+        if table is None:
+            print(f"No snapshot on or before {args.date}")
+            sys.exit(1)
+        # Stamp the snapshot at the end of that day so later deltas still apply on top of it
+        end_of_day = datetime.strptime(f"{args.date}T235959", TIMESTAMP_FORMAT)
+        print(f"Rebuilt {len(table)} rows, saved to {deltas.store.save(table, args.date, created_at=end_of_day)}")
+
+if __name__ == "__main__":
+    main()
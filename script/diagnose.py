@@ -1,27 +1,28 @@
+import os
 import requests
-import pandas as pd
 import sys
-from datetime import datetime
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from fpl_client import get_client
 
 class Diagnostics:
     def __init__(self, team_id):
         self.team_id = team_id
-        self.base_url = "https://fantasy.premierleague.com/api/"
+        self.client = get_client()
 
     def fetch_general_data(self):
         try:
-            r = requests.get(f"{self.base_url}bootstrap-static/")
-            r.raise_for_status()
-            return r.json()
+            return self.client.get('bootstrap_static')
         except requests.exceptions.RequestException as e:
             print(f"Error fetching general FPL data: {e}")
             return None
 
     def fetch_team_data(self):
         try:
-            r = requests.get(f"{self.base_url}entry/{self.team_id}/")
-            r.raise_for_status()
-            return r.json()
+            return self.client.get('entry', team_id=self.team_id)
         except requests.exceptions.RequestException as e:
             print(f"Error fetching team data: {e}")
             return None
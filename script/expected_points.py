@@ -0,0 +1,239 @@
+# script/expected_points.py
+
+import abc
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+try:
+    from sklearn.ensemble import HistGradientBoostingRegressor
+except ImportError:
+    HistGradientBoostingRegressor = None
+
+# Add the parent directory to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from config.model_config import (
+    FEATURE_CACHE_DIR, NUMERIC_FEATURES, PER90_FEATURES, DEFAULT_MODEL, MODEL_TARGET, LINEAR_RIDGE
+)
+from config.transfer_recommender_config import FUTURE_FIXTURES, TOP_N_PLAYERS
+from snapshot_store import SnapshotStore
+from team_registry import get_team_registry
+from transfer_preseason_recommender import preseason_values
+from transfer_recommender import player_scores
+
+PER90_NAMES = [f"{column}_per90" for column in PER90_FEATURES]
+FIXTURE_FEATURES = ['avg_fdr', 'fixtures']
+
+class FeatureMatrix:
+    # One float32 row per player and one column per feature, derived once from a snapshot:
+    # numeric casts, per-90 rates and ICT components. Fixture columns (avg_fdr, fixtures) depend
+    # on the gameweek window, so they are appended from the FDR prefix sums by with_fixtures()
+    # instead of being cached. Models read columns by name through column().
+    def __init__(self, ids, teams, names, values, snapshot_hash=None):
+        self.ids = np.asarray(ids)
+        self.teams = np.asarray(teams)
+        self.names = list(names)
+        self.positions = {name: i for i, name in enumerate(self.names)}
+        self.values = np.asarray(values, dtype=np.float32)
+        self.snapshot_hash = snapshot_hash
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def from_frame(cls, players, snapshot_hash=None):
+        columns = [np.nan_to_num(pd.to_numeric(players[column], errors='coerce').to_numpy(dtype=float))
+                   if column in players else np.zeros(len(players)) for column in NUMERIC_FEATURES]
+        minutes = players['minutes'].to_numpy(dtype=float) if 'minutes' in players else np.zeros(len(players))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            for column in PER90_FEATURES:
+                totals = players[column].to_numpy(dtype=float) if column in players else np.zeros(len(players))
+                columns.append(np.where(minutes > 0, totals / minutes * 90, 0))
+        return cls(players['id'].to_numpy(), players['team'].to_numpy(dtype=np.int64),
+                   NUMERIC_FEATURES + PER90_NAMES, np.column_stack(columns), snapshot_hash)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data['ids'], data['teams'], data['names'].tolist(), data['values'], str(data['snapshot_hash']))
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp{os.getpid()}.npz"
+        np.savez(tmp_path, ids=self.ids, teams=self.teams, names=np.array(self.names), values=self.values,
+                 snapshot_hash=np.array(self.snapshot_hash or ''))
+        os.replace(tmp_path, path)
+        return path
+
+    def column(self, name):
+        return self.values[:, self.positions[name]]
+
+    def with_fixtures(self, gameweek=1, horizon=FUTURE_FIXTURES, teams=None):
+        teams = teams or get_team_registry()
+        fixtures = np.column_stack([
+            teams.fdr(self.teams, gameweek, horizon),
+            teams.fixture_counts(self.teams, gameweek, horizon),
+        ])
+        names = [name for name in self.names if name not in FIXTURE_FEATURES]
+        values = self.values[:, [self.positions[name] for name in names]]
+        return FeatureMatrix(self.ids, self.teams, names + FIXTURE_FEATURES, np.hstack([values, fixtures]),
+                             self.snapshot_hash)
+
+    def frame(self):
+        return pd.DataFrame(self.values, columns=self.names, index=pd.Index(self.ids, name='id'))
+
+def cache_key(snapshot_hash):
+    # Snapshot content plus the feature definitions, so changing either rebuilds the matrix
+    definition = json.dumps([NUMERIC_FEATURES, PER90_FEATURES])
+    return hashlib.sha1(f"{snapshot_hash}:{definition}".encode()).hexdigest()
+
+def get_feature_matrix(date=None, store=None, cache_dir=FEATURE_CACHE_DIR):
+    # Feature matrix for a snapshot (default today, falling back to the latest earlier one),
+    # read from the cache when this exact snapshot content was featurized before
+    store = store or SnapshotStore()
+    date = store.resolve_date(date or datetime.now().strftime("%Y%m%d"))
+    if not store.exists(date):
+        # Legacy CSV snapshots have no content hash to cache under
+        return FeatureMatrix.from_frame(store.load(date, fallback=False))
+
+    snapshot_hash = store.snapshot_hash(date)
+    path = os.path.join(cache_dir, f"{cache_key(snapshot_hash)}.npz")
+    try:
+        return FeatureMatrix.load(path)
+    except (OSError, KeyError, ValueError):
+        pass
+    columns = ['id', 'team', 'minutes'] + NUMERIC_FEATURES + PER90_FEATURES
+    features = FeatureMatrix.from_frame(store.load(date, columns=columns, fallback=False), snapshot_hash)
+    features.save(path)
+    return features
+
+class ExpectedPointsModel(abc.ABC):
+    # Scores every player of a FeatureMatrix in one call. Heuristic models need no fitting;
+    # trainable ones learn `target` from the other feature columns.
+    name = None
+    trainable = False
+
+    def fit(self, features, target=MODEL_TARGET):
+        return self
+
+    @abc.abstractmethod
+    def predict(self, features):
+        pass
+
+class HeuristicModel(ExpectedPointsModel):
+    # player_scores from transfer_recommender.py
+    name = 'heuristic'
+
+    def predict(self, features):
+        return player_scores(features.column('form'), features.column('now_cost'), features.column('avg_fdr'))
+
+class ValueModel(ExpectedPointsModel):
+    # adjusted_value from transfer_preseason_recommender.py
+    name = 'value'
+
+    def predict(self, features):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return preseason_values(features.column('total_points').astype(float),
+                                    features.column('now_cost').astype(float), features.column('avg_fdr'))[1]
+
+class TrainableModel(ExpectedPointsModel):
+    trainable = True
+    # Columns that restate the usual targets and would leak them
+    excluded = ['points_per_game', 'total_points', 'form']
+
+    def inputs(self, features):
+        self.columns = [name for name in features.names if name != self.target and name not in self.excluded]
+        return np.nan_to_num(features.values[:, [features.positions[name] for name in self.columns]])
+
+class LinearModel(TrainableModel):
+    # Ridge regression on standardized features, solved in closed form
+    name = 'linear'
+
+    def __init__(self, ridge=LINEAR_RIDGE):
+        self.ridge = ridge
+
+    def fit(self, features, target=MODEL_TARGET):
+        self.target = target
+        X = self.inputs(features).astype(np.float64)
+        y = np.nan_to_num(features.column(target).astype(np.float64))
+        self.mean, self.scale = X.mean(axis=0), X.std(axis=0)
+        self.scale[self.scale == 0] = 1
+        X = (X - self.mean) / self.scale
+        self.intercept = y.mean()
+        self.coef = np.linalg.solve(X.T @ X + self.ridge * np.eye(X.shape[1]), X.T @ (y - self.intercept))
+        return self
+
+    def predict(self, features):
+        X = np.nan_to_num(features.values[:, [features.positions[name] for name in self.columns]]).astype(np.float64)
+        return (X - self.mean) / self.scale @ self.coef + self.intercept
+
+class GradientBoostingModel(TrainableModel):
+    # Needs scikit-learn
+    name = 'gbm'
+
+    def __init__(self, **params):
+        if HistGradientBoostingRegressor is None:
+            raise ImportError("The gbm model needs scikit-learn (pip install scikit-learn)")
+        self.regressor = HistGradientBoostingRegressor(**params)
+
+    def fit(self, features, target=MODEL_TARGET):
+        self.target = target
+        self.regressor.fit(self.inputs(features), np.nan_to_num(features.column(target)))
+        return self
+
+    def predict(self, features):
+        return self.regressor.predict(
+            np.nan_to_num(features.values[:, [features.positions[name] for name in self.columns]]))
+
+MODELS = {model.name: model for model in (HeuristicModel, ValueModel, LinearModel, GradientBoostingModel)}
+
+def get_model(name=DEFAULT_MODEL, features=None, target=MODEL_TARGET):
+    # A ready-to-predict model; trainable models are fitted on `features`
+    model = MODELS[name]()
+    if model.trainable:
+        model.fit(features, target)
+    return model
+
+def main():
+    parser = argparse.ArgumentParser(description="Rank players with an expected-points model")
+    parser.add_argument('--model', choices=list(MODELS), default=DEFAULT_MODEL)
+    parser.add_argument('--date', help="Snapshot date (YYYYMMDD), default today")
+    parser.add_argument('--gameweek', type=int, default=1, help="First gameweek of the fixture window")
+    parser.add_argument('--horizon', type=int, default=FUTURE_FIXTURES)
+    parser.add_argument('--target', default=MODEL_TARGET, help="Column trainable models learn to predict")
+    parser.add_argument('--top', type=int, default=TOP_N_PLAYERS)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    try:
+        features = get_feature_matrix(args.date).with_fixtures(args.gameweek, args.horizon)
+    except FileNotFoundError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    loaded = time.perf_counter()
+    try:
+        model = get_model(args.model, features, args.target)
+    except ImportError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    scores = model.predict(features)
+    scored = time.perf_counter()
+
+    ranking = features.frame()[['element_type', 'now_cost', 'avg_fdr']].assign(expected=scores)
+    names = SnapshotStore().load(args.date, columns=['id', 'web_name']).set_index('id')['web_name']
+    print(f"Features for {len(features)} players in {loaded - start:.4f}s, "
+          f"{args.model} model scored in {scored - loaded:.4f}s")
+    print(ranking.join(names).nlargest(args.top, 'expected').to_string())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# script/fdr_index.py
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Add the parent directory to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from config.analyzer_config import FIXTURE_DIFFICULTY, TEAM_NAME_ALIASES
+from config.snapshot_config import FIXTURES_FILE
+from fixture_table import FixtureTable
+
+class FDRIndex:
+    # teams x gameweeks matrices of summed difficulty and fixture counts with row-wise prefix
+    # sums, so the average difficulty per fixture over any gameweek window is two subtractions
+    # and one division, for one team or all teams. Blank gameweeks count zero fixtures and double
+    # gameweeks two. Gameweeks are 1-based; windows are [start, start + horizon) clipped to the season.
+    def __init__(self, teams, difficulty, counts=None, fixture_table=None):
+        self.teams = list(teams)
+        self.team_positions = pd.Index(self.teams)
+        self.difficulty = np.asarray(difficulty, dtype=np.int8)
+        self.counts = np.ones_like(self.difficulty) if counts is None else np.asarray(counts, dtype=np.int8)
+        self.fixture_table = fixture_table
+        self.num_gameweeks = self.difficulty.shape[1]
+        self.prefix = np.zeros((len(self.teams), self.num_gameweeks + 1), dtype=np.int32)
+        np.cumsum(self.difficulty, axis=1, out=self.prefix[:, 1:])
+        self.count_prefix = np.zeros((len(self.teams), self.num_gameweeks + 1), dtype=np.int32)
+        np.cumsum(self.counts, axis=1, out=self.count_prefix[:, 1:])
+
+    @classmethod
+    def from_table(cls, table=FIXTURE_DIFFICULTY):
+        # Static one-fixture-per-gameweek table from config/analyzer_config.py
+        return cls(table.keys(), [table[team] for team in table])
+
+    @classmethod
+    def from_fixture_table(cls, fixture_table):
+        return cls(fixture_table.team_names, fixture_table.difficulty_sums(), fixture_table.counts(), fixture_table)
+
+    def window(self, gameweek, horizon):
+        start = min(max(gameweek - 1, 0), self.num_gameweeks)
+        end = min(start + horizon, self.num_gameweeks)
+        return start, end
+
+    def averages(self, gameweek, horizon):
+        # Average difficulty for every team, in self.teams order
+        start, end = self.window(gameweek, horizon)
+        counts = self.count_prefix[:, end] - self.count_prefix[:, start]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(counts > 0, (self.prefix[:, end] - self.prefix[:, start]) / counts, np.nan)
+
+    def fixture_counts(self, gameweek, horizon):
+        # Number of fixtures every team plays in the window, in self.teams order
+        start, end = self.window(gameweek, horizon)
+        return self.count_prefix[:, end] - self.count_prefix[:, start]
+
+    def positions_of(self, teams):
+        # Row per team name, -1 for unknown teams; a name spelled as in TEAM_NAME_ALIASES (either
+        # way round) finds the other spelling's row
+        teams = np.asarray(teams, dtype=object)
+        positions = self.team_positions.get_indexer(teams)
+        missing = positions < 0
+        if missing.any():
+            aliases = {**TEAM_NAME_ALIASES, **{name: alias for alias, name in TEAM_NAME_ALIASES.items()}}
+            positions[missing] = self.team_positions.get_indexer([aliases.get(team, team) for team in teams[missing]])
+        return positions
+
+    def average(self, team, gameweek, horizon):
+        position = self.positions_of([team])[0]
+        if position < 0:
+            return None
+        return self.averages(gameweek, horizon)[position]
+
+    def for_teams(self, teams, gameweek, horizon):
+        # Vectorized lookup for a column of team names; unknown teams give NaN
+        positions = self.positions_of(teams)
+        averages = np.append(self.averages(gameweek, horizon), np.nan)
+        return averages[positions]
+
+    def fixtures(self, team, gameweek, horizon):
+        if self.fixture_table is not None:
+            return self.fixture_table.difficulties(team, gameweek, horizon)
+        start, end = self.window(gameweek, horizon)
+        position = self.positions_of([team])[0]
+        if position < 0:
+            raise KeyError(team)
+        return self.difficulty[position, start:end].tolist()
+
+_default_index = None
+
+def get_fdr_index():
+    # One shared index per process for the analyzer and both recommenders: the fixture table
+    # saved by the last fetch, or the static FIXTURE_DIFFICULTY table if none was fetched yet
+    global _default_index
+    if _default_index is None:
+        try:
+            _default_index = FDRIndex.from_fixture_table(FixtureTable.load(FIXTURES_FILE))
+        except FileNotFoundError:
+            _default_index = FDRIndex.from_table()
+    return _default_index
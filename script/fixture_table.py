@@ -0,0 +1,154 @@
+# script/fixture_table.py
+
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Add the parent directory to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from config.snapshot_config import FIXTURES_FILE
+from fpl_client import get_client
+
+FIXTURE_COLUMNS = ['id', 'event', 'team_h', 'team_a', 'team_h_difficulty', 'team_a_difficulty']
+
+class FixtureTable:
+    # Every scheduled fixture appears twice (once per side), sorted by (team, gameweek, fixture id),
+    # with CSR-style offsets per (team, gameweek) cell: cell c holds rows offsets[c]:offsets[c + 1].
+    # A cell can hold no fixture (blank gameweek), one, or several (double gameweek).
+    # Team rows follow bootstrap team id order; gameweeks are 1-based.
+    def __init__(self, team_ids, team_names, num_gameweeks, offsets, fixture_ids, opponents, is_home, difficulty):
+        self.team_ids = np.asarray(team_ids, dtype=np.int16)
+        self.team_names = [str(name) for name in team_names]
+        self.team_positions = pd.Index(self.team_names)
+        self.num_gameweeks = int(num_gameweeks)
+        self.offsets = np.asarray(offsets, dtype=np.int32)
+        self.fixture_ids = np.asarray(fixture_ids, dtype=np.int32)
+        self.opponents = np.asarray(opponents, dtype=np.int16)
+        self.is_home = np.asarray(is_home, dtype=bool)
+        self.difficulty = np.asarray(difficulty, dtype=np.int8)
+
+    @classmethod
+    def from_api(cls, fixtures, teams, num_gameweeks=None):
+        # `fixtures` is the fixtures endpoint payload, `teams` the bootstrap-static teams array
+        teams = sorted(teams, key=lambda team: team['id'])
+        team_ids = np.array([team['id'] for team in teams], dtype=np.int16)
+
+        frame = pd.DataFrame(fixtures, columns=FIXTURE_COLUMNS)
+        # Postponed fixtures have no gameweek until they are rescheduled
+        frame = frame[frame['event'].notna()]
+        events = frame['event'].to_numpy(dtype=np.int64)
+        num_gameweeks = num_gameweeks or (int(events.max()) if len(events) else 0)
+
+        # One row per side: home rows first, then away rows
+        team = np.concatenate([frame['team_h'].to_numpy(), frame['team_a'].to_numpy()])
+        opponent = np.concatenate([frame['team_a'].to_numpy(), frame['team_h'].to_numpy()])
+        is_home = np.repeat([True, False], len(frame))
+        difficulty = np.concatenate([frame['team_h_difficulty'].to_numpy(), frame['team_a_difficulty'].to_numpy()])
+        fixture_ids = np.tile(frame['id'].to_numpy(), 2)
+        events = np.tile(events, 2)
+
+        cells = np.searchsorted(team_ids, team) * num_gameweeks + events - 1
+        order = np.lexsort((fixture_ids, cells))
+        offsets = np.zeros(len(team_ids) * num_gameweeks + 1, dtype=np.int32)
+        np.cumsum(np.bincount(cells, minlength=len(team_ids) * num_gameweeks), out=offsets[1:])
+
+        return cls(
+            team_ids, [team['name'] for team in teams], num_gameweeks, offsets,
+            fixture_ids[order], opponent[order], is_home[order], difficulty[order]
+        )
+
+    @classmethod
+    def load(cls, path=FIXTURES_FILE):
+        with np.load(path) as data:
+            return cls(**{name: data[name] for name in data.files})
+
+    def save(self, path=FIXTURES_FILE):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp{os.getpid()}.npz"
+        np.savez(
+            tmp_path,
+            team_ids=self.team_ids, team_names=np.array(self.team_names), num_gameweeks=self.num_gameweeks,
+            offsets=self.offsets, fixture_ids=self.fixture_ids, opponents=self.opponents,
+            is_home=self.is_home, difficulty=self.difficulty
+        )
+        os.replace(tmp_path, path)
+        return path
+
+    def counts(self):
+        # (teams x gameweeks) number of fixtures per cell: 0 blank, 1 single, 2+ double
+        return np.diff(self.offsets).reshape(len(self.team_ids), self.num_gameweeks).astype(np.int8)
+
+    def difficulty_sums(self):
+        cells = np.repeat(np.arange(len(self.offsets) - 1), np.diff(self.offsets))
+        sums = np.bincount(cells, weights=self.difficulty, minlength=len(self.offsets) - 1)
+        return sums.reshape(len(self.team_ids), self.num_gameweeks).astype(np.int8)
+
+    def _rows(self, team, gameweek, horizon=1):
+        position = self.team_positions.get_loc(team)
+        start = min(max(gameweek - 1, 0), self.num_gameweeks)
+        end = min(start + horizon, self.num_gameweeks)
+        base = position * self.num_gameweeks
+        return slice(self.offsets[base + start], self.offsets[base + end])
+
+    def difficulties(self, team, gameweek, horizon):
+        # Difficulty of every fixture in the window, in kickoff order; doubles add entries, blanks none
+        return self.difficulty[self._rows(team, gameweek, horizon)].tolist()
+
+    def fixtures(self, team, gameweek, horizon=1):
+        rows = self._rows(team, gameweek, horizon)
+        names = dict(zip(self.team_ids.tolist(), self.team_names))
+        return [{
+            'fixture': int(fixture),
+            'opponent': names.get(int(opponent)),
+            'is_home': bool(home),
+            'difficulty': int(difficulty),
+        } for fixture, opponent, home, difficulty in zip(
+            self.fixture_ids[rows], self.opponents[rows], self.is_home[rows], self.difficulty[rows]
+        )]
+
+    def blank_teams(self, gameweek):
+        return [self.team_names[i] for i in np.flatnonzero(self.counts()[:, gameweek - 1] == 0)]
+
+    def double_teams(self, gameweek):
+        return [self.team_names[i] for i in np.flatnonzero(self.counts()[:, gameweek - 1] > 1)]
+
+def fetch_fixture_table(client=None):
+    fixtures, bootstrap_data = (client or get_client()).get_many([
+        ('fixtures', {}),
+        ('bootstrap_static', {}),
+    ])
+    return FixtureTable.from_api(fixtures, bootstrap_data['teams'], len(bootstrap_data['events']) or None)
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the per-team, per-gameweek fixture table from the API")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('refresh', help="Fetch fixtures and save the table")
+    show_parser = subparsers.add_parser('show', help="Print upcoming fixtures per team")
+    show_parser.add_argument('--gameweek', type=int, default=1)
+    show_parser.add_argument('--horizon', type=int, default=5)
+    args = parser.parse_args()
+
+    if args.command == 'refresh':
+        table = fetch_fixture_table()
+        print(f"Saved {len(table.fixture_ids) // 2} fixtures for {len(table.team_ids)} teams to {table.save()}")
+    elif args.command == 'show':
+        table = FixtureTable.load()
+        for team in table.team_names:
+            fixtures = table.fixtures(team, args.gameweek, args.horizon)
+            print(f"{team}: " + ', '.join(
+                f"{fixture['opponent']} ({'H' if fixture['is_home'] else 'A'}, {fixture['difficulty']})"
+                for fixture in fixtures
+            ))
+        for gameweek in range(args.gameweek, min(args.gameweek + args.horizon, table.num_gameweeks + 1)):
+            blanks, doubles = table.blank_teams(gameweek), table.double_teams(gameweek)
+            if blanks or doubles:
+                print(f"GW{gameweek}: blank {blanks or '-'}, double {doubles or '-'}")
+
+if __name__ == "__main__":
+    main()
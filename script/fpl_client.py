@@ -0,0 +1,196 @@
+# script/fpl_client.py
+
+import asyncio
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from urllib.parse import urlsplit
+
+import requests
+
+# Add the parent directory to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from config.url_config import BASE_URL, ENDPOINTS
+from config.client_config import (
+    REQUEST_TIMEOUT, MAX_CONNECTIONS_PER_HOST, MAX_RETRIES, RETRY_STATUSES,
+    BACKOFF_BASE, BACKOFF_MAX, USER_AGENT
+)
+from instrumentation import count, instrumented
+from response_cache import get_cache
+
+logger = logging.getLogger(__name__)
+
+def build_session(pool_size=MAX_CONNECTIONS_PER_HOST):
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers['User-Agent'] = USER_AGENT
+    return session
+
+@instrumented('http.request')
+def send(session, url, **kwargs):
+    return session.get(url, **kwargs)
+
+def backoff_delay(attempt, retry_after=None):
+    if retry_after is not None:
+        try:
+            return min(float(retry_after), BACKOFF_MAX)
+        except ValueError:
+            pass
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+class AsyncFPLClient:
+    # Requests run on a pooled requests.Session inside a bounded executor, so every call
+    # reuses keep-alive connections while asyncio handles fan-out, limits and backoff.
+    # An instance must only be awaited from one event loop.
+    def __init__(self, base_url=BASE_URL, timeout=REQUEST_TIMEOUT, max_per_host=MAX_CONNECTIONS_PER_HOST,
+                 max_retries=MAX_RETRIES, cache=None, use_cache=True):
+        self.base_url = base_url
+        self.cache = (cache or get_cache()) if use_cache else None
+        self.timeout = timeout
+        self.max_per_host = max_per_host
+        self.max_retries = max_retries
+        self.session = build_session(max_per_host)
+        self._executor = ThreadPoolExecutor(max_workers=max_per_host, thread_name_prefix='fpl-client')
+        self._semaphores = {}
+
+    def url(self, endpoint, **path_params):
+        return f"{self.base_url}{ENDPOINTS[endpoint].format(**path_params)}"
+
+    def _semaphore(self, url):
+        host = urlsplit(url).netloc
+        if host not in self._semaphores:
+            self._semaphores[host] = asyncio.Semaphore(self.max_per_host)
+        return self._semaphores[host]
+
+    async def request(self, url, params=None, headers=None):
+        loop = asyncio.get_running_loop()
+        attempt = 0
+        while True:
+            try:
+                async with self._semaphore(url):
+                    response = await loop.run_in_executor(self._executor, partial(
+                        send, self.session, url, params=params, headers=headers, timeout=self.timeout))
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = backoff_delay(attempt)
+                logger.warning(f"{url}: {e.__class__.__name__}, retrying in {delay:.1f}s")
+            else:
+                count('http_requests')
+                count('http_bytes', len(response.content))
+                if response.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                    response.raise_for_status()
+                    return response
+                delay = backoff_delay(attempt, response.headers.get('Retry-After'))
+                logger.warning(f"{url}: HTTP {response.status_code}, retrying in {delay:.1f}s")
+            attempt += 1
+            count('http_retries')
+            await asyncio.sleep(delay)
+
+    async def get(self, endpoint, params=None, **path_params):
+        return json.loads(await self.get_body(endpoint, params, **path_params))
+
+    async def get_body(self, endpoint, params=None, **path_params):
+        # The undecoded response body, for callers that parse it as a stream
+        url = self.url(endpoint, **path_params)
+        if self.cache is None or not self.cache.cacheable(endpoint):
+            response = await self.request(url, params=params)
+            return response.content
+        return await self.get_cached_body(endpoint, url, params)
+
+    async def get_cached_body(self, endpoint, url, params=None):
+        key = requests.Request('GET', url, params=params).prepare().url
+        entry = self.cache.lookup(key)
+        if entry is not None and (self.cache.offline or self.cache.is_fresh(entry, endpoint)):
+            return self.cache.hit(entry)
+        if self.cache.offline:
+            raise requests.exceptions.ConnectionError(f"Offline mode: no cached copy of {key}")
+
+        try:
+            response = await self.request(url, params=params, headers=self.cache.conditional_headers(entry))
+        except requests.exceptions.RequestException as e:
+            # Fall back to the last good copy unless the API says the resource is gone
+            client_error = isinstance(e, requests.exceptions.HTTPError) and e.response is not None \
+                and e.response.status_code < 500
+            if entry is None or client_error:
+                raise
+            logger.warning(f"{key}: {e}; serving cached copy from {time.ctime(entry['fetched_at'])}")
+            return self.cache.serve_stale(entry)
+
+        if response.status_code == 304 and entry is not None:
+            return self.cache.revalidated(entry)
+        return self.cache.store(key, endpoint, response)
+
+    async def get_many(self, calls, return_exceptions=False, raw=False):
+        # calls: iterable of (endpoint, path_params) or (endpoint, path_params, query_params);
+        # raw=True returns the response bodies undecoded
+        get = self.get_body if raw else self.get
+        return await asyncio.gather(
+            *(get(call[0], call[2] if len(call) > 2 else None, **call[1]) for call in calls),
+            return_exceptions=return_exceptions
+        )
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        self.session.close()
+
+class FPLClient:
+    # Blocking facade over AsyncFPLClient for the existing scripts. Coroutines run on a
+    # private event loop in a daemon thread, so it is safe to call from any thread.
+    def __init__(self, **kwargs):
+        self.async_client = AsyncFPLClient(**kwargs)
+        self._loop = None
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        return self.async_client.base_url
+
+    def url(self, endpoint, **path_params):
+        return self.async_client.url(endpoint, **path_params)
+
+    def _run(self, coro):
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name='fpl-client-loop', daemon=True).start()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def request(self, url, params=None, headers=None):
+        return self._run(self.async_client.request(url, params=params, headers=headers))
+
+    def get(self, endpoint, params=None, **path_params):
+        return self._run(self.async_client.get(endpoint, params, **path_params))
+
+    def get_body(self, endpoint, params=None, **path_params):
+        return self._run(self.async_client.get_body(endpoint, params, **path_params))
+
+    def get_many(self, calls, return_exceptions=False, raw=False):
+        return self._run(self.async_client.get_many(list(calls), return_exceptions=return_exceptions, raw=raw))
+
+    def close(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        self.async_client.close()
+
+_default_client = None
+_default_client_lock = threading.Lock()
+
+def get_client():
+    # Process-wide client so every script shares one connection pool
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = FPLClient()
+        return _default_client
@@ -0,0 +1,125 @@
+# script/fpl_stub_server.py
+#
+# Local stand-in for the FPL API. Serves recorded JSON payloads from a directory laid out like
+# the API paths (bootstrap-static/ -> DIR/bootstrap-static.json, entry/1/event/8/picks/ ->
+# DIR/entry/1/event/8/picks.json), optionally with injected latency and 429/503 failures.
+#
+#   python3 script/fpl_stub_server.py record DIR bootstrap-static/ fixtures/ entry/4193107/
+#   python3 script/fpl_stub_server.py serve DIR --port 8765 --fail-rate 0.1
+#   FPL_BASE_URL=http://127.0.0.1:8765/api/ make recommender
+
+import argparse
+import email.utils
+import hashlib
+import json
+import os
+import random
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+# Add the parent directory to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+API_PREFIX = '/api/'
+
+def payload_path(root, api_path, query=''):
+    name = api_path.strip('/') or 'index'
+    if query:
+        name += '@' + query.replace('&', '@')
+    return os.path.join(root, *name.split('/')) + '.json'
+
+class StubHandler(BaseHTTPRequestHandler):
+    root = None
+    fail_rate = 0.0
+    latency = 0.0
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        if self.latency:
+            time.sleep(self.latency)
+        if self.fail_rate and random.random() < self.fail_rate:
+            status = random.choice([429, 503])
+            self.send_response(status)
+            self.send_header('Retry-After', '0')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        api_path = parts.path[len(API_PREFIX):] if parts.path.startswith(API_PREFIX) else parts.path
+        path = payload_path(self.root, api_path, parts.query)
+        if not os.path.exists(path):
+            path = payload_path(self.root, api_path)
+        if not os.path.exists(path):
+            self.send_error(404)
+            return
+
+        with open(path, 'rb') as f:
+            body = f.read()
+        etag = '"%s"' % hashlib.md5(body).hexdigest()
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', email.utils.formatdate(os.path.getmtime(path), usegmt=True))
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+def make_server(root, host='127.0.0.1', port=8765, fail_rate=0.0, latency=0.0):
+    handler = type('Handler', (StubHandler,), {'root': root, 'fail_rate': fail_rate, 'latency': latency})
+    return ThreadingHTTPServer((host, port), handler)
+
+def record(root, api_paths):
+    from fpl_client import get_client
+
+    client = get_client()
+    for api_path in api_paths:
+        api_path, _, query = api_path.partition('?')
+        response = client.request(f"{client.base_url}{api_path}", params=query or None)
+        path = payload_path(root, api_path, query)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(response.json(), f)
+        print(f"Recorded {api_path} -> {path}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve or record FPL API payloads for offline runs")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    serve_parser = subparsers.add_parser('serve')
+    serve_parser.add_argument('root')
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=8765)
+    serve_parser.add_argument('--fail-rate', type=float, default=0.0, help="Share of requests answered 429/503")
+    serve_parser.add_argument('--latency', type=float, default=0.0, help="Seconds added to every response")
+
+    record_parser = subparsers.add_parser('record')
+    record_parser.add_argument('root')
+    record_parser.add_argument('paths', nargs='+', help="API paths such as bootstrap-static/")
+
+    args = parser.parse_args()
+    if args.command == 'record':
+        record(args.root, args.paths)
+        return
+
+    server = make_server(args.root, args.host, args.port, args.fail_rate, args.latency)
+    print(f"Serving {args.root} at http://{args.host}:{args.port}{API_PREFIX}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+# script/history_backfill.py
+
+import argparse
+import gzip
+import json
+import logging
+import os
+import sys
+import time
+
+import pandas as pd
+
+# Add the parent directory to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from config.history_config import (
+    HISTORY_DIR, HISTORY_RAW_DIR, HISTORY_CHECKPOINT, HISTORY_TABLE, HISTORY_DTYPES,
+    BACKFILL_WORKERS, BACKFILL_BATCH_SIZE, BACKFILL_BATCH_PAUSE
+)
+from fpl_client import FPLClient
+from snapshot_store import SnapshotStore
+
+logger = logging.getLogger(__name__)
+
+def atomic_write(path, data):
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+class HistoryBackfill:
+    # Downloads element-summary for every player in batches through a bounded client pool. Each
+    # raw response is written gzipped and atomically, and the checkpoint records the last finished
+    # gameweek each player was fetched after, so an interrupted run resumes with the players still
+    # missing and later runs only refetch players whose history is behind. The (player, gameweek)
+    # table is rebuilt from the raw files alone, so it never needs the network.
+    def __init__(self, client=None, root=HISTORY_DIR, raw_dir=HISTORY_RAW_DIR, checkpoint_path=HISTORY_CHECKPOINT,
+                 workers=BACKFILL_WORKERS, batch_size=BACKFILL_BATCH_SIZE, batch_pause=BACKFILL_BATCH_PAUSE):
+        # The raw files are this command's cache, so responses skip the shared HTTP cache
+        self.client = client or FPLClient(max_per_host=workers, use_cache=False)
+        self.store = SnapshotStore(root)
+        self.raw_dir = raw_dir
+        self.checkpoint_path = checkpoint_path
+        self.batch_size = batch_size
+        self.batch_pause = batch_pause
+        self.checkpoint = self.load_checkpoint()
+
+    def load_checkpoint(self):
+        try:
+            with open(self.checkpoint_path) as f:
+                checkpoint = json.load(f)
+            return {int(player_id): event for player_id, event in checkpoint['players'].items()}
+        except (OSError, ValueError, KeyError):
+            return {}
+
+    def save_checkpoint(self):
+        os.makedirs(os.path.dirname(self.checkpoint_path), exist_ok=True)
+        data = {'players': {str(player_id): event for player_id, event in sorted(self.checkpoint.items())}}
+        atomic_write(self.checkpoint_path, json.dumps(data).encode())
+
+    def raw_path(self, player_id):
+        return os.path.join(self.raw_dir, f"{player_id}.json.gz")
+
+    def pending(self, player_ids, finished_event, refresh=False):
+        # Players never fetched, whose raw file is gone, or fetched before the last finished gameweek
+        return [
+            player_id for player_id in player_ids
+            if refresh or self.checkpoint.get(player_id, -1) < finished_event
+            or not os.path.exists(self.raw_path(player_id))
+        ]
+
+    def download(self, refresh=False):
+        bootstrap = self.client.get('bootstrap_static')
+        finished_event = max((event['id'] for event in bootstrap['events'] if event['finished']), default=0)
+        player_ids = sorted(element['id'] for element in bootstrap['elements'])
+        todo = self.pending(player_ids, finished_event, refresh)
+        logger.info(f"{len(todo)} of {len(player_ids)} players to fetch (last finished gameweek {finished_event})")
+
+        os.makedirs(self.raw_dir, exist_ok=True)
+        failed = []
+        for start in range(0, len(todo), self.batch_size):
+            batch = todo[start:start + self.batch_size]
+            results = self.client.get_many([('element_summary', {'player_id': player_id}) for player_id in batch],
+                                           return_exceptions=True)
+            for player_id, result in zip(batch, results):
+                if isinstance(result, Exception):
+                    failed.append(player_id)
+                    logger.warning(f"Player {player_id}: {result}")
+                    continue
+                atomic_write(self.raw_path(player_id), gzip.compress(json.dumps(result).encode()))
+                self.checkpoint[player_id] = finished_event
+            self.save_checkpoint()
+            logger.info(f"Fetched {min(start + self.batch_size, len(todo))}/{len(todo)}")
+            if self.batch_pause and start + self.batch_size < len(todo):
+                time.sleep(self.batch_pause)
+        return len(todo) - len(failed), failed
+
+    def read_raw(self):
+        # (player, gameweek) rows from every raw response on disk
+        rows = []
+        for name in sorted(os.listdir(self.raw_dir)) if os.path.isdir(self.raw_dir) else []:
+            if not name.endswith('.json.gz'):
+                continue
+            with gzip.open(os.path.join(self.raw_dir, name)) as f:
+                rows.extend(json.load(f).get('history', []))
+        return pd.DataFrame(rows)
+
+    def build_table(self):
+        history = self.read_raw()
+        if history.empty:
+            return None, 0
+        history = history.sort_values(['element', 'round', 'fixture'], kind='stable').reset_index(drop=True)
+        return self.store.save(history, HISTORY_TABLE, dtypes=HISTORY_DTYPES), len(history)
+
+def load_history(columns=None, root=HISTORY_DIR):
+    # The (player, gameweek) table sorted by element then round
+    return SnapshotStore(root).load(HISTORY_TABLE, columns=columns, fallback=False)
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill per-gameweek player histories from element-summary")
+    parser.add_argument('command', nargs='?', choices=['run', 'build'], default='run',
+                        help="run: download what is missing, then build; build: rebuild the table from raw files only")
+    parser.add_argument('--refresh', action='store_true', help="Refetch every player")
+    parser.add_argument('--workers', type=int, default=BACKFILL_WORKERS, help="Concurrent requests")
+    parser.add_argument('--batch-size', type=int, default=BACKFILL_BATCH_SIZE, help="Players per checkpoint")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    backfill = HistoryBackfill(workers=args.workers, batch_size=args.batch_size)
+    if args.command == 'run':
+        start = time.perf_counter()
+        fetched, failed = backfill.download(args.refresh)
+        logger.info(f"Fetched {fetched} players in {time.perf_counter() - start:.1f}s")
+        if failed:
+            logger.warning(f"{len(failed)} players failed and will be retried on the next run: {failed[:20]}")
+
+    start = time.perf_counter()
+    path, rows = backfill.build_table()
+    if path is None:
+        print("No raw histories downloaded yet.")
+        sys.exit(1)
+    print(f"Saved {rows} player-gameweek rows to {path} in {time.perf_counter() - start:.2f}s")
+
+if __name__ == "__main__":
+    main()
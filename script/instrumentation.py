@@ -0,0 +1,287 @@
+# script/instrumentation.py
+#
+# Stage timers and counters for the fetch, load, score and report paths. Every hook checks one
+# module global and returns when no run is being recorded, so instrumented code costs a function
+# call when FPL_INSTRUMENT is unset. With it set, the run is recorded from the first import and
+# written at exit as a JSON report plus a Chrome trace:
+#
+#   FPL_INSTRUMENT=1 make recommender
+#   FPL_INSTRUMENT=sample make analyze
+#   python3 script/instrumentation.py show
+
+import argparse
+import atexit
+import cProfile
+import functools
+import glob
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+
+# Add the parent directory to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from config.instrumentation_config import INSTRUMENT_MODE, PROFILE_DIR, SAMPLE_INTERVAL, PROFILE_TOP
+
+MODES = ['timers', 'cprofile', 'sample']
+
+class Stage:
+    # Context manager timing one span of a recorded run
+    __slots__ = ('recorder', 'name', 'start')
+
+    def __init__(self, recorder, name):
+        self.recorder = recorder
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.recorder.spans.append((self.name, self.start, time.perf_counter_ns() - self.start,
+                                    threading.get_ident()))
+        return False
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+NULL_STAGE = _NullStage()
+
+class Sampler:
+    # Samples the stack of every other thread each `interval` seconds and counts them collapsed
+    # (outermost frame first, ';'-separated), the input format of flamegraph.pl and speedscope
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='fpl-sampler', daemon=True)
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def top(self, count=PROFILE_TOP):
+        # Functions by share of samples spent in them (self time)
+        leaves = Counter()
+        for stack, samples in self.stacks.items():
+            leaves[stack.rsplit(';', 1)[-1]] += samples
+        total = sum(leaves.values()) or 1
+        return [{'function': name, 'samples': samples, 'share': samples / total}
+                for name, samples in leaves.most_common(count)]
+
+class Recorder:
+    def __init__(self, name, mode='timers'):
+        self.name = name
+        self.mode = mode
+        self.started_at = datetime.now()
+        self.start_ns = time.perf_counter_ns()
+        self.spans = []
+        self.counters = defaultdict(int)
+        self._lock = threading.Lock()
+        self.profiler = None
+        self.sampler = None
+        if mode == 'cprofile':
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        elif mode == 'sample':
+            self.sampler = Sampler()
+            self.sampler.start()
+
+    def count(self, name, value):
+        with self._lock:
+            self.counters[name] += value
+
+    def stop(self):
+        self.wall_ns = time.perf_counter_ns() - self.start_ns
+        if self.profiler is not None:
+            self.profiler.disable()
+        if self.sampler is not None:
+            self.sampler.stop()
+
+    def stage_totals(self):
+        totals = {}
+        for name, _, duration, _ in self.spans:
+            stage = totals.setdefault(name, {'calls': 0, 'seconds': 0.0, 'max_seconds': 0.0})
+            stage['calls'] += 1
+            stage['seconds'] += duration / 1e9
+            stage['max_seconds'] = max(stage['max_seconds'], duration / 1e9)
+        return dict(sorted(totals.items(), key=lambda item: -item[1]['seconds']))
+
+    def profile_top(self, count=PROFILE_TOP):
+        if self.profiler is not None:
+            stats = pstats.Stats(self.profiler, stream=io.StringIO())
+            rows = sorted(stats.stats.items(), key=lambda item: -item[1][3])[:count]
+            return [{
+                'function': f"{os.path.basename(filename)}:{line}:{function}",
+                'calls': calls, 'self_seconds': self_time, 'cumulative_seconds': cumulative,
+            } for (filename, line, function), (_, calls, self_time, cumulative, _) in rows]
+        if self.sampler is not None:
+            return self.sampler.top(count)
+        return None
+
+    def report(self):
+        report = {
+            'script': self.name,
+            'mode': self.mode,
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'wall_seconds': self.wall_ns / 1e9,
+            'stages': self.stage_totals(),
+            'counters': dict(sorted(self.counters.items())),
+        }
+        top = self.profile_top()
+        if top is not None:
+            report['profile_top'] = top
+        return report
+
+    def chrome_trace(self):
+        # Complete ('X') events per span and the final counter values, in microseconds
+        pid = os.getpid()
+        threads = {thread_id: i for i, thread_id in enumerate(dict.fromkeys(span[3] for span in self.spans))}
+        events = [{
+            'name': name, 'cat': name.split('.', 1)[0], 'ph': 'X', 'pid': pid, 'tid': threads[thread_id],
+            'ts': (start - self.start_ns) / 1000, 'dur': duration / 1000,
+        } for name, start, duration, thread_id in self.spans]
+        events.append({'name': 'counters', 'ph': 'C', 'pid': pid, 'tid': 0, 'ts': self.wall_ns / 1000,
+                       'args': dict(self.counters)})
+        return {'traceEvents': events, 'displayTimeUnit': 'ms',
+                'otherData': {'script': self.name, 'mode': self.mode}}
+
+    def save(self, profile_dir=PROFILE_DIR):
+        os.makedirs(profile_dir, exist_ok=True)
+        base = os.path.join(profile_dir, f"{self.name}_{self.started_at:%Y%m%d_%H%M%S}_{os.getpid()}")
+        paths = {'report': f"{base}.json", 'trace': f"{base}.trace.json"}
+        with open(paths['report'], 'w') as f:
+            json.dump(self.report(), f, indent=2)
+        with open(paths['trace'], 'w') as f:
+            json.dump(self.chrome_trace(), f)
+        if self.profiler is not None:
+            paths['profile'] = f"{base}.prof"
+            self.profiler.dump_stats(paths['profile'])
+        if self.sampler is not None:
+            paths['profile'] = f"{base}.folded"
+            with open(paths['profile'], 'w') as f:
+                f.writelines(f"{stack} {samples}\n" for stack, samples in self.sampler.stacks.most_common())
+        return paths
+
+_recorder = None
+
+def enabled():
+    return _recorder is not None
+
+def stage(name):
+    # `with stage('fetch.http'):` times the block when a run is being recorded
+    if _recorder is None:
+        return NULL_STAGE
+    return Stage(_recorder, name)
+
+def instrumented(name):
+    # Decorator form of stage()
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if _recorder is None:
+                return function(*args, **kwargs)
+            with Stage(_recorder, name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+def count(name, value=1):
+    if _recorder is not None:
+        _recorder.count(name, value)
+
+def start(name=None, mode='timers'):
+    # Record this process from now on; the report is written by finish() or at exit
+    global _recorder
+    if _recorder is None:
+        name = name or os.path.splitext(os.path.basename(sys.argv[0] or 'python'))[0] or 'python'
+        _recorder = Recorder(name, mode)
+        atexit.register(finish)
+    return _recorder
+
+def finish(profile_dir=PROFILE_DIR):
+    # Stop recording and save the report; returns the written paths
+    global _recorder
+    recorder, _recorder = _recorder, None
+    if recorder is None:
+        return None
+    recorder.stop()
+    paths = recorder.save(profile_dir)
+    print(f"Instrumentation report: {paths['report']} (trace: {paths['trace']})", file=sys.stderr)
+    return paths
+
+if INSTRUMENT_MODE not in ('', '0') and __name__ != '__main__':
+    start(mode=INSTRUMENT_MODE if INSTRUMENT_MODE in MODES else 'timers')
+
+def print_report(report):
+    wall = report['wall_seconds']
+    print(f"{report['script']} ({report['mode']}) at {report['started_at']}: {wall:.3f}s wall")
+    print(f"\n{'stage':32s} {'calls':>7s} {'seconds':>10s} {'of wall':>8s} {'max':>10s}")
+    for name, stage_total in report['stages'].items():
+        print(f"{name:32s} {stage_total['calls']:7d} {stage_total['seconds']:10.4f} "
+              f"{stage_total['seconds'] / wall if wall else 0:8.1%} {stage_total['max_seconds']:10.4f}")
+    if report['counters']:
+        print("\nCounters:")
+        for name, value in report['counters'].items():
+            print(f"  {name:30s} {value}")
+    if report.get('profile_top'):
+        print("\nProfile:")
+    for row in report.get('profile_top', []):
+        if 'samples' in row:
+            print(f"  {row['share']:6.1%}  {row['function']}")
+        else:
+            print(f"  {row['cumulative_seconds']:8.3f}s cum {row['self_seconds']:8.3f}s self  {row['function']}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Show instrumentation reports written with FPL_INSTRUMENT set")
+    parser.add_argument('command', choices=['show', 'list'])
+    parser.add_argument('report', nargs='?', help="Report JSON (default: the latest)")
+    args = parser.parse_args()
+
+    reports = sorted(
+        (path for path in glob.glob(os.path.join(PROFILE_DIR, '*.json')) if not path.endswith('.trace.json')),
+        key=os.path.getmtime
+    )
+    if args.command == 'list':
+        for path in reports:
+            print(path)
+        return
+    path = args.report or (reports[-1] if reports else None)
+    if path is None:
+        print(f"No reports in {PROFILE_DIR}; run a script with FPL_INSTRUMENT=1 first.")
+        sys.exit(1)
+    with open(path) as f:
+        print_report(json.load(f))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+# script/league.py
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Add the parent directory to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from config.league_config import (
+    LEAGUE_ID, LEAGUE_PAGE_WORKERS, LEAGUE_DIR, LEAGUE_POINTS_RANGE, TEMPLATE_OWNERSHIP, DIFFERENTIAL_OWNERSHIP
+)
+from config.team_watcher_config import LIVE_POLL_INTERVAL
+from config.transfer_recommender_config import XI_SIZE
+from fpl_client import get_client
+
+logger = logging.getLogger(__name__)
+
+class RankIndex:
+    # Fenwick tree over integer scores in points_range: how many entries hold each score, with
+    # O(log S) insert/remove and O(log S) rank queries, so a poll that changes k entries costs
+    # O(k log S) instead of re-sorting the league. Ranks are shared on ties (1, 2, 2, 4).
+    def __init__(self, scores=(), points_range=LEAGUE_POINTS_RANGE):
+        self.low, high = points_range
+        self.size = high - self.low + 1
+        scores = self.clip(scores)
+        counts = np.bincount(scores - self.low, minlength=self.size) if len(scores) else np.zeros(self.size, dtype=np.int64)
+        # Linear-time build: node i covers (i - lowbit(i), i], read off the prefix sums
+        prefix = np.concatenate([[0], np.cumsum(counts)])
+        nodes = np.arange(1, self.size + 1)
+        self.tree = [0] + (prefix[nodes] - prefix[nodes - (nodes & -nodes)]).tolist()
+        self.count = int(len(scores))
+
+    def clip(self, scores):
+        return np.clip(np.asarray(scores, dtype=np.int64), self.low, self.low + self.size - 1)
+
+    def add(self, score, delta=1):
+        i = int(self.clip(score)) - self.low + 1
+        while i <= self.size:
+            self.tree[i] += delta
+            i += i & -i
+        self.count += delta
+
+    def move(self, old_score, new_score):
+        if old_score != new_score:
+            self.add(old_score, -1)
+            self.add(new_score, 1)
+
+    def at_most(self, score):
+        i = int(self.clip(score)) - self.low + 1
+        total = 0
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+    def rank(self, score):
+        return self.count - self.at_most(score) + 1
+
+class LeagueTable:
+    # Entries of one classic league as parallel arrays. Live totals are the standings total
+    # before this gameweek plus live gameweek points; ranks come from the RankIndex.
+    def __init__(self, league_id, entries, entry_names, player_names, totals, event_totals, last_ranks, name=''):
+        self.league_id = league_id
+        self.name = name
+        self.entries = np.asarray(entries, dtype=np.int64)
+        self.entry_names = np.asarray(entry_names, dtype=str)
+        self.player_names = np.asarray(player_names, dtype=str)
+        self.totals = np.asarray(totals, dtype=np.int64)
+        self.event_totals = np.asarray(event_totals, dtype=np.int64)
+        self.last_ranks = np.asarray(last_ranks, dtype=np.int64)
+        self.rows = pd.Index(self.entries)
+        self.live_totals = self.totals.copy()
+        self.index = RankIndex(self.live_totals)
+
+    def __len__(self):
+        return len(self.entries)
+
+    @classmethod
+    def from_api(cls, league_id, pages):
+        results = [result for page in pages for result in page['standings']['results']]
+        results = list({result['entry']: result for result in results}.values())
+        name = pages[0]['league']['name'] if pages and 'league' in pages[0] else ''
+        return cls(
+            league_id,
+            [result['entry'] for result in results],
+            [result.get('entry_name', '') for result in results],
+            [result.get('player_name', '') for result in results],
+            [result['total'] for result in results],
+            [result.get('event_total', 0) for result in results],
+            [result.get('last_rank', 0) for result in results],
+            name,
+        )
+
+    @classmethod
+    def fetch(cls, league_id, client=None, workers=LEAGUE_PAGE_WORKERS):
+        # Standings pages in concurrent rounds of `workers` pages until a page reports no next page
+        client = client or get_client()
+        pages, start = [], 1
+        while True:
+            calls = [('league_standings', {'league_id': league_id}, {'page_standings': page})
+                     for page in range(start, start + workers)]
+            batch = client.get_many(calls)
+            for page in batch:
+                pages.append(page)
+                if not page['standings']['has_next'] or not page['standings']['results']:
+                    return cls.from_api(league_id, pages)
+            start += workers
+
+    @classmethod
+    def load(cls, league_id, league_dir=LEAGUE_DIR):
+        with np.load(os.path.join(league_dir, f"{league_id}.npz")) as data:
+            return cls(league_id, data['entries'], data['entry_names'], data['player_names'], data['totals'],
+                       data['event_totals'], data['last_ranks'], str(data['name']))
+
+    def save(self, league_dir=LEAGUE_DIR):
+        os.makedirs(league_dir, exist_ok=True)
+        path = os.path.join(league_dir, f"{self.league_id}.npz")
+        tmp_path = f"{path}.tmp{os.getpid()}.npz"
+        np.savez(tmp_path, entries=self.entries, entry_names=self.entry_names, player_names=self.player_names,
+                 totals=self.totals, event_totals=self.event_totals, last_ranks=self.last_ranks,
+                 name=np.array(self.name))
+        os.replace(tmp_path, path)
+        return path
+
+    def update(self, entries, event_points):
+        # Set live gameweek points for some entries; returns the rows whose live total changed
+        rows = self.rows.get_indexer(entries)
+        known = rows >= 0
+        rows = rows[known]
+        new_totals = self.totals[rows] - self.event_totals[rows] + np.asarray(event_points, dtype=np.int64)[known]
+        changed = new_totals != self.live_totals[rows]
+        for row, total in zip(rows[changed].tolist(), new_totals[changed].tolist()):
+            self.index.move(self.live_totals[row], total)
+            self.live_totals[row] = total
+        return rows[changed]
+
+    def rank(self, rows):
+        return np.array([self.index.rank(total) for total in self.live_totals[rows].tolist()], dtype=np.int64)
+
+    def standings(self, top=None):
+        # Live table, best first; only the `top` rows are sorted when given
+        rows = np.arange(len(self))
+        if top is not None and top < len(self):
+            rows = np.argpartition(-self.live_totals, top - 1)[:top]
+        rows = rows[np.argsort(-self.live_totals[rows], kind='stable')]
+        return pd.DataFrame({
+            'rank': self.rank(rows),
+            'last_rank': self.last_ranks[rows],
+            'entry': self.entries[rows],
+            'entry_name': self.entry_names[rows],
+            'total': self.live_totals[rows],
+        })
+
+def ownership(squads, num_players):
+    # Per-player league stats from every entry's picks in one pass: share of squads owning the
+    # player, starting them, captaining them, and effective ownership (multipliers summed)
+    count = max(len(squads), 1)
+    elements = squads.elements.ravel()
+    multipliers = squads.multipliers.ravel()
+    return pd.DataFrame({
+        'owned': np.bincount(elements, minlength=num_players) / count,
+        'started': np.bincount(elements, weights=multipliers > 0, minlength=num_players) / count,
+        'captained': np.bincount(elements, weights=multipliers > 1, minlength=num_players) / count,
+        'effective': np.bincount(elements, weights=multipliers, minlength=num_players) / count,
+    })
+
+def template_stats(squads, owned):
+    # Per entry: how much of the XI is template, how many differentials it starts, and the mean
+    # league ownership of its starters
+    xi_owned = owned[squads.elements[:, :XI_SIZE]]
+    return pd.DataFrame({
+        'entry': squads.team_ids,
+        'template_share': (xi_owned >= TEMPLATE_OWNERSHIP).mean(axis=1),
+        'differentials': (xi_owned < DIFFERENTIAL_OWNERSHIP).sum(axis=1),
+        'mean_ownership': xi_owned.mean(axis=1),
+    })
+
+def main():
+    from live_points import LiveTracker
+
+    parser = argparse.ArgumentParser(description="Classic league standings, live ranks and ownership")
+    parser.add_argument('league_id', nargs='?', type=int, default=LEAGUE_ID)
+    parser.add_argument('--live', action='store_true', help="Re-rank on live gameweek points")
+    parser.add_argument('--once', action='store_true', help="With --live, poll once and exit")
+    parser.add_argument('--interval', type=int, default=LIVE_POLL_INTERVAL, help="Seconds between live polls")
+    parser.add_argument('--top', type=int, default=20)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    start = time.perf_counter()
+    table = LeagueTable.fetch(args.league_id)
+    table.save()
+    print(f"{table.name or args.league_id}: {len(table)} entries fetched in {time.perf_counter() - start:.2f}s")
+    print(table.standings(args.top).to_string(index=False))
+
+    try:
+        tracker = LiveTracker(table.entries.tolist())
+    except ValueError as e:
+        print(f"\n{e}. The season might not have started or might be between gameweeks; "
+              "skipping ownership and template XIs.")
+        return
+    stats = ownership(tracker.squads, len(tracker.names))
+    stats.insert(0, 'web_name', tracker.names)
+    print(f"\nHighest effective ownership (gameweek {tracker.gameweek}):")
+    print(stats.nlargest(15, 'effective').to_string(float_format='%.2f'))
+    templates = template_stats(tracker.squads, stats['owned'].to_numpy())
+    print("\nMost differential XIs:")
+    print(templates.nsmallest(10, 'mean_ownership').to_string(index=False, float_format='%.2f'))
+
+    while args.live:
+        poll_start = time.perf_counter()
+        live = tracker.poll()
+        changed = table.update(live['team_id'].to_numpy(), live['points'].to_numpy())
+        print(f"\nLive: {len(changed)} totals changed, re-ranked in {time.perf_counter() - poll_start:.3f}s")
+        print(table.standings(args.top).to_string(index=False))
+        if args.once:
+            break
+        time.sleep(args.interval)
+
+if __name__ == "__main__":
+    main()
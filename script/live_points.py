@@ -0,0 +1,227 @@
+# script/live_points.py
+#
+# Live gameweek points for many squads at once. Picks are fetched once per gameweek; each poll
+# re-reads only event/{gw}/live and the gameweek's fixtures (both revalidated by ETag), then
+# scores every squad in one vectorized pass. Against recorded payloads:
+#
+#   python3 script/fpl_stub_server.py record DIR bootstrap-static/ event/8/live/ fixtures/ entry/1/event/8/picks/
+#   python3 script/fpl_stub_server.py serve DIR
+#   FPL_BASE_URL=http://127.0.0.1:8765/api/ python3 script/live_points.py 1 --once
+
+import argparse
+import logging
+import os
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# Add the parent directory to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from config.team_watcher_config import TEAM_ID, LIVE_POLL_INTERVAL, WATCH_MAX_WORKERS
+from config.transfer_recommender_config import XI_SIZE, XI_MIN_PLAYERS
+from fpl_client import FPLClient
+from team_watcher import SQUAD_SIZE
+
+logger = logging.getLogger(__name__)
+
+OUTPUT_COLUMNS = ['team_id', 'points', 'hits', 'captain', 'auto_subs']
+
+class LiveSquads:
+    # The picks of many squads as a fixed-width sparse matrix (ELLPACK layout): row i holds the
+    # 15 player ids of squad i in pick order and their multipliers, so live points for every
+    # squad are one gather of the live points vector and a row sum. Auto-subs and the vice
+    # captain rule rewrite the multipliers, vectorized over squads with one step per bench slot.
+    def __init__(self, team_ids, elements, multipliers, vice_captains, hits):
+        self.team_ids = np.asarray(team_ids, dtype=np.int64)
+        self.elements = np.asarray(elements, dtype=np.int64)
+        self.multipliers = np.asarray(multipliers, dtype=np.int64)
+        self.vice_captains = np.asarray(vice_captains, dtype=bool)
+        self.hits = np.asarray(hits, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.team_ids)
+
+    @classmethod
+    def from_picks(cls, all_picks):
+        # all_picks: {team_id: entry_picks payload}; teams without a full squad are skipped
+        all_picks = {team_id: picks for team_id, picks in all_picks.items()
+                     if picks and len(picks.get('picks', [])) == SQUAD_SIZE}
+        rows = [sorted(picks['picks'], key=lambda pick: pick['position']) for picks in all_picks.values()]
+        return cls(
+            list(all_picks),
+            [[pick['element'] for pick in row] for row in rows],
+            [[pick['multiplier'] for pick in row] for row in rows],
+            [[pick.get('is_vice_captain', False) for pick in row] for row in rows],
+            [(picks.get('entry_history') or {}).get('event_transfers_cost', 0) for picks in all_picks.values()],
+        ) if rows else cls([], np.zeros((0, SQUAD_SIZE)), np.zeros((0, SQUAD_SIZE)), np.zeros((0, SQUAD_SIZE)), [])
+
+    def auto_subs(self, minutes, done, positions):
+        # Multipliers after automatic substitutions. A starter is replaced when his fixtures are
+        # over and he did not play; bench players come on in bench order if they played and the
+        # XI keeps one goalkeeper and the XI_MIN_PLAYERS floor. Bench boost squads are left alone.
+        multipliers = self.multipliers.copy()
+        played = minutes[self.elements] > 0
+        types = positions[self.elements]
+        starter = np.zeros_like(played)
+        starter[:, :XI_SIZE] = True
+        bench_boost = (multipliers[:, XI_SIZE:] > 0).all(axis=1)
+        out = starter & ~played & done[self.elements] & ~bench_boost[:, None]
+        rows = np.arange(len(self))
+        subs = np.zeros(len(self), dtype=np.int64)
+
+        # Goalkeeper for goalkeeper: the first bench slot
+        swap = out[:, 0] & played[:, XI_SIZE] & (types[:, XI_SIZE] == 1)
+        multipliers[swap, XI_SIZE] = 1
+        multipliers[swap, 0] = 0
+        out[swap, 0] = False
+        subs += swap
+
+        counts = np.stack([((types == position) & starter & (multipliers > 0)).sum(axis=1)
+                           for position in range(5)], axis=1)
+        minimum = np.zeros(5, dtype=np.int64)
+        minimum[list(XI_MIN_PLAYERS)] = list(XI_MIN_PLAYERS.values())
+        for bench in range(XI_SIZE + 1, SQUAD_SIZE):
+            bench_type = types[:, bench]
+            # A starter can make way if the bench player has his position or his position stays above the floor
+            valid = out & (types != 1) & starter & \
+                    ((types == bench_type[:, None]) | (counts[rows[:, None], types] > minimum[types]))
+            valid &= played[:, bench][:, None] & (bench_type != 1)[:, None]
+            swap = valid.any(axis=1)
+            slot = np.argmax(valid, axis=1)
+            swapped, slot = rows[swap], slot[swap]
+            multipliers[swapped, bench] = 1
+            multipliers[swapped, slot] = 0
+            out[swapped, slot] = False
+            np.subtract.at(counts, (swapped, types[swapped, slot]), 1)
+            np.add.at(counts, (swapped, bench_type[swapped]), 1)
+            subs += swap
+        return self.captaincy(multipliers, minutes, done), subs
+
+    def captaincy(self, multipliers, minutes, done):
+        # The vice captain takes the captain's multiplier when the captain's fixtures are over and he did not play
+        captain = np.argmax(self.multipliers, axis=1)
+        rows = np.arange(len(self))
+        captain_missed = (self.multipliers[rows, captain] > 1) & \
+                         (minutes[self.elements[rows, captain]] == 0) & done[self.elements[rows, captain]]
+        vice = np.argmax(self.vice_captains, axis=1)
+        handover = captain_missed & self.vice_captains.any(axis=1) & (multipliers[rows, vice] > 0) & \
+                   (minutes[self.elements[rows, vice]] > 0)
+        multipliers = multipliers.copy()
+        multipliers[rows[handover], vice[handover]] = self.multipliers[rows[handover], captain[handover]]
+        multipliers[rows[handover], captain[handover]] = np.minimum(multipliers[rows[handover], captain[handover]], 1)
+        return multipliers
+
+    def score(self, live, positions):
+        multipliers, subs = self.auto_subs(live.minutes, live.done, positions)
+        points = (live.points[self.elements] * multipliers).sum(axis=1) - self.hits
+        return points, multipliers, subs
+
+class LivePoints:
+    # Live stats as dense vectors indexed by player id: points, minutes, and whether all of the
+    # player's fixtures this gameweek are over (blank gameweeks count as over)
+    def __init__(self, live, fixtures, player_teams):
+        size = len(player_teams)
+        self.points = np.zeros(size, dtype=np.int64)
+        self.minutes = np.zeros(size, dtype=np.int64)
+        elements = [element for element in live['elements'] if element['id'] < size]
+        ids = np.array([element['id'] for element in elements], dtype=np.int64)
+        self.points[ids] = [element['stats']['total_points'] for element in elements]
+        self.minutes[ids] = [element['stats']['minutes'] for element in elements]
+
+        team_done = np.ones(player_teams.max() + 2 if size else 1, dtype=bool)
+        for fixture in fixtures:
+            finished = fixture.get('finished') or fixture.get('finished_provisional')
+            for team in (fixture['team_h'], fixture['team_a']):
+                if team < len(team_done):
+                    team_done[team] &= bool(finished)
+        self.done = team_done[player_teams]
+
+def player_table(elements):
+    # Position and team per player id from the bootstrap elements array
+    size = max(element['id'] for element in elements) + 1
+    positions = np.zeros(size, dtype=np.int64)
+    teams = np.zeros(size, dtype=np.int64)
+    ids = np.array([element['id'] for element in elements])
+    positions[ids] = [element['element_type'] for element in elements]
+    teams[ids] = [element['team'] for element in elements]
+    names = np.full(size, '', dtype=object)
+    names[ids] = [element['web_name'] for element in elements]
+    return positions, teams, names
+
+class LiveTracker:
+    def __init__(self, team_ids, gameweek=None, client=None, max_workers=WATCH_MAX_WORKERS):
+        self.team_ids = team_ids
+        self.client = client or FPLClient(max_per_host=max_workers)
+        bootstrap = self.client.get('bootstrap_static')
+        self.gameweek = gameweek or next((event['id'] for event in bootstrap['events'] if event['is_current']), None)
+        if self.gameweek is None:
+            raise ValueError("No current gameweek found")
+        self.positions, self.player_teams, self.names = player_table(bootstrap['elements'])
+        self.squads = self.fetch_squads()
+
+    def fetch_squads(self):
+        calls = [('entry_picks', {'team_id': team_id, 'event_id': self.gameweek}) for team_id in self.team_ids]
+        results = self.client.get_many(calls, return_exceptions=True)
+        failed = [team_id for team_id, result in zip(self.team_ids, results) if isinstance(result, Exception)]
+        if failed:
+            logger.warning(f"No picks for {len(failed)} teams: {failed[:20]}")
+        return LiveSquads.from_picks({
+            team_id: result for team_id, result in zip(self.team_ids, results) if not isinstance(result, Exception)
+        })
+
+    def poll(self):
+        live, fixtures = self.client.get_many([
+            ('event_live', {'event_id': self.gameweek}),
+            ('event_fixtures', {}, {'event': self.gameweek}),
+        ])
+        fixtures = [fixture for fixture in fixtures if fixture.get('event') == self.gameweek]
+        return self.table(LivePoints(live, fixtures, self.player_teams))
+
+    def table(self, live):
+        points, multipliers, subs = self.squads.score(live, self.positions)
+        captains = self.squads.elements[np.arange(len(self.squads)), np.argmax(multipliers, axis=1)]
+        return pd.DataFrame({
+            'team_id': self.squads.team_ids,
+            'points': points,
+            'hits': self.squads.hits,
+            'captain': self.names[captains],
+            'auto_subs': subs,
+        }, columns=OUTPUT_COLUMNS).sort_values('points', ascending=False, kind='stable')
+
+def main():
+    from transfer_batch_recommender import read_team_ids, write_table
+
+    parser = argparse.ArgumentParser(description="Live gameweek points for many teams")
+    parser.add_argument('team_ids', nargs='*', type=int, help=f"Team IDs (default {TEAM_ID})")
+    parser.add_argument('--teams-file', help="File with team IDs (whitespace, comma or newline separated)")
+    parser.add_argument('--gameweek', type=int, help="Gameweek to score (default: current)")
+    parser.add_argument('--interval', type=int, default=LIVE_POLL_INTERVAL, help="Seconds between polls")
+    parser.add_argument('--top', type=int, default=20, help="Rows to print per poll")
+    parser.add_argument('--output', help="Save the latest table (.csv, .jsonl or .parquet)")
+    parser.add_argument('--once', action='store_true', help="Poll once and exit")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    team_ids = read_team_ids(args.team_ids, args.teams_file) or [TEAM_ID]
+    tracker = LiveTracker(team_ids, args.gameweek)
+    print(f"Gameweek {tracker.gameweek}: tracking {len(tracker.squads)} of {len(team_ids)} teams")
+
+    while True:
+        start = time.perf_counter()
+        table = tracker.poll()
+        print(f"\n{datetime.now():%H:%M:%S} scored {len(table)} squads in {time.perf_counter() - start:.3f}s")
+        print(table.head(args.top).to_string(index=False))
+        if args.output:
+            write_table(table, args.output)
+        if args.once:
+            return
+        time.sleep(args.interval)
+
+if __name__ == "__main__":
+    main()
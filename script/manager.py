@@ -0,0 +1,263 @@
+# script/manager.py
+#
+# One entry point for the day-to-day commands. Each command imports what it needs when it runs,
+# so `manager.py diagnose` never loads pandas or NumPy. `shell` keeps one process and its warm
+# state (API client, today's snapshot, team registry and FDR index) between commands; `serve`
+# does the same behind a Unix socket that `manager.py remote ...` answers from.
+#
+#   python3 script/manager.py recommend 4193107
+#   python3 script/manager.py shell
+#   python3 script/manager.py serve &  python3 script/manager.py remote preseason
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import shlex
+import socket
+import socketserver
+import sys
+import time
+
+# Add the parent directory to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from config.manager_config import MANAGER_SOCKET, MANAGER_TIMEOUT, MANAGER_HISTORY
+from config.transfer_recommender_config import TEAM_ID
+
+class WarmState:
+    # What the data commands share inside one process. Today's snapshot is keyed by its content
+    # hash, so a fetch from this or any other process is picked up by the next command, and the
+    # team registry and FDR index are rebuilt only when the snapshot changed.
+    def __init__(self):
+        self._client = None
+        self._store = None
+        self._players = None
+        self._key = None
+        self._events = None
+        self._events_at = 0
+
+    def client(self):
+        if self._client is None:
+            from fpl_client import get_client
+            self._client = get_client()
+        return self._client
+
+    def events(self):
+        # Gameweeks from bootstrap-static, re-read once the response cache would revalidate it
+        from config.cache_config import CACHE_TTLS
+        if self._events is None or time.time() - self._events_at > CACHE_TTLS['bootstrap_static']:
+            self._events = self.client().get('bootstrap_static')['events']
+            self._events_at = time.time()
+        return self._events
+
+    def snapshot_key(self):
+        from snapshot_store import SnapshotStore, today
+        if self._store is None:
+            self._store = SnapshotStore()
+        date = self._store.resolve_date(today())
+        return date, self._store.snapshot_hash(date) if self._store.exists(date) else None
+
+    def players(self, columns=None):
+        # A private copy of the warm snapshot, optionally cut to `columns`
+        key = self.snapshot_key()
+        if key != self._key:
+            from team_registry import reload_defaults
+            reload_defaults()
+            self._players = self._store.load(key[0])
+            self._key = key
+        if columns is not None:
+            return self._players[[column for column in columns if column in self._players]].copy()
+        return self._players.copy()
+
+    def status(self):
+        heavy = [module for module in ('numpy', 'pandas', 'scipy', 'sklearn') if module in sys.modules]
+        lines = [f"Process {os.getpid()}, {len(sys.modules)} modules loaded ({', '.join(heavy) or 'no heavy modules'})"]
+        if self._key:
+            lines.append(f"Warm snapshot {self._key[0]}: {len(self._players)} players")
+        else:
+            lines.append("No snapshot loaded yet")
+        return '\n'.join(lines)
+
+def cmd_diagnose(state, args):
+    from diagnose import Diagnostics
+    Diagnostics(args.team_id).run_diagnostics()
+
+def cmd_fetch(state, args):
+    from data_fetcher import FPLDataFetcher
+    FPLDataFetcher().save_data(delta=args.delta)
+
+def cmd_analyze(state, args):
+    import data_analyzer
+    data_analyzer.run(data_analyzer.name_teams(state.players()), args.gameweek)
+
+def cmd_preseason(state, args):
+    from transfer_preseason_recommender import SNAPSHOT_COLUMNS, TransferPreseasonRecommender
+    TransferPreseasonRecommender(args.team_id, state.players(SNAPSHOT_COLUMNS)).run()
+
+def cmd_recommend(state, args):
+    from transfer_recommender import SNAPSHOT_COLUMNS, TransferRecommender
+    recommender = TransferRecommender(args.team_id, client=state.client())
+    recommender.player_data = state.players(SNAPSHOT_COLUMNS)
+    recommender.add_fdr_data()
+    recommender.run(state.events())
+
+def cmd_team(state, args):
+    from team_watcher import show_team
+    show_team(args.team_id)
+
+def cmd_status(state, args):
+    print(state.status())
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='manager.py', description="FPL manager commands")
+    subparsers = parser.add_subparsers(dest='command')
+
+    def command(name, handler, help, team=False):
+        subparser = subparsers.add_parser(name, help=help)
+        subparser.set_defaults(handler=handler)
+        if team:
+            subparser.add_argument('team_id', nargs='?', type=int, default=TEAM_ID)
+        return subparser
+
+    command('diagnose', cmd_diagnose, "Check the API and one team", team=True)
+    command('fetch', cmd_fetch, "Fetch players into today's snapshot").add_argument(
+        '--delta', action='store_true', help="Only store rows and fields changed since the last poll")
+    command('analyze', cmd_analyze, "Price, points, value and fixture difficulty tables").add_argument(
+        '--gameweek', type=int, default=1)
+    command('preseason', cmd_preseason, "Best value players per position", team=True)
+    command('recommend', cmd_recommend, "Transfer recommendations for one team", team=True)
+    command('team', cmd_team, "Show one team's rank, history and picks", team=True)
+    command('status', cmd_status, "What this process holds warm")
+
+    subparsers.add_parser('shell', help="Run commands interactively in one warm process")
+    subparsers.add_parser('serve', help="Answer commands on a Unix socket from one warm process").add_argument(
+        '--socket', default=MANAGER_SOCKET)
+    remote_parser = subparsers.add_parser('remote', help="Run a command in the serving process")
+    remote_parser.add_argument('--socket', default=MANAGER_SOCKET)
+    remote_parser.add_argument('argv', nargs=argparse.REMAINDER)
+    return parser
+
+def execute(parser, state, argv):
+    # Run one command line; returns its exit status. SystemExit from argparse or a script ends the
+    # command, not the warm process.
+    try:
+        args = parser.parse_args(argv)
+    except SystemExit as e:
+        return e.code or 0
+    if getattr(args, 'handler', None) is None:
+        parser.print_help()
+        return 2
+    try:
+        args.handler(state, args)
+    except SystemExit as e:
+        return e.code if isinstance(e.code, int) else 1
+    except FileNotFoundError as e:
+        print(f"Error: {e}")
+        return 1
+    except Exception as e:
+        print(f"Error: {e.__class__.__name__}: {e}")
+        return 1
+    return 0
+
+def shell(parser, state):
+    try:
+        import readline
+        with contextlib.suppress(OSError):
+            readline.read_history_file(MANAGER_HISTORY)
+    except ImportError:
+        readline = None
+
+    print("FPL manager shell. Commands: diagnose, fetch, analyze, preseason, recommend, team, status; 'exit' quits.")
+    while True:
+        try:
+            line = input('fpl> ').strip()
+        except (EOFError, KeyboardInterrupt):
+            print()
+            break
+        if line in ('exit', 'quit'):
+            break
+        if not line:
+            continue
+        start = time.perf_counter()
+        execute(parser, state, shlex.split(line))
+        print(f"({(time.perf_counter() - start) * 1000:.1f} ms)", file=sys.stderr)
+
+    if readline is not None:
+        with contextlib.suppress(OSError):
+            readline.write_history_file(MANAGER_HISTORY)
+
+class CommandHandler(socketserver.StreamRequestHandler):
+    # One JSON line {"argv": [...]} in, one JSON object {"status", "output", "seconds"} out
+    def handle(self):
+        try:
+            argv = json.loads(self.rfile.readline())['argv']
+        except (ValueError, KeyError, TypeError):
+            argv = None
+        start = time.perf_counter()
+        output = io.StringIO()
+        if argv is None:
+            status = 2
+            output.write("Bad request\n")
+        elif argv[:1] in (['shell'], ['serve'], ['remote']):
+            status = 2
+            output.write(f"{argv[0]} is not available remotely\n")
+        else:
+            with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+                status = execute(self.server.parser, self.server.state, argv)
+        reply = {'status': status, 'output': output.getvalue(), 'seconds': time.perf_counter() - start}
+        self.wfile.write(json.dumps(reply).encode() + b'\n')
+
+def serve(parser, state, path=MANAGER_SOCKET):
+    # Requests are handled one at a time, which keeps stdout capture and the warm state simple
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    server = socketserver.UnixStreamServer(path, CommandHandler)
+    os.chmod(path, 0o600)
+    server.parser = parser
+    server.state = state
+    print(f"Serving manager commands on {path}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(path)
+
+def remote(argv, path=MANAGER_SOCKET, timeout=MANAGER_TIMEOUT):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(path)
+        sock.sendall(json.dumps({'argv': argv}).encode() + b'\n')
+        sock.shutdown(socket.SHUT_WR)
+        with sock.makefile('rb') as f:
+            reply = json.loads(f.readline())
+    sys.stdout.write(reply['output'])
+    print(f"({reply['seconds'] * 1000:.1f} ms in server)", file=sys.stderr)
+    return reply['status']
+
+def main():
+    parser = build_parser()
+    args = parser.parse_args()
+    if args.command == 'remote':
+        try:
+            sys.exit(remote(args.argv, args.socket))
+        except (FileNotFoundError, ConnectionRefusedError):
+            print(f"No manager is serving on {args.socket}; start one with: python3 script/manager.py serve")
+            sys.exit(1)
+    state = WarmState()
+    if args.command in (None, 'shell'):
+        shell(parser, state)
+    elif args.command == 'serve':
+        serve(parser, state, args.socket)
+    else:
+        sys.exit(execute(parser, state, sys.argv[1:]))
+
+if __name__ == "__main__":
+    main()
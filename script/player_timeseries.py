@@ -0,0 +1,227 @@
+# script/player_timeseries.py
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Add the parent directory to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from config.snapshot_config import TIMESERIES_METRICS, TREND_WINDOW_DAYS
+from snapshot_store import SnapshotStore
+
+CACHE_FILE = 'timeseries.npz'
+
+def to_datetime64(date):
+    if isinstance(date, str):
+        date = f"{date[:4]}-{date[4:6]}-{date[6:8]}" if len(date) == 8 and date.isdigit() else date
+    return np.datetime64(date, 'D')
+
+def forward_fill(values):
+    # Carry the last observed value forward along the date axis (axis 0)
+    rows = np.where(~np.isnan(values), np.arange(values.shape[0])[:, None], 0)
+    np.maximum.accumulate(rows, axis=0, out=rows)
+    return values[rows, np.arange(values.shape[1])]
+
+class PlayerTimeSeries:
+    # (date x player id) matrices per metric, built from the snapshot store. Player ids index
+    # the columns directly, so a lookup is a plain array index; dates are sorted, so range scans
+    # are two binary searches. The matrices are cached next to the snapshots and only new
+    # snapshots are read on the next build.
+    def __init__(self, store=None, metrics=TIMESERIES_METRICS):
+        self.store = store or SnapshotStore()
+        self.metrics = list(metrics)
+        self.snapshot_dates = []
+        self.updated_at = []
+        self.dates = np.array([], dtype='datetime64[D]')
+        self.values = {metric: np.empty((0, 0), dtype=np.float32) for metric in self.metrics}
+        self.filled = {}
+
+    @property
+    def cache_path(self):
+        return os.path.join(self.store.root, CACHE_FILE)
+
+    def _load_cache(self):
+        try:
+            cache = np.load(self.cache_path)
+        except (OSError, ValueError):
+            return False
+        if list(cache['metrics']) != self.metrics or 'updated_at' not in cache:
+            return False
+        self.snapshot_dates = list(cache['snapshot_dates'])
+        self.updated_at = list(cache['updated_at'])
+        self.values = {metric: cache[f"values_{metric}"] for metric in self.metrics}
+        return True
+
+    def _save_cache(self):
+        np.savez(
+            self.cache_path,
+            metrics=np.array(self.metrics),
+            snapshot_dates=np.array(self.snapshot_dates),
+            updated_at=np.array(self.updated_at),
+            **{f"values_{metric}": values for metric, values in self.values.items()}
+        )
+
+    def _arrays(self, date):
+        # Column arrays of a day's final state: its snapshot plus that day's delta polls
+        columns = ['id'] + self.metrics
+        if not self.store.delta_timestamps(date):
+            return self.store.load_arrays(date, columns)[0]
+        players = self.store.load(date, columns=columns, fallback=False)
+        return {column: [np.asarray(players[column])] for column in players.columns}
+
+    def build(self, use_cache=True):
+        dates = self.store.dates()
+        updated_at = [self.store.updated_at(date) for date in dates]
+
+        start = 0
+        if use_cache and self._load_cache():
+            cached = list(zip(self.snapshot_dates, self.updated_at))
+            # Reuse the cached days up to the first one rewritten or polled again since; during the
+            # day's delta polls only that last row is rebuilt
+            while start < len(cached) and start < len(dates) and cached[start] == (dates[start], updated_at[start]):
+                start += 1
+            self.values = {metric: values[:start] for metric, values in self.values.items()}
+        if start == 0:
+            self.values = {metric: np.empty((0, 0), dtype=np.float32) for metric in self.metrics}
+
+        new_dates = dates[start:]
+        if new_dates or self.snapshot_dates != dates:
+            loaded = [self._arrays(date) for date in new_dates]
+            width = max([int(arrays['id'][0].max()) + 1 for arrays in loaded if len(arrays['id'][0])] +
+                        [self.values[self.metrics[0]].shape[1]])
+            blocks = {metric: np.full((len(new_dates), width), np.nan, dtype=np.float32) for metric in self.metrics}
+            for row, arrays in enumerate(loaded):
+                ids = np.asarray(arrays['id'][0])
+                for metric in self.metrics:
+                    if metric in arrays:
+                        blocks[metric][row, ids] = arrays[metric][0]
+            for metric in self.metrics:
+                old = self.values[metric]
+                if old.shape[1] < width:
+                    old = np.pad(old, ((0, 0), (0, width - old.shape[1])), constant_values=np.nan)
+                self.values[metric] = np.concatenate([old, blocks[metric]])
+            self.snapshot_dates = dates
+            self.updated_at = updated_at
+            self._save_cache()
+
+        self.dates = np.array([to_datetime64(date) for date in self.snapshot_dates], dtype='datetime64[D]')
+        self.filled = {metric: forward_fill(values) for metric, values in self.values.items()}
+        return self
+
+    def _row(self, date=None):
+        # Latest snapshot row on or before `date` (no look-ahead); -1 if there is none
+        if date is None:
+            return len(self.dates) - 1
+        return int(np.searchsorted(self.dates, to_datetime64(date), side='right')) - 1
+
+    def _missing(self):
+        # All-NaN player vector for dates before the first snapshot
+        return np.full(self.values[self.metrics[0]].shape[1], np.nan)
+
+    def history(self, player_id, metric, start=None, end=None):
+        first = 0 if start is None else int(np.searchsorted(self.dates, to_datetime64(start), side='left'))
+        last = self._row(end) + 1
+        return pd.DataFrame({
+            'date': self.dates[first:last],
+            metric: self.values[metric][first:last, player_id]
+        })
+
+    def latest(self, metric, date=None):
+        row = self._row(date)
+        return self.filled[metric][row] if row >= 0 else self._missing()
+
+    def change(self, metric, days, end=None):
+        # Per-player difference between the value at `end` and the value `days` earlier
+        last = self._row(end)
+        if last < 0:
+            return self._missing(), 0
+        first = max(self._row(self.dates[last] - np.timedelta64(days, 'D')), 0)
+        return self.filled[metric][last] - self.filled[metric][first], int((self.dates[last] - self.dates[first]).astype(int))
+
+    def velocity(self, metric, days, end=None):
+        delta, elapsed = self.change(metric, days, end)
+        return delta / elapsed if elapsed else np.zeros_like(delta)
+
+    def slope(self, metric, days, end=None):
+        # Least-squares slope per day over the window for every player at once, ignoring gaps
+        last = self._row(end)
+        if last < 0:
+            return self._missing()
+        first = max(int(np.searchsorted(self.dates, self.dates[last] - np.timedelta64(days, 'D'), side='left')), 0)
+        y = self.values[metric][first:last + 1].astype(np.float64)
+        x = (self.dates[first:last + 1] - self.dates[first]).astype(np.float64)[:, None]
+        valid = ~np.isnan(y)
+        count = valid.sum(axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            x_mean = np.where(valid, x, 0).sum(axis=0) / count
+            y_mean = np.where(valid, y, 0).sum(axis=0) / count
+            dx = np.where(valid, x - x_mean, 0)
+            dy = np.where(valid, y - y_mean, 0)
+            slope = (dx * dy).sum(axis=0) / (dx * dx).sum(axis=0)
+        return np.where(count >= 2, slope, np.nan)
+
+    def rolling_mean(self, metric, window):
+        # Mean over the last `window` snapshots for every (date, player), via cumulative sums
+        values = self.values[metric].astype(np.float64)
+        valid = ~np.isnan(values)
+        sums = np.cumsum(np.where(valid, values, 0), axis=0)
+        counts = np.cumsum(valid, axis=0)
+        sums[window:] -= sums[:-window].copy()
+        counts[window:] -= counts[:-window].copy()
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(counts > 0, sums / counts, np.nan)
+
+    def trend_features(self, days=TREND_WINDOW_DAYS, end=None):
+        now_cost = self.latest('now_cost', end)
+        price_change, _ = self.change('now_cost', days, end)
+        points_gained, _ = self.change('total_points', days, end)
+        features = pd.DataFrame({
+            'id': np.arange(len(now_cost)),
+            'price_change': price_change,
+            'form_slope': self.slope('form', days, end),
+            'ownership_velocity': self.velocity('selected_by_percent', days, end),
+            'points_gained': points_gained,
+        })
+        return features[~np.isnan(now_cost)].set_index('id')
+
+def main():
+    parser = argparse.ArgumentParser(description="Player price, form and ownership trends across stored snapshots")
+    parser.add_argument('--days', type=int, default=TREND_WINDOW_DAYS, help="Look-back window in days")
+    parser.add_argument('--date', help="Evaluate as of this date (YYYYMMDD), default latest")
+    parser.add_argument('--player', type=int, help="Show the full history of one player id")
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    series = PlayerTimeSeries().build()
+    built = time.perf_counter()
+    if not len(series.dates):
+        print("No snapshots stored yet. Run 'make fetch' first.")
+        sys.exit(1)
+    print(f"Indexed {len(series.dates)} snapshots ({series.dates[0]} to {series.dates[-1]}) in {built - start:.3f}s")
+
+    if args.player is not None:
+        for metric in series.metrics:
+            print(series.history(args.player, metric, end=args.date).dropna().to_string(index=False))
+        return
+
+    features = series.trend_features(args.days, args.date)
+    if features.empty:
+        print(f"No snapshots on or before {args.date}.")
+        sys.exit(1)
+    print(f"Computed trends for {len(features)} players in {time.perf_counter() - built:.4f}s")
+    names = series.store.load(series.store.latest_date(args.date), columns=['id', 'web_name']).set_index('id')['web_name']
+    features = features.join(names)
+    for column in ['price_change', 'form_slope', 'ownership_velocity']:
+        print(f"\nTop {args.top} by {column} over {args.days} days:")
+        print(features.nlargest(args.top, column).to_string())
+
+if __name__ == "__main__":
+    main()
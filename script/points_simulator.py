@@ -0,0 +1,247 @@
+# script/points_simulator.py
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# Add the parent directory to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from config.simulator_config import (
+    NUM_SIMULATIONS, SIMULATION_CHUNK, SIMULATION_SEED, SIMULATION_WORKERS, SIMULATION_PERCENTILES,
+    GOAL_POINTS, CLEAN_SHEET_POINTS, GOALS_CONCEDED_POINTS, GOALS_CONCEDED_STEP, ASSIST_POINTS,
+    SAVES_STEP, YELLOW_CARD_POINTS, RED_CARD_POINTS, MAX_BONUS, MAX_EVENTS, MAX_SAVES, FDR_SCALE,
+    PLAYER_POINTS_RANGE, LINEUP_POINTS_RANGE
+)
+from config.transfer_recommender_config import TEAM_ID, TOP_N_PLAYERS
+
+SIMULATION_COLUMNS = [
+    'id', 'web_name', 'team', 'element_type', 'minutes', 'goals_scored', 'assists', 'clean_sheets',
+    'goals_conceded', 'saves', 'bonus', 'yellow_cards', 'red_cards', 'total_points', 'points_per_game'
+]
+
+def position_table(points):
+    # Per-position points as an array indexed by element_type
+    table = np.zeros(max(points) + 1, dtype=np.int32)
+    table[list(points)] = list(points.values())
+    return table
+
+def fit_rates(player_data, fdr=None, gameweeks=None):
+    # Per-appearance rates from season totals. Appearances are total_points / points_per_game,
+    # capped at `gameweeks` played so far (by default the 95th percentile of appearances). Clean
+    # sheets and goals conceded only count after 60 minutes, so their rates are per 60-minute appearance.
+    total_points = player_data['total_points'].to_numpy(dtype=float)
+    points_per_game = player_data['points_per_game'].to_numpy(dtype=float)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        games = np.where(points_per_game > 0, np.rint(total_points / points_per_game), 0)
+    if gameweeks is None:
+        gameweeks = np.percentile(games, 95) if len(games) else 1
+    gameweeks = max(gameweeks, 1)
+    games = np.minimum(games, gameweeks)
+
+    def per_game(column, appearances=games):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(appearances > 0, player_data[column].to_numpy(dtype=float) / appearances, 0)
+
+    # Average minutes per appearance mapped onto the chance of playing 60+: 30 -> 0, 90 -> 1
+    full_share = np.clip((per_game('minutes') - 30) / 60, 0, 1)
+    attack = np.ones(len(player_data)) if fdr is None else np.nan_to_num(1 + FDR_SCALE * (3 - np.asarray(fdr, dtype=float)), nan=1)
+    return {
+        'position': player_data['element_type'].to_numpy(dtype=np.int64),
+        'play': np.clip(games / gameweeks, 0, 1),
+        'full': full_share,
+        'goals': per_game('goals_scored') * attack,
+        'assists': per_game('assists') * attack,
+        'clean_sheet': np.clip(per_game('clean_sheets', games * full_share) * attack, 0, 1),
+        'conceded': per_game('goals_conceded', games * full_share) / attack,
+        'saves': per_game('saves'),
+        'bonus': per_game('bonus'),
+        'yellow': np.clip(per_game('yellow_cards'), 0, 1),
+        'red': np.clip(per_game('red_cards'), 0, 1),
+    }
+
+def take_rates(rates, rows):
+    return {name: values[rows] for name, values in rates.items()}
+
+def draw_counts(rng, rates, shape, max_count):
+    # Poisson counts by inverse CDF, truncated at max_count: one uniform per cell and one
+    # comparison per possible count, several times faster than Generator.poisson for small rates
+    uniform = rng.random(shape, dtype=np.float32)
+    counts = np.zeros(shape, dtype=np.int32)
+    pmf = np.exp(-rates)
+    cdf = pmf.copy()
+    for count in range(1, max_count + 1):
+        counts += uniform > cdf.astype(np.float32)
+        pmf = pmf * rates / count
+        cdf = cdf + pmf
+    return counts
+
+def simulate_points(rates, rng, sims):
+    # (sims x players) FPL points for one gameweek each, drawn for every player at once. Events
+    # that score nothing for a position (saves outside goal, conceded goals up front) are not drawn.
+    shape = (sims, len(rates['position']))
+    position = rates['position']
+    plays = rng.random(shape, dtype=np.float32) < rates['play']
+    full = plays & (rng.random(shape, dtype=np.float32) < rates['full'])
+
+    points = plays.astype(np.int32) + full
+    points += draw_counts(rng, rates['goals'], shape, MAX_EVENTS) * plays * position_table(GOAL_POINTS)[position]
+    points += draw_counts(rng, rates['assists'], shape, MAX_EVENTS) * plays * ASSIST_POINTS
+    points += draw_counts(rng, rates['bonus'], shape, MAX_BONUS) * plays
+    points += (plays & (rng.random(shape, dtype=np.float32) < rates['yellow'])) * YELLOW_CARD_POINTS
+    points += (plays & (rng.random(shape, dtype=np.float32) < rates['red'])) * RED_CARD_POINTS
+
+    columns = np.flatnonzero(position_table(CLEAN_SHEET_POINTS)[position] != 0)
+    clean_sheet = rng.random((sims, len(columns)), dtype=np.float32) < rates['clean_sheet'][columns]
+    points[:, columns] += (full[:, columns] & clean_sheet) * position_table(CLEAN_SHEET_POINTS)[position[columns]]
+
+    columns = np.flatnonzero(position_table(GOALS_CONCEDED_POINTS)[position] != 0)
+    conceded = draw_counts(rng, rates['conceded'][columns], (sims, len(columns)), MAX_EVENTS)
+    points[:, columns] += (conceded * full[:, columns] // GOALS_CONCEDED_STEP) * \
+                          position_table(GOALS_CONCEDED_POINTS)[position[columns]]
+
+    columns = np.flatnonzero(position == 1)
+    saves = draw_counts(rng, rates['saves'][columns], (sims, len(columns)), MAX_SAVES)
+    points[:, columns] += saves * plays[:, columns] // SAVES_STEP
+    return points
+
+def histogram(totals, points_range):
+    # Per-column counts of each integer score in points_range, clipped at both ends
+    low, high = points_range
+    bins = high - low + 1
+    cells = np.clip(totals, low, high) - low + np.arange(totals.shape[1]) * bins
+    return np.bincount(cells.ravel(), minlength=totals.shape[1] * bins).reshape(totals.shape[1], bins)
+
+def simulate_chunk(rates, weights, seed, sims, points_range):
+    # One chunk of gameweeks reduced to histograms, so workers send back kilobytes, not samples
+    points = simulate_points(rates, np.random.default_rng(seed), sims)
+    return histogram(points if weights is None else points @ weights.T, points_range)
+
+def summarize(histograms, points_range, percentiles=SIMULATION_PERCENTILES):
+    scores = np.arange(points_range[0], points_range[1] + 1)
+    counts = histograms.sum(axis=1, keepdims=True)
+    mean = (histograms * scores).sum(axis=1) / counts[:, 0]
+    variance = (histograms * (scores[None, :] - mean[:, None]) ** 2).sum(axis=1) / counts[:, 0]
+    cumulative = np.cumsum(histograms, axis=1) / counts
+    summary = pd.DataFrame({'mean': mean, 'std': np.sqrt(variance)})
+    for percentile in percentiles:
+        summary[f"p{percentile}"] = scores[(cumulative < percentile / 100).sum(axis=1)]
+    return summary
+
+class PointsSimulator:
+    # Monte Carlo gameweeks drawn from per-player rates fitted to one snapshot. Work is split
+    # into fixed-size chunks with seeds spawned from one SeedSequence, so results depend only on
+    # the seed and the number of simulations, not on how many worker processes ran them.
+    def __init__(self, player_data, fdr=None, gameweeks=None, workers=SIMULATION_WORKERS, seed=SIMULATION_SEED,
+                 chunk=SIMULATION_CHUNK):
+        self.player_data = player_data.reset_index(drop=True)
+        self.ids = pd.Index(self.player_data['id'].to_numpy())
+        self.rates = fit_rates(self.player_data, fdr, gameweeks)
+        self.workers = workers
+        self.seed = seed
+        self.chunk = chunk
+
+    def rows_of(self, player_ids):
+        rows = self.ids.get_indexer(player_ids)
+        if (rows < 0).any():
+            raise KeyError(f"Players not in the snapshot: {list(np.asarray(player_ids)[rows < 0])}")
+        return rows
+
+    def run(self, rows, weights, sims, points_range):
+        rates = take_rates(self.rates, rows)
+        sizes = [min(self.chunk, sims - start) for start in range(0, sims, self.chunk)]
+        seeds = np.random.SeedSequence(self.seed).spawn(len(sizes))
+        args = [(rates, weights, seed, size, points_range) for seed, size in zip(seeds, sizes)]
+        if self.workers > 1 and len(args) > 1:
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(args))) as pool:
+                return sum(pool.map(simulate_chunk, *zip(*args)))
+        return sum(simulate_chunk(*chunk_args) for chunk_args in args)
+
+    def player_summary(self, player_ids=None, sims=NUM_SIMULATIONS):
+        rows = np.arange(len(self.ids)) if player_ids is None else self.rows_of(player_ids)
+        summary = summarize(self.run(rows, None, sims, PLAYER_POINTS_RANGE), PLAYER_POINTS_RANGE)
+        summary.insert(0, 'web_name', self.player_data['web_name'].to_numpy()[rows])
+        summary.insert(0, 'id', self.ids[rows])
+        return summary
+
+    def lineup_summary(self, lineups, sims=NUM_SIMULATIONS):
+        # Score distribution per (starting XI ids, captain id) lineup; the captain counts twice.
+        # All lineups see the same simulated gameweeks, so their differences are paired.
+        rows = np.unique(np.concatenate([self.rows_of(xi) for xi, _ in lineups]))
+        weights = np.zeros((len(lineups), len(rows)), dtype=np.int32)
+        for i, (xi, captain) in enumerate(lineups):
+            weights[i, np.searchsorted(rows, self.rows_of(xi))] = 1
+            weights[i, np.searchsorted(rows, self.rows_of([captain]))] = 2
+        return summarize(self.run(rows, weights, sims, LINEUP_POINTS_RANGE), LINEUP_POINTS_RANGE)
+
+    def captaincy(self, xi, sims=NUM_SIMULATIONS):
+        # Lineup score distribution for every captain choice in the XI, best mean first
+        summary = self.lineup_summary([(xi, captain) for captain in xi], sims)
+        summary.insert(0, 'captain', self.player_data['web_name'].to_numpy()[self.rows_of(xi)])
+        return summary.sort_values('mean', ascending=False)
+
+def main():
+    from snapshot_store import SnapshotStore
+    from transfer_recommender import TransferRecommender
+
+    parser = argparse.ArgumentParser(description="Monte Carlo gameweek scores for players, captaincy and transfers")
+    parser.add_argument('--team', type=int, default=TEAM_ID, help="Team whose picks are simulated")
+    parser.add_argument('--sims', type=int, default=NUM_SIMULATIONS)
+    parser.add_argument('--workers', type=int, default=SIMULATION_WORKERS)
+    parser.add_argument('--seed', type=int, default=SIMULATION_SEED)
+    parser.add_argument('--transfer', nargs=2, type=int, action='append', default=[], metavar=('OUT', 'IN'),
+                        help="Compare the XI with player OUT replaced by player IN (repeatable)")
+    parser.add_argument('--players', action='store_true', help="Rank every player by simulated mean instead")
+    args = parser.parse_args()
+
+    recommender = TransferRecommender(args.team)
+    event = recommender.fetch_current_event()
+    gameweek = event['id'] if event else 1
+    # Gameweeks already played; the current one may still be in progress
+    played = gameweek - 1 if event and not event['is_current'] else gameweek
+    try:
+        player_data = SnapshotStore().load(datetime.now().strftime("%Y%m%d"), columns=SIMULATION_COLUMNS)
+    except FileNotFoundError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    fdr = recommender.teams.fdr(player_data['team'], gameweek, 1)
+    simulator = PointsSimulator(player_data, fdr, played or None, workers=args.workers, seed=args.seed)
+
+    start = time.perf_counter()
+    if args.players:
+        summary = simulator.player_summary(sims=args.sims).nlargest(TOP_N_PLAYERS, 'mean')
+        print(f"Simulated {args.sims} gameweeks for {len(player_data)} players in {time.perf_counter() - start:.2f}s")
+        print(summary.to_string(index=False, float_format='%.2f'))
+        return
+
+    picks = recommender.fetch_team_picks(args.team) if event else None
+    if not picks or 'picks' not in picks:
+        print("Unable to simulate: No team picks available.")
+        sys.exit(1)
+    xi = [pick['element'] for pick in picks['picks'] if pick['multiplier'] > 0]
+    captain = next((pick['element'] for pick in picks['picks'] if pick['is_captain']), xi[0])
+
+    print(f"Gameweek {gameweek} captaincy ({args.sims} simulations):")
+    print(simulator.captaincy(xi, args.sims).to_string(index=False, float_format='%.2f'))
+
+    if args.transfer:
+        lineups = [(xi, captain)]
+        for player_out, player_in in args.transfer:
+            lineups.append(([player_in if player == player_out else player for player in xi],
+                            player_in if captain == player_out else captain))
+        summary = simulator.lineup_summary(lineups, args.sims)
+        summary.insert(0, 'lineup', ['current'] + [f"{player_out} -> {player_in}" for player_out, player_in in args.transfer])
+        print("\nTransfer comparison:")
+        print(summary.to_string(index=False, float_format='%.2f'))
+    print(f"\nDone in {time.perf_counter() - start:.2f}s")
+
+if __name__ == "__main__":
+    main()
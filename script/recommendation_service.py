@@ -0,0 +1,339 @@
+# script/recommendation_service.py
+#
+# Local HTTP/JSON service for dashboards. The analyzer rankings, preseason lists and per-player
+# scores are computed once per snapshot into an immutable Precomputed object with presorted
+# indexes, so a query is a filter over one presorted index and no request touches pandas. A
+# background thread watches the snapshot store, builds the next Precomputed when a fetch lands
+# and swaps it in with one reference assignment; requests read whichever one was current when
+# they started.
+#
+#   python3 script/recommendation_service.py serve
+#   curl 'http://127.0.0.1:8780/players?position=DEF&max_price=6.0&max_fdr=3&limit=10'
+#   curl 'http://127.0.0.1:8780/rankings/value'   curl 'http://127.0.0.1:8780/preseason/MID'
+
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import requests
+
+# Add the parent directory to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from config.analyzer_config import TOP_N_PLAYERS as ANALYZER_TOP_N, FDR_HORIZON
+from config.service_config import (
+    SERVICE_HOST, SERVICE_PORT, SERVICE_POLL_INTERVAL, SERVICE_DEFAULT_LIMIT, SERVICE_MAX_LIMIT,
+    SERVICE_SORT_KEYS, SERVICE_DEFAULT_SORT
+)
+from config.transfer_recommender_config import TEAM_ID, POSITION_MAP, MAX_PRICES, FUTURE_FIXTURES
+from fpl_client import get_client
+from snapshot_store import SnapshotStore, today
+from team_registry import get_team_registry, reload_defaults
+
+logger = logging.getLogger(__name__)
+
+RECORD_COLUMNS = ['id', 'web_name', 'team', 'position', 'now_cost', 'total_points', 'points_per_game', 'form',
+                  'value', 'avg_fdr', 'adjusted_value', 'score']
+POSITION_IDS = {name: position for position, name in POSITION_MAP.items()}
+
+def to_records(frame, columns):
+    # JSON-ready rows: floats rounded past float32 noise, NaN as null
+    frame = frame[columns].copy()
+    floats = frame.select_dtypes('floating').columns
+    frame[floats] = frame[floats].astype(float).round(4)
+    return frame.astype(object).where(frame.notna(), None).to_dict('records')
+
+def sorted_index(values, ascending):
+    # Row order by `values`, NaN last either way
+    values = np.asarray(values, dtype=float)
+    if ascending:
+        return np.argsort(np.where(np.isnan(values), np.inf, values), kind='stable')
+    return np.argsort(-np.where(np.isnan(values), -np.inf, values), kind='stable')
+
+class Precomputed:
+    # Everything the service answers from for one snapshot. Built once, never mutated.
+    def __init__(self, players, date, snapshot_hash=None, gameweek=1):
+        from fdr_index import get_fdr_index
+        from transfer_preseason_recommender import SNAPSHOT_COLUMNS, TransferPreseasonRecommender
+        from transfer_recommender import calculate_player_scores
+
+        start = time.perf_counter()
+        self.date = date
+        self.snapshot_hash = snapshot_hash
+        self.gameweek = gameweek
+        teams = get_team_registry()
+
+        # Preseason value (transfer_preseason_recommender.py) and form score (transfer_recommender.py)
+        preseason = TransferPreseasonRecommender(TEAM_ID, players[SNAPSHOT_COLUMNS].copy())
+        values = preseason.player_values()
+        frame = players.copy()
+        frame['team_id'] = np.asarray(frame['team'], dtype=np.int64)
+        frame['team'] = teams.names_of(frame['team_id'])
+        frame['position'] = [POSITION_MAP.get(int(position)) for position in frame['element_type']]
+        frame['value'] = frame['total_points'] / frame['now_cost']
+        frame['avg_fdr'] = teams.fdr(frame['team_id'], gameweek, FUTURE_FIXTURES)
+        frame['adjusted_value'] = values['adjusted_value'].to_numpy()
+        if 'form' not in frame:
+            frame['form'] = 0.0
+        frame['score'] = calculate_player_scores(frame)
+        self.records = to_records(frame, RECORD_COLUMNS)
+        self.rows_by_id = {int(player_id): row for row, player_id in enumerate(frame['id'])}
+
+        # Filter columns and one presorted index per sort key and position (0 = all positions)
+        self.element_types = frame['element_type'].to_numpy(dtype=np.int64)
+        self.team_ids = frame['team_id'].to_numpy()
+        self.columns = {key: frame[key].to_numpy(dtype=float) for key in SERVICE_SORT_KEYS}
+        self.indexes = {}
+        for key, direction in SERVICE_SORT_KEYS.items():
+            order = sorted_index(self.columns[key], direction == 'asc')
+            self.indexes[key] = {0: order}
+            for position in POSITION_MAP:
+                self.indexes[key][position] = order[self.element_types[order] == position]
+
+        # data_analyzer.py tables
+        frame['price_performance'] = frame['value']
+        rankings_columns = ['id', 'web_name', 'team', 'now_cost', 'total_points', 'avg_fdr']
+        self.rankings = {
+            'expensive': to_records(frame.nlargest(ANALYZER_TOP_N, 'now_cost'), rankings_columns),
+            'scoring': to_records(frame.nlargest(ANALYZER_TOP_N, 'total_points'), rankings_columns),
+            'value': to_records(frame.nlargest(ANALYZER_TOP_N, 'value'), rankings_columns + ['value']),
+        }
+        fdr_index = get_fdr_index()
+        averages = fdr_index.averages(gameweek, FDR_HORIZON)
+        self.rankings['fdr'] = [{
+            'team': team, 'avg_fdr': None if np.isnan(averages[i]) else float(averages[i]),
+            'fixtures': fdr_index.fixtures(team, gameweek, FDR_HORIZON),
+        } for i, team in ((int(i), fdr_index.teams[i]) for i in np.argsort(averages, kind='stable'))]
+
+        # transfer_preseason_recommender.py lists per position
+        self.preseason = {
+            POSITION_MAP[position]: to_records(
+                preseason.recommendations(position, max_price, values).assign(max_price=max_price),
+                ['id', 'web_name', 'team_name', 'now_cost', 'total_points', 'points_per_game', 'value',
+                 'adjusted_value', 'avg_fdr', 'max_price'])
+            for position, max_price in MAX_PRICES.items()
+        }
+        self.built_at = time.time()
+        self.build_seconds = time.perf_counter() - start
+
+    def __len__(self):
+        return len(self.records)
+
+    def query(self, position=0, sort=SERVICE_DEFAULT_SORT, ascending=None, limit=SERVICE_DEFAULT_LIMIT,
+              min_price=None, max_price=None, max_fdr=None, min_points=None, team=None):
+        # Rows of the presorted index for (sort, position) that pass every filter, first `limit`
+        order = self.indexes[sort][position]
+        if ascending is not None and ascending != (SERVICE_SORT_KEYS[sort] == 'asc'):
+            order = order[::-1]
+            order = order[~np.isnan(self.columns[sort][order])]
+        mask = np.ones(len(order), dtype=bool)
+        if min_price is not None:
+            mask &= self.columns['now_cost'][order] >= min_price
+        if max_price is not None:
+            mask &= self.columns['now_cost'][order] <= max_price
+        if max_fdr is not None:
+            mask &= self.columns['avg_fdr'][order] < max_fdr
+        if min_points is not None:
+            mask &= self.columns['total_points'][order] >= min_points
+        if team is not None:
+            mask &= self.team_ids[order] == team
+        rows = order[np.flatnonzero(mask)[:limit]]
+        return [self.records[row] for row in rows.tolist()]
+
+    def status(self):
+        return {
+            'snapshot': self.date, 'snapshot_hash': self.snapshot_hash, 'gameweek': self.gameweek,
+            'players': len(self), 'built_at': self.built_at, 'build_seconds': self.build_seconds,
+        }
+
+def next_gameweek(events):
+    # The gameweek fixture windows start from: the next one, or the last one once the season is over
+    if not events:
+        return 1
+    event = next((event for event in events if event['is_next']), None) or \
+        next((event for event in events if event['is_current']), None)
+    return event['id'] if event else events[-1]['id']
+
+class RecommendationService:
+    # `gameweek` pins the fixture windows; by default they follow the next gameweek in bootstrap-static
+    def __init__(self, store=None, gameweek=None, client=None):
+        self.store = store or SnapshotStore()
+        self.gameweek = gameweek
+        self.client = client
+        self.current = None
+        self._refresh_lock = threading.Lock()
+
+    def current_gameweek(self):
+        if self.gameweek is not None:
+            return self.gameweek
+        try:
+            self.client = self.client or get_client()
+            return next_gameweek(self.client.get('bootstrap_static')['events'])
+        except requests.exceptions.RequestException as e:
+            fallback = self.current.gameweek if self.current is not None else 1
+            logger.warning(f"Unable to fetch gameweeks, using GW{fallback}: {e}")
+            return fallback
+
+    def snapshot_key(self):
+        date = self.store.resolve_date(today())
+        return date, self.store.snapshot_hash(date) if self.store.exists(date) else None
+
+    def refresh(self):
+        # Build and swap in results for a new snapshot or gameweek; returns True when either changed
+        with self._refresh_lock:
+            date, snapshot_hash = self.snapshot_key()
+            gameweek = self.current_gameweek()
+            current = self.current
+            if current is not None and \
+                    (current.date, current.snapshot_hash, current.gameweek) == (date, snapshot_hash, gameweek):
+                return False
+            reload_defaults()
+            precomputed = Precomputed(self.store.load(date, mmap=False), date, snapshot_hash, gameweek)
+            self.current = precomputed
+            logger.info(f"Serving snapshot {date} for GW{gameweek} ({len(precomputed)} players, built in "
+                        f"{precomputed.build_seconds:.3f}s)")
+            return True
+
+    def watch(self, interval=SERVICE_POLL_INTERVAL):
+        def loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.refresh()
+                except Exception as e:
+                    logger.warning(f"Snapshot refresh failed, still serving the previous one: {e}")
+        threading.Thread(target=loop, name='snapshot-watch', daemon=True).start()
+
+class BadRequest(ValueError):
+    pass
+
+def parse_position(value):
+    if value.upper() in POSITION_IDS:
+        return POSITION_IDS[value.upper()]
+    if value.isdigit() and int(value) in POSITION_MAP:
+        return int(value)
+    raise BadRequest(f"Unknown position {value!r}; use one of {', '.join(POSITION_IDS)}")
+
+def parse_query(params):
+    # /players query string -> Precomputed.query() keyword arguments
+    params = {name: values[-1] for name, values in params.items()}
+    unknown = set(params) - {'position', 'sort', 'order', 'limit', 'min_price', 'max_price', 'max_fdr',
+                             'min_points', 'team'}
+    if unknown:
+        raise BadRequest(f"Unknown parameters: {', '.join(sorted(unknown))}")
+    sort = params.get('sort', SERVICE_DEFAULT_SORT)
+    if sort not in SERVICE_SORT_KEYS:
+        raise BadRequest(f"Cannot sort by {sort!r}; use one of {', '.join(SERVICE_SORT_KEYS)}")
+    if params.get('order', 'asc') not in ('asc', 'desc'):
+        raise BadRequest("order must be asc or desc")
+    try:
+        kwargs = {
+            'position': parse_position(params['position']) if 'position' in params else 0,
+            'sort': sort,
+            'ascending': params['order'] == 'asc' if 'order' in params else None,
+            'limit': min(max(int(params.get('limit', SERVICE_DEFAULT_LIMIT)), 0), SERVICE_MAX_LIMIT),
+            'team': int(params['team']) if 'team' in params else None,
+        }
+        for name in ('min_price', 'max_price', 'max_fdr', 'min_points'):
+            kwargs[name] = float(params[name]) if name in params else None
+    except ValueError as e:
+        raise BadRequest(str(e))
+    return kwargs
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    service = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        start = time.perf_counter()
+        parts = urlsplit(self.path)
+        path = [part for part in parts.path.split('/') if part]
+        current = self.service.current
+        if current is None:
+            self.send_json(503, {'error': "No snapshot loaded yet"})
+            return
+        try:
+            status, results = self.route(current, path, parse_qs(parts.query))
+        except BadRequest as e:
+            self.send_json(400, {'error': str(e)})
+            return
+        if status != 200:
+            self.send_json(status, {'error': results})
+            return
+        self.send_json(200, {
+            'snapshot': current.date,
+            'took_ms': (time.perf_counter() - start) * 1000,
+            'results': results,
+        })
+
+    def route(self, current, path, params):
+        if path == ['status']:
+            return 200, current.status()
+        if path == ['players']:
+            return 200, current.query(**parse_query(params))
+        if len(path) == 2 and path[0] == 'players':
+            row = current.rows_by_id.get(int(path[1])) if path[1].isdigit() else None
+            return (200, current.records[row]) if row is not None else (404, f"No player {path[1]}")
+        if path[:1] == ['rankings'] and len(path) <= 2:
+            if len(path) == 1:
+                return 200, current.rankings
+            return (200, current.rankings[path[1]]) if path[1] in current.rankings else \
+                (404, f"No ranking {path[1]!r}; use one of {', '.join(current.rankings)}")
+        if path[:1] == ['preseason'] and len(path) <= 2:
+            if len(path) == 1:
+                return 200, current.preseason
+            name = path[1].upper()
+            return (200, current.preseason[name]) if name in current.preseason else \
+                (404, f"No position {path[1]!r}; use one of {', '.join(current.preseason)}")
+        return 404, "Unknown path; try /players, /players/<id>, /rankings, /preseason or /status"
+
+def make_server(service, host=SERVICE_HOST, port=SERVICE_PORT):
+    handler = type('Handler', (ServiceHandler,), {'service': service})
+    return ThreadingHTTPServer((host, port), handler)
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve precomputed recommendations over HTTP/JSON")
+    parser.add_argument('command', choices=['serve'])
+    parser.add_argument('--host', default=SERVICE_HOST)
+    parser.add_argument('--port', type=int, default=SERVICE_PORT)
+    parser.add_argument('--gameweek', type=int,
+                        help="First gameweek of the fixture windows, default the next gameweek")
+    parser.add_argument('--interval', type=int, default=SERVICE_POLL_INTERVAL, help="Seconds between snapshot checks")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    service = RecommendationService(gameweek=args.gameweek)
+    try:
+        service.refresh()
+    except FileNotFoundError as e:
+        logger.warning(f"{e}; waiting for a fetch")
+    service.watch(args.interval)
+
+    server = make_server(service, args.host, args.port)
+    logger.info(f"Serving recommendations at http://{args.host}:{args.port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+# script/response_cache.py
+
+import argparse
+import atexit
+import hashlib
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+# Add the parent directory to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from config.cache_config import CACHE_DIR, CACHE_ENABLED, OFFLINE_MODE, CACHE_MAX_BYTES, CACHE_TTLS
+from instrumentation import count
+
+logger = logging.getLogger(__name__)
+
+STAT_NAMES = ['hits', 'misses', 'revalidated', 'stale_served', 'bytes_fetched', 'bytes_saved']
+
+def _atomic_write(path, data):
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+class ResponseCache:
+    # Each response is stored as <sha1>.body plus a <sha1>.meta JSON sidecar, written atomically,
+    # so several scripts can share the directory without a global index. The body file's
+    # access time (set explicitly on every hit) drives LRU eviction.
+    def __init__(self, cache_dir=CACHE_DIR, ttls=CACHE_TTLS, max_bytes=CACHE_MAX_BYTES, offline=OFFLINE_MODE):
+        self.cache_dir = cache_dir
+        self.ttls = ttls
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.stats = dict.fromkeys(STAT_NAMES, 0)
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def cacheable(self, endpoint):
+        return endpoint in self.ttls
+
+    def _paths(self, key):
+        digest = hashlib.sha1(key.encode()).hexdigest()
+        base = os.path.join(self.cache_dir, digest)
+        return f"{base}.body", f"{base}.meta"
+
+    def _count(self, **increments):
+        with self._lock:
+            for name, value in increments.items():
+                self.stats[name] += value
+        for name, value in increments.items():
+            count(f"cache_{name}", value)
+
+    def lookup(self, key):
+        body_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not os.path.exists(body_path):
+            return None
+        meta['body_path'] = body_path
+        meta['meta_path'] = meta_path
+        return meta
+
+    def is_fresh(self, entry, endpoint=None):
+        # TTL of the endpoint asked for, which may be stricter than the one the entry was stored under
+        ttl = self.ttls.get(endpoint or entry['endpoint'], 0)
+        return time.time() - entry['fetched_at'] < ttl
+
+    def conditional_headers(self, entry):
+        headers = {}
+        if entry is not None:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def _read(self, entry):
+        with open(entry['body_path'], 'rb') as f:
+            body = f.read()
+        now = time.time()
+        os.utime(entry['body_path'], (now, now))
+        return body
+
+    def hit(self, entry):
+        body = self._read(entry)
+        self._count(hits=1, bytes_saved=len(body))
+        return body
+
+    def serve_stale(self, entry):
+        body = self._read(entry)
+        self._count(stale_served=1, bytes_saved=len(body))
+        return body
+
+    def revalidated(self, entry):
+        # 304 Not Modified: the cached body is current again
+        entry = {k: v for k, v in entry.items() if k not in ('body_path', 'meta_path')}
+        entry['fetched_at'] = time.time()
+        body_path, meta_path = self._paths(entry['key'])
+        _atomic_write(meta_path, json.dumps(entry).encode())
+        body = self._read({'body_path': body_path})
+        self._count(revalidated=1, bytes_saved=len(body))
+        return body
+
+    def store(self, key, endpoint, response):
+        body = response.content
+        body_path, meta_path = self._paths(key)
+        meta = {
+            'key': key,
+            'endpoint': endpoint,
+            'fetched_at': time.time(),
+            'size': len(body),
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+        }
+        _atomic_write(body_path, body)
+        _atomic_write(meta_path, json.dumps(meta).encode())
+        self._count(misses=1, bytes_fetched=len(body))
+        self.evict()
+        return body
+
+    def entries(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.body'):
+                continue
+            body_path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(body_path)
+            except OSError:
+                continue
+            entries.append((stat.st_atime, stat.st_size, body_path))
+        return entries
+
+    def evict(self):
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            return
+        for _, size, body_path in sorted(entries):
+            for path in (body_path, body_path[:-len('.body')] + '.meta'):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def clear(self):
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(('.body', '.meta')):
+                os.remove(os.path.join(self.cache_dir, name))
+
+    def save_stats(self):
+        # Fold this process's counters into the cumulative totals used for monitoring
+        if not any(self.stats.values()):
+            return
+        path = os.path.join(self.cache_dir, 'stats.json')
+        totals = self.load_stats()
+        for name in STAT_NAMES:
+            totals[name] = totals.get(name, 0) + self.stats[name]
+        totals['updated_at'] = time.time()
+        _atomic_write(path, json.dumps(totals).encode())
+        self.stats = dict.fromkeys(STAT_NAMES, 0)
+
+    def load_stats(self):
+        try:
+            with open(os.path.join(self.cache_dir, 'stats.json')) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return dict.fromkeys(STAT_NAMES, 0)
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+def get_cache():
+    global _default_cache
+    if not CACHE_ENABLED:
+        return None
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ResponseCache()
+            atexit.register(_default_cache.save_stats)
+        return _default_cache
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or clear the HTTP response cache")
+    parser.add_argument('command', choices=['stats', 'clear'])
+    args = parser.parse_args()
+
+    cache = ResponseCache()
+    if args.command == 'clear':
+        cache.clear()
+        print(f"Cleared {CACHE_DIR}")
+        return
+
+    entries = cache.entries()
+    print(f"Cache directory: {CACHE_DIR}")
+    print(f"Entries: {len(entries)}, size: {sum(size for _, size, _ in entries) / 1024 / 1024:.1f} MB")
+    for name, value in cache.load_stats().items():
+        if name in STAT_NAMES:
+            print(f"{name}: {value}")
+
+if __name__ == "__main__":
+    main()
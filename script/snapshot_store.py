@@ -0,0 +1,313 @@
+# script/snapshot_store.py
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sys
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# Add the parent directory to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from config.snapshot_config import SNAPSHOT_DIR, LEGACY_CSV_FORMAT, SNAPSHOT_DTYPES
+from instrumentation import instrumented
+
+META_FILE = 'meta.json'
+OBJECTS_DIR = 'objects'
+DELTAS_DIR = 'deltas'
+
+def today():
+    return datetime.now().strftime("%Y%m%d")
+
+def encode_strings(values):
+    # Variable-length strings as one UTF-8 byte buffer plus int32 end offsets
+    encoded = [value.encode() for value in values]
+    offsets = np.cumsum([len(value) for value in encoded], dtype=np.int64).astype(np.int32)
+    return np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets
+
+def decode_strings(buffer, offsets):
+    data = bytes(buffer)
+    starts = np.concatenate(([0], offsets[:-1])).tolist()
+    ends = offsets.tolist()
+    text = data.decode()
+    if len(text) == len(data):
+        # Pure ASCII: byte offsets are character offsets, so slice the decoded text directly
+        return np.array([text[start:end] for start, end in zip(starts, ends)], dtype=object)
+    return np.array([data[start:end].decode() for start, end in zip(starts, ends)], dtype=object)
+
+def typed_column(values, dtype):
+    # One column (a Series, array or list) in the storage layout: (kind, arrays, categories)
+    if dtype == 'category':
+        categorical = pd.Categorical(values)
+        categories = categorical.categories.tolist()
+        code_dtype = np.int8 if len(categories) < 128 else np.int16
+        return 'category', [categorical.codes.astype(code_dtype)], categories
+    values = pd.Series(values, copy=False)
+    if dtype == 'str':
+        return 'str', list(encode_strings(values.fillna('').astype(str))), None
+    numeric = pd.to_numeric(values, errors='coerce')
+    if np.dtype(dtype).kind in 'iu':
+        numeric = numeric.fillna(0)
+    return 'numeric', [numeric.to_numpy().astype(dtype)], None
+
+def to_typed_arrays(df, dtypes=SNAPSHOT_DTYPES):
+    # Cast a player frame to the compact storage layout: {column: (kind, arrays, categories)}
+    return {column: typed_column(df[column], dtypes.get(column, 'float32')) for column in df.columns}
+
+def to_typed_frame(df):
+    # Same dtypes a stored snapshot loads with
+    return pd.DataFrame({
+        name: to_column(kind, arrays, categories)
+        for name, (kind, arrays, categories) in to_typed_arrays(df).items()
+    })
+
+def to_column(kind, arrays, categories):
+    if kind == 'category':
+        return pd.Categorical.from_codes(np.asarray(arrays[0]), categories)
+    if kind == 'str':
+        return decode_strings(*arrays)
+    return arrays[0]
+
+def iter_objects(record):
+    # Every object reference ({'name', 'dtype', 'length'}) nested anywhere in a metadata record
+    if isinstance(record, dict):
+        if {'name', 'dtype', 'length'} <= record.keys():
+            yield record
+        else:
+            for value in record.values():
+                yield from iter_objects(value)
+    elif isinstance(record, list):
+        for value in record:
+            yield from iter_objects(value)
+
+class SnapshotStore:
+    # Each snapshot is a meta.json listing its columns; the column arrays themselves are raw
+    # binary files in a shared, content-addressed objects/ directory. Columns load independently
+    # (projection) and are memory-mapped, and a column that did not change since an earlier
+    # snapshot (ids, names, teams, most season totals between gameweeks) is stored only once.
+    def __init__(self, root=SNAPSHOT_DIR):
+        self.root = root
+        self.objects_dir = os.path.join(root, OBJECTS_DIR)
+        self.delta_dir = os.path.join(root, DELTAS_DIR)
+
+    def path(self, date):
+        return os.path.join(self.root, date)
+
+    def dates(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(
+            name for name in os.listdir(self.root)
+            if os.path.exists(os.path.join(self.root, name, META_FILE))
+        )
+
+    def exists(self, date):
+        return os.path.exists(os.path.join(self.path(date), META_FILE))
+
+    def write_object(self, values):
+        # Raw little-endian bytes; dtype and length live in meta.json so loads skip header parsing
+        values = np.ascontiguousarray(values)
+        data = values.tobytes()
+        name = hashlib.sha1(values.dtype.str.encode() + data).hexdigest()
+        path = self._object_path(name)
+        if not os.path.exists(path):
+            tmp_path = f"{path}.tmp{os.getpid()}"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        return {'name': name, 'dtype': values.dtype.str, 'length': len(values)}
+
+    def _object_path(self, name):
+        return os.path.join(self.objects_dir, f"{name}.bin")
+
+    def read_object(self, obj, mmap=True):
+        path = self._object_path(obj['name'])
+        if obj['length'] == 0:
+            return np.empty(0, dtype=obj['dtype'])
+        if mmap:
+            return np.memmap(path, dtype=obj['dtype'], mode='r', shape=(obj['length'],))
+        return np.fromfile(path, dtype=obj['dtype'])
+
+    @instrumented('snapshot.save')
+    def save(self, df, date=None, created_at=None, dtypes=SNAPSHOT_DTYPES):
+        date = date or today()
+        created_at = created_at or datetime.now()
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.path(date), exist_ok=True)
+
+        meta = {'rows': len(df), 'created_at': created_at.isoformat(timespec='seconds'), 'columns': []}
+        for column, (kind, arrays, categories) in to_typed_arrays(df, dtypes).items():
+            meta['columns'].append({
+                'name': column,
+                'kind': kind,
+                'categories': categories,
+                'objects': [self.write_object(values) for values in arrays],
+            })
+
+        # Objects are in place before meta.json is swapped in, so readers never see a partial snapshot
+        meta_path = os.path.join(self.path(date), META_FILE)
+        with open(f"{meta_path}.tmp{os.getpid()}", 'w') as f:
+            json.dump(meta, f)
+        os.replace(f"{meta_path}.tmp{os.getpid()}", meta_path)
+        return self.path(date)
+
+    def meta(self, date):
+        with open(os.path.join(self.path(date), META_FILE)) as f:
+            return json.load(f)
+
+    def delta_timestamps(self, date):
+        # Delta polls (script/delta_store.py) recorded on top of the snapshot for `date`, up to the end of that day
+        if not os.path.isdir(self.delta_dir) or not self.exists(date):
+            return []
+        since = datetime.fromisoformat(self.meta(date)['created_at']).strftime("%Y%m%dT%H%M%S")
+        timestamps = (name[:-len('.json')] for name in os.listdir(self.delta_dir) if name.endswith('.json'))
+        return sorted(ts for ts in timestamps if since < ts <= f"{date}T235959")
+
+    def updated_at(self, date):
+        # When the stored state for `date` last changed: its latest delta poll, else the snapshot itself
+        deltas = self.delta_timestamps(date)
+        return deltas[-1] if deltas else self.meta(date)['created_at']
+
+    def snapshot_hash(self, date):
+        # Objects are content-addressed, so hashing the column list and object names hashes the data;
+        # delta polls applied on load are named by their timestamps
+        columns = [
+            [column['name'], column['kind'], column['categories'], [obj['name'] for obj in column['objects']]]
+            for column in self.meta(date)['columns']
+        ]
+        deltas = self.delta_timestamps(date)
+        if deltas:
+            columns.append(['deltas', deltas])
+        return hashlib.sha1(json.dumps(columns).encode()).hexdigest()
+
+    def load_arrays(self, date=None, columns=None, mmap=True):
+        # Stored arrays per column (memory-mapped by default) plus column metadata, without building a DataFrame
+        date = date or today()
+        if not self.exists(date):
+            raise FileNotFoundError(f"No snapshot for {date} in {self.root}")
+        meta = {column['name']: column for column in self.meta(date)['columns']}
+        names = list(meta) if columns is None else [column for column in columns if column in meta]
+        arrays = {
+            name: [self.read_object(obj, mmap) for obj in meta[name]['objects']]
+            for name in names
+        }
+        return arrays, {name: meta[name] for name in names}
+
+    def latest_date(self, on_or_before=None):
+        dates = [date for date in self.dates() if on_or_before is None or date <= on_or_before]
+        return dates[-1] if dates else None
+
+    def resolve_date(self, date):
+        # The requested day if stored (snapshot or legacy CSV), else the latest earlier snapshot
+        if self.exists(date) or os.path.exists(LEGACY_CSV_FORMAT.format(date)):
+            return date
+        latest = self.latest_date(on_or_before=date)
+        if latest is None:
+            raise FileNotFoundError(f"No snapshot on or before {date} in {self.root}")
+        logging.warning(f"No snapshot for {date}, using the latest available one from {latest}")
+        return latest
+
+    @instrumented('snapshot.load')
+    def load(self, date=None, columns=None, mmap=True, fallback=True, deltas=True):
+        # With deltas, the day's delta polls are applied on top of its snapshot, so the latest prices
+        # and news are read rather than the state at the day's first poll
+        date = date or today()
+        if fallback:
+            date = self.resolve_date(date)
+        if not self.exists(date):
+            return self.load_legacy_csv(date, columns)
+        if deltas and self.delta_timestamps(date):
+            from delta_store import DeltaStore
+            players = DeltaStore(self).state_at(f"{date}T235959")
+            return players if columns is None else players[[column for column in columns if column in players]]
+
+        arrays, meta = self.load_arrays(date, columns, mmap)
+        return pd.DataFrame({
+            name: to_column(meta[name]['kind'], values, meta[name]['categories'])
+            for name, values in arrays.items()
+        }, copy=False)
+
+    def load_legacy_csv(self, date, columns=None):
+        csv_path = LEGACY_CSV_FORMAT.format(date)
+        if not os.path.exists(csv_path):
+            raise FileNotFoundError(f"No snapshot for {date} in {self.root}")
+        return to_typed_frame(pd.read_csv(csv_path, usecols=lambda column: columns is None or column in columns))
+
+    def migrate_legacy_csv(self):
+        migrated = []
+        data_dir = os.path.dirname(LEGACY_CSV_FORMAT)
+        prefix, suffix = os.path.basename(LEGACY_CSV_FORMAT).split('{}')
+        for name in sorted(os.listdir(data_dir)):
+            if name.startswith(prefix) and name.endswith(suffix):
+                date = name[len(prefix):-len(suffix)]
+                if not self.exists(date):
+                    self.save(pd.read_csv(os.path.join(data_dir, name)), date)
+                    migrated.append(date)
+        return migrated
+
+    def referenced_objects(self, dates=None):
+        referenced = {
+            obj['name']
+            for date in (self.dates() if dates is None else dates)
+            for column in self.meta(date)['columns']
+            for obj in column['objects']
+        }
+        if dates is None and os.path.isdir(self.delta_dir):
+            # Delta records (script/delta_store.py) keep their changed rows in the same objects directory
+            for name in os.listdir(self.delta_dir):
+                if name.endswith('.json'):
+                    with open(os.path.join(self.delta_dir, name)) as f:
+                        referenced.update(obj['name'] for obj in iter_objects(json.load(f)))
+        return referenced
+
+    def snapshot_size(self, date):
+        return sum(os.path.getsize(self._object_path(obj)) for obj in self.referenced_objects([date]))
+
+    def store_size(self):
+        return sum(os.path.getsize(self._object_path(obj)) for obj in self.referenced_objects())
+
+    def gc(self):
+        # Remove objects no snapshot refers to any more (e.g. after a snapshot was overwritten)
+        referenced = self.referenced_objects()
+        removed = 0
+        for name in os.listdir(self.objects_dir):
+            if name.endswith('.bin') and name[:-len('.bin')] not in referenced:
+                os.remove(os.path.join(self.objects_dir, name))
+                removed += 1
+        return removed
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage columnar player snapshots")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('list')
+    subparsers.add_parser('gc', help="Delete column objects no snapshot refers to")
+    subparsers.add_parser('migrate', help="Convert legacy fpl_data_YYYYMMDD.csv files")
+    export_parser = subparsers.add_parser('export', help="Write a snapshot back out as CSV")
+    export_parser.add_argument('date')
+    export_parser.add_argument('output')
+    args = parser.parse_args()
+
+    store = SnapshotStore()
+    if args.command == 'list':
+        for date in store.dates():
+            print(f"{date}: {store.meta(date)['rows']} rows, {store.snapshot_size(date) / 1024:.1f} KB")
+        print(f"Total on disk (shared columns counted once): {store.store_size() / 1024:.1f} KB")
+    elif args.command == 'gc':
+        print(f"Removed {store.gc()} unreferenced objects")
+    elif args.command == 'migrate':
+        for date in store.migrate_legacy_csv():
+            csv_size = os.path.getsize(LEGACY_CSV_FORMAT.format(date))
+            print(f"Migrated {date}: {csv_size / 1024:.1f} KB CSV -> {store.snapshot_size(date) / 1024:.1f} KB")
+    elif args.command == 'export':
+        store.load(args.date, mmap=False).to_csv(args.output, index=False)
+        print(f"Exported {args.date} to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+# script/squad_optimizer.py
+
+import argparse
+import itertools
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+try:
+    from scipy.optimize import milp, LinearConstraint, Bounds
+except ImportError:
+    milp = None
+
+# Add the parent directory to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from config.transfer_recommender_config import (
+    TEAM_ID, POSITION_MAP, SQUAD_BUDGET, SQUAD_QUOTAS, MAX_PER_CLUB,
+    XI_SIZE, XI_MIN_PLAYERS, SQUAD_BEAM_WIDTH
+)
+
+SQUAD_SIZE = sum(SQUAD_QUOTAS.values())
+
+SQUAD_COLUMNS = ['web_name', 'team_name', 'element_type', 'now_cost', 'adjusted_value', 'starter']
+
+def to_tenths(prices):
+    # Prices in £m as stored in snapshots; integer tenths keep the budget check exact
+    return np.rint(np.asarray(prices, dtype=float) * 10).astype(np.int64)
+
+class SquadOptimizer:
+    # Best legal 15-man squad by total score: budget, per-position quotas and a per-club limit.
+    # Solved as a 0/1 integer program when scipy is installed, otherwise by beam search plus
+    # one-for-one swap improvement. Dominated players are dropped first (see prune).
+    def __init__(self, positions, clubs, costs, values, budget=SQUAD_BUDGET, quotas=SQUAD_QUOTAS,
+                 max_per_club=MAX_PER_CLUB):
+        self.positions = np.asarray(positions, dtype=np.int64)
+        self.clubs = np.asarray(clubs, dtype=np.int64)
+        self.costs = to_tenths(costs)
+        self.values = np.asarray(values, dtype=float)
+        self.budget = int(round(budget * 10))
+        self.quotas = dict(quotas)
+        self.max_per_club = max_per_club
+
+    def prune(self):
+        # Indices of players that can appear in some optimal squad. Player p is dropped when
+        # enough players of its position are at least as good and no more expensive that one of
+        # them can always replace p: min(quota, max_per_club) from p's own club (swapping keeps
+        # the club counts), or dominators spread over quota + (squad size - 1) // max_per_club clubs
+        # (at most quota - 1 of them are already picked and at most that many other clubs are full).
+        keep = []
+        for position, quota in self.quotas.items():
+            rows = np.flatnonzero(self.positions == position)
+            # Strict order (value desc, cost asc, index) so identical players don't prune each other
+            rows = rows[np.lexsort((rows, self.costs[rows], -self.values[rows]))]
+            costs = self.costs[rows]
+            dominated_by = np.tril(costs[None, :] <= costs[:, None], k=-1)
+
+            clubs = self.clubs[rows]
+            same_club = dominated_by & (clubs[None, :] == clubs[:, None])
+            _, club_codes = np.unique(clubs, return_inverse=True)
+            one_hot = np.eye(club_codes.max() + 1 if len(rows) else 0, dtype=np.int64)[club_codes]
+            dominator_clubs = ((dominated_by.astype(np.int64) @ one_hot) > 0).sum(axis=1)
+
+            pruned = (same_club.sum(axis=1) >= min(quota, self.max_per_club)) | \
+                     (dominator_clubs >= quota + (sum(self.quotas.values()) - 1) // self.max_per_club)
+            keep.append(rows[~pruned])
+        return np.sort(np.concatenate(keep))
+
+    def _milp(self, candidates):
+        n = len(candidates)
+        positions, clubs = self.positions[candidates], self.clubs[candidates]
+        club_ids = np.unique(clubs)
+        position_ids = list(self.quotas)
+        A = np.vstack([
+            (positions[None, :] == np.array(position_ids)[:, None]),
+            (clubs[None, :] == club_ids[:, None]),
+            self.costs[candidates][None, :],
+        ]).astype(float)
+        quotas = np.array([self.quotas[position] for position in position_ids], dtype=float)
+        lower = np.concatenate([quotas, np.zeros(len(club_ids)), [0]])
+        upper = np.concatenate([quotas, np.full(len(club_ids), self.max_per_club), [self.budget]])
+        result = milp(
+            -self.values[candidates], integrality=np.ones(n), bounds=Bounds(0, 1),
+            constraints=LinearConstraint(A, lower, upper)
+        )
+        if result.x is None:
+            return None
+        return candidates[np.flatnonzero(result.x > 0.5)]
+
+    def _beam(self, candidates, width=SQUAD_BEAM_WIDTH):
+        order = candidates[np.argsort(-self.values[candidates], kind='stable')]
+        position_ids = list(self.quotas)
+        slot = {position: i for i, position in enumerate(position_ids)}
+        quotas = np.array([self.quotas[position] for position in position_ids])
+
+        # Optimistic completion: the best values still ahead for each open slot, and the cheapest
+        # possible cost of filling the open slots
+        ahead = {}
+        cheapest = {}
+        for position in position_ids:
+            mask = self.positions[order] == position
+            ahead[position] = (np.cumsum(mask) - mask, np.concatenate([[0], np.cumsum(self.values[order][mask])]))
+            cheapest[position] = np.concatenate([[0], np.cumsum(np.sort(self.costs[order][mask]))])
+
+        def bound(step, state):
+            score, _, counts, _, _ = state
+            total = score
+            for position in position_ids:
+                taken_before, prefix = ahead[position]
+                start = taken_before[step] if step < len(order) else len(prefix) - 1
+                need = quotas[slot[position]] - counts[slot[position]]
+                total += prefix[min(start + need, len(prefix) - 1)] - prefix[start]
+            return total
+
+        def min_fill(counts):
+            return sum(cheapest[position][min(quotas[slot[position]] - counts[slot[position]],
+                                               len(cheapest[position]) - 1)] for position in position_ids)
+
+        beam = [(0.0, 0, (0,) * len(position_ids), {}, ())]
+        for step, player in enumerate(order):
+            position_slot = slot[self.positions[player]]
+            club = self.clubs[player]
+            expanded = []
+            for state in beam:
+                expanded.append(state)
+                score, cost, counts, club_counts, chosen = state
+                if counts[position_slot] >= quotas[position_slot] or club_counts.get(club, 0) >= self.max_per_club:
+                    continue
+                new_counts = counts[:position_slot] + (counts[position_slot] + 1,) + counts[position_slot + 1:]
+                new_cost = cost + self.costs[player]
+                if new_cost + min_fill(new_counts) > self.budget:
+                    continue
+                expanded.append((score + self.values[player], new_cost, new_counts,
+                                 {**club_counts, club: club_counts.get(club, 0) + 1}, chosen + (player,)))
+            if len(expanded) > width:
+                expanded.sort(key=lambda state: bound(step + 1, state), reverse=True)
+                expanded = expanded[:width]
+            beam = expanded
+
+        complete = [state for state in beam if len(state[4]) == quotas.sum()]
+        if not complete:
+            return None
+        return self.improve(np.array(max(complete, key=lambda state: state[0])[4]), candidates)
+
+    def improve(self, squad, candidates):
+        # Apply the best improving one-for-one swap until none is left
+        squad = np.sort(squad)
+        while True:
+            outside = np.setdiff1d(candidates, squad)
+            gain = self.values[outside][None, :] - self.values[squad][:, None]
+            club_counts = pd.Series(self.clubs[squad]).value_counts()
+            incoming_club_count = club_counts.reindex(self.clubs[outside], fill_value=0).to_numpy()
+            same_club = self.clubs[outside][None, :] == self.clubs[squad][:, None]
+            legal = (self.positions[outside][None, :] == self.positions[squad][:, None]) & \
+                    (self.costs[squad].sum() - self.costs[squad][:, None] + self.costs[outside][None, :] <= self.budget) & \
+                    (same_club | (incoming_club_count[None, :] < self.max_per_club)) & (gain > 1e-12)
+            if not legal.any():
+                return squad
+            gain = np.where(legal, gain, -np.inf)
+            out_row, in_row = np.unravel_index(np.argmax(gain), gain.shape)
+            squad = np.sort(np.append(np.delete(squad, out_row), outside[in_row]))
+
+    def solve(self, method='auto', prune=True):
+        # Row indices of the best squad found, or None if no legal squad exists
+        candidates = self.prune() if prune else np.arange(len(self.values))
+        candidates = candidates[~np.isnan(self.values[candidates])]
+        if method == 'milp' or (method == 'auto' and milp is not None):
+            return self._milp(candidates)
+        # A narrow beam can lose every legal completion when the club limit binds; widen once
+        squad = self._beam(candidates)
+        return squad if squad is not None else self._beam(candidates, SQUAD_BEAM_WIDTH * 8)
+
+    def objective(self, squad):
+        return float(self.values[squad].sum())
+
+    def starting_xi(self, squad):
+        # One goalkeeper, the XI_MIN_PLAYERS floor per outfield position, then the best of the rest
+        squad = np.asarray(squad)
+        ranked = squad[np.argsort(-self.values[squad], kind='stable')]
+        starters = []
+        for position, minimum in XI_MIN_PLAYERS.items():
+            starters.extend(ranked[self.positions[ranked] == position][:minimum])
+        rest = [row for row in ranked if row not in starters and self.positions[row] != 1]
+        starters.extend(rest[:XI_SIZE - len(starters)])
+        return np.array(sorted(starters))
+
+def brute_force(optimizer, candidates):
+    # Exhaustive search over every per-position combination; only feasible for small pools
+    blocks = []
+    for position, quota in optimizer.quotas.items():
+        rows = candidates[optimizer.positions[candidates] == position]
+        combos = np.array(list(itertools.combinations(rows, quota)), dtype=np.int64).reshape(-1, quota)
+        blocks.append(combos)
+    club_ids = np.unique(optimizer.clubs[candidates])
+
+    best_value, best_squad = -np.inf, None
+    for combo in itertools.product(*[range(len(block)) for block in blocks[:-1]]):
+        head = np.concatenate([block[i] for block, i in zip(blocks[:-1], combo)])
+        squads = np.hstack([np.broadcast_to(head, (len(blocks[-1]), len(head))), blocks[-1]])
+        costs = optimizer.costs[squads].sum(axis=1)
+        club_counts = (optimizer.clubs[squads][:, :, None] == club_ids[None, None, :]).sum(axis=1)
+        legal = (costs <= optimizer.budget) & (club_counts.max(axis=1) <= optimizer.max_per_club)
+        if legal.any():
+            values = np.where(legal, optimizer.values[squads].sum(axis=1), -np.inf)
+            if values.max() > best_value:
+                best_value, best_squad = values.max(), squads[np.argmax(values)]
+    return best_squad
+
+def benchmark(players, pools=5, per_position=(4, 8, 8, 6), num_clubs=7, seed=0):
+    rng = np.random.default_rng(seed)
+    print(f"{'pool':>5} {'brute s':>9} {'brute obj':>10} {'milp s':>8} {'milp obj':>10} {'beam s':>8} {'beam obj':>10}")
+    for _ in range(pools):
+        # Few clubs so the per-club limit actually binds
+        clubs = rng.choice(np.asarray(players['team'].unique()), num_clubs, replace=False)
+        pool = players[players['team'].isin(clubs)]
+        sample = pd.concat([
+            pool[pool['element_type'] == position].sample(count, random_state=rng.integers(1 << 31))
+            for position, count in zip(SQUAD_QUOTAS, per_position)
+        ])
+        # Budget between the cheapest legal-size squad and an unconstrained pick
+        cheapest = sum(np.sort(sample.loc[sample['element_type'] == position, 'now_cost'])[:quota].sum()
+                       for position, quota in SQUAD_QUOTAS.items())
+        budget = round(cheapest + 0.5 * (sample['now_cost'].sum() * SQUAD_SIZE / len(sample) - cheapest), 1)
+        optimizer = SquadOptimizer(sample['element_type'], sample['team'], sample['now_cost'],
+                                   sample['adjusted_value'], budget=budget)
+
+        results = []
+        for solve in (lambda: brute_force(optimizer, np.arange(len(sample))),
+                      lambda: optimizer.solve('milp') if milp is not None else None,
+                      lambda: optimizer.solve('beam')):
+            start = time.perf_counter()
+            squad = solve()
+            elapsed = time.perf_counter() - start
+            results.append((elapsed, optimizer.objective(squad) if squad is not None else float('nan')))
+        print(f"{len(sample):>5} " + ' '.join(f"{elapsed:>9.4f} {value:>10.3f}" for elapsed, value in results))
+
+    optimizer = SquadOptimizer(players['element_type'], players['team'], players['now_cost'], players['adjusted_value'])
+    start = time.perf_counter()
+    candidates = optimizer.prune()
+    print(f"\nFull pool: {len(players)} players, {len(candidates)} after pruning ({time.perf_counter() - start:.4f}s)")
+    for method in (['milp'] if milp is not None else []) + ['beam']:
+        start = time.perf_counter()
+        squad = optimizer.solve(method)
+        print(f"{method}: objective {optimizer.objective(squad):.3f} in {time.perf_counter() - start:.4f}s")
+
+def build_squad(players, method='auto'):
+    # Best squad from a frame with element_type, team, now_cost and adjusted_value columns
+    players = players.reset_index(drop=True)
+    optimizer = SquadOptimizer(players['element_type'], players['team'], players['now_cost'], players['adjusted_value'])
+    squad = optimizer.solve(method)
+    if squad is None:
+        return None
+    result = players.iloc[squad].copy()
+    result['starter'] = np.isin(squad, optimizer.starting_xi(squad))
+    return result.sort_values(['starter', 'element_type', 'adjusted_value'], ascending=[False, True, False])
+
+def main():
+    from transfer_preseason_recommender import TransferPreseasonRecommender
+
+    parser = argparse.ArgumentParser(description="Build the best legal 15-man squad by adjusted value")
+    parser.add_argument('--method', choices=['auto', 'milp', 'beam'], default='auto')
+    parser.add_argument('--benchmark', action='store_true', help="Compare solvers against brute force on small pools")
+    args = parser.parse_args()
+
+    players = TransferPreseasonRecommender(TEAM_ID).player_values()
+    if args.benchmark:
+        benchmark(players)
+        return
+
+    start = time.perf_counter()
+    squad = build_squad(players, args.method)
+    if squad is None:
+        print("No legal squad fits the budget.")
+        sys.exit(1)
+    print(f"Solved in {time.perf_counter() - start:.3f}s, total cost £{squad['now_cost'].sum():.1f}m, "
+          f"adjusted value {squad['adjusted_value'].sum():.2f}")
+    squad['position'] = squad['element_type'].map(POSITION_MAP)
+    print(squad[['position'] + SQUAD_COLUMNS].to_string(index=False))
+
+if __name__ == "__main__":
+    main()
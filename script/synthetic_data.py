@@ -0,0 +1,202 @@
+# script/synthetic_data.py
+#
+# Synthetic FPL API payloads shaped like the real ones (string-typed decimals, the full set of
+# element fields), generated from one seed at any multiple of the real player count. The files
+# follow the stub server layout, so every script can run against them offline:
+#
+#   python3 script/synthetic_data.py write /tmp/fpl10x --scale 10 --managers 1000
+#   python3 script/fpl_stub_server.py serve /tmp/fpl10x
+#   FPL_BASE_URL=http://127.0.0.1:8765/api/ FPL_CACHE=0 make fetch
+
+import argparse
+import json
+import os
+import sys
+from datetime import datetime, timedelta
+
+import numpy as np
+
+# Add the parent directory to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from config.analyzer_config import FIXTURE_DIFFICULTY
+from config.benchmark_config import (
+    SYNTHETIC_PLAYERS, SYNTHETIC_TEAMS, SYNTHETIC_GAMEWEEKS, SYNTHETIC_CURRENT_GAMEWEEK, SYNTHETIC_SEED,
+    SYNTHETIC_POSITION_SHARES
+)
+from config.transfer_recommender_config import SQUAD_QUOTAS, XI_SIZE
+from fpl_stub_server import payload_path
+
+# Element fields the scripts never read, carried so payload size and parse cost match the API
+FILLER_FIELDS = {
+    'chance_of_playing_next_round': None, 'chance_of_playing_this_round': None, 'cost_change_event': 0,
+    'cost_change_event_fall': 0, 'cost_change_start': 0, 'cost_change_start_fall': 0, 'dreamteam_count': 0,
+    'ep_next': '0.0', 'ep_this': '0.0', 'event_points': 0, 'in_dreamteam': False, 'news': '',
+    'news_added': None, 'photo': '', 'special': False, 'squad_number': None, 'status': 'a',
+    'transfers_in': 0, 'transfers_in_event': 0, 'transfers_out': 0, 'transfers_out_event': 0,
+    'value_form': '0.0', 'value_season': '0.0', 'region': None, 'starts': 0, 'expected_goals': '0.00',
+    'expected_assists': '0.00', 'expected_goal_involvements': '0.00', 'expected_goals_conceded': '0.00',
+    'influence_rank': 0, 'influence_rank_type': 0, 'creativity_rank': 0, 'creativity_rank_type': 0,
+    'threat_rank': 0, 'threat_rank_type': 0, 'ict_index_rank': 0, 'ict_index_rank_type': 0,
+    'corners_and_indirect_freekicks_order': None, 'direct_freekicks_order': None, 'penalties_order': None,
+    'now_cost_rank': 0, 'now_cost_rank_type': 0, 'form_rank': 0, 'form_rank_type': 0,
+    'points_per_game_rank': 0, 'points_per_game_rank_type': 0, 'selected_rank': 0, 'selected_rank_type': 0,
+}
+
+def team_names(num_teams):
+    names = list(FIXTURE_DIFFICULTY)
+    return [names[i] if i < len(names) else f"Team {i + 1}" for i in range(num_teams)]
+
+def decimals(values, places=1):
+    # The API sends these fields as strings
+    return [f"{value:.{places}f}" for value in values.tolist()]
+
+def synthetic_elements(num_players, num_teams, rng):
+    ids = np.arange(1, num_players + 1)
+    shares = np.array(list(SYNTHETIC_POSITION_SHARES.values()))
+    positions = rng.choice(list(SYNTHETIC_POSITION_SHARES), size=num_players, p=shares / shares.sum())
+    quality = rng.beta(2, 5, size=num_players)
+    minutes = (rng.uniform(0, 1, num_players) * 720 * (quality > 0.1)).astype(int)
+    played = minutes / 90
+    goals = rng.poisson(played * quality * np.array([0, 0.05, 0.3, 0.5, 0.6])[positions])
+    assists = rng.poisson(played * quality * np.array([0, 0.1, 0.3, 0.2, 0.2])[positions])
+    clean_sheets = rng.binomial(np.ceil(played).astype(int), 0.3)
+    total_points = (played * 2 + goals * 5 + assists * 3 + clean_sheets * 2).astype(int)
+    influence = rng.gamma(2, 20, num_players) * quality
+    creativity = rng.gamma(2, 20, num_players) * quality
+    threat = rng.gamma(2, 20, num_players) * quality
+    columns = {
+        'id': ids.tolist(),
+        'code': (ids + 100000).tolist(),
+        'first_name': [f"First{i}" for i in ids.tolist()],
+        'second_name': [f"Second{i}" for i in ids.tolist()],
+        'web_name': [f"Player{i}" for i in ids.tolist()],
+        'team': rng.integers(1, num_teams + 1, num_players).tolist(),
+        'team_code': rng.integers(1, 100, num_players).tolist(),
+        'element_type': positions.tolist(),
+        'now_cost': (40 + np.round(quality * 90)).astype(int).tolist(),
+        'selected_by_percent': decimals(rng.exponential(3, num_players).clip(0, 90)),
+        'minutes': minutes.tolist(),
+        'goals_scored': goals.tolist(),
+        'assists': assists.tolist(),
+        'clean_sheets': clean_sheets.tolist(),
+        'goals_conceded': rng.poisson(played * 1.3).tolist(),
+        'own_goals': rng.binomial(1, 0.02, num_players).tolist(),
+        'penalties_saved': rng.binomial(1, 0.02, num_players).tolist(),
+        'penalties_missed': rng.binomial(1, 0.02, num_players).tolist(),
+        'yellow_cards': rng.poisson(played * 0.15).tolist(),
+        'red_cards': rng.binomial(1, 0.01, num_players).tolist(),
+        'saves': (rng.poisson(played * 3) * (positions == 1)).tolist(),
+        'bonus': rng.poisson(played * quality).tolist(),
+        'bps': (played * 20 * quality).astype(int).tolist(),
+        'influence': decimals(influence),
+        'creativity': decimals(creativity),
+        'threat': decimals(threat),
+        'ict_index': decimals((influence + creativity + threat) / 10),
+        'form': decimals(rng.gamma(2, 1.5, num_players) * quality * 2),
+        'points_per_game': decimals(np.where(played > 0, total_points / np.maximum(played, 1), 0)),
+        'total_points': total_points.tolist(),
+    }
+    names = list(columns) + list(FILLER_FIELDS)
+    rows = zip(*columns.values(), *([value] * num_players for value in FILLER_FIELDS.values()))
+    return [dict(zip(names, row)) for row in rows]
+
+def synthetic_events(num_gameweeks, current_gameweek, start=datetime(2026, 8, 15, 10, 0)):
+    return [{
+        'id': gameweek,
+        'name': f"Gameweek {gameweek}",
+        'deadline_time': (start + timedelta(days=7 * (gameweek - 1))).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'finished': gameweek < current_gameweek,
+        'is_previous': gameweek == current_gameweek - 1,
+        'is_current': gameweek == current_gameweek,
+        'is_next': gameweek == current_gameweek + 1,
+    } for gameweek in range(1, num_gameweeks + 1)]
+
+def synthetic_fixtures(num_teams, num_gameweeks, rng):
+    # Double round robin by the circle method: every team plays once per gameweek
+    teams = list(range(1, num_teams + 1))
+    rounds = []
+    for _ in range(num_teams - 1):
+        rounds.append([(teams[i], teams[-1 - i]) for i in range(num_teams // 2)])
+        teams = [teams[0], teams[-1]] + teams[1:-1]
+    rounds += [[(away, home) for home, away in matches] for matches in rounds]
+
+    fixtures = []
+    for gameweek in range(1, num_gameweeks + 1):
+        for home, away in rounds[(gameweek - 1) % len(rounds)]:
+            difficulty = rng.integers(2, 6, 2).tolist()
+            fixtures.append({
+                'id': len(fixtures) + 1, 'event': gameweek, 'team_h': home, 'team_a': away,
+                'team_h_difficulty': difficulty[0], 'team_a_difficulty': difficulty[1],
+                'finished': False, 'finished_provisional': False,
+            })
+    return fixtures
+
+def synthetic_picks(elements, rng):
+    # A legal 15-man squad in pick order: goalkeeper, ten outfield starters, then the bench
+    by_position = {position: [element['id'] for element in elements if element['element_type'] == position]
+                   for position in SQUAD_QUOTAS}
+    chosen = {position: rng.choice(by_position[position], count, replace=False).tolist()
+              for position, count in SQUAD_QUOTAS.items()}
+    starters = [chosen[1][0]] + chosen[2][:4] + chosen[3][:4] + chosen[4][:2]
+    bench = [chosen[1][1], chosen[2][4], chosen[3][4], chosen[4][2]]
+    return {
+        'picks': [{
+            'element': element, 'position': i + 1,
+            'multiplier': (2 if i == 5 else 1) if i < XI_SIZE else 0,
+            'is_captain': i == 5, 'is_vice_captain': i == 6,
+        } for i, element in enumerate(starters + bench)],
+        'entry_history': {'bank': int(rng.integers(0, 30)), 'event_transfers_cost': 0},
+        'automatic_subs': [],
+    }
+
+def synthetic_entry(team_id, rng):
+    return {
+        'id': team_id, 'name': f"Synthetic {team_id}",
+        'summary_overall_rank': int(rng.integers(1, 10_000_000)),
+        'summary_overall_points': int(rng.integers(100, 600)),
+    }
+
+def generate(scale=1, managers=0, seed=SYNTHETIC_SEED, num_teams=SYNTHETIC_TEAMS,
+             num_gameweeks=SYNTHETIC_GAMEWEEKS, current_gameweek=SYNTHETIC_CURRENT_GAMEWEEK):
+    # {api path: payload} for bootstrap-static, fixtures and `managers` entries with their picks
+    rng = np.random.default_rng(seed)
+    teams = [{'id': i + 1, 'name': name, 'short_name': name[:3].upper()}
+             for i, name in enumerate(team_names(num_teams))]
+    elements = synthetic_elements(int(SYNTHETIC_PLAYERS * scale), num_teams, rng)
+    payloads = {
+        'bootstrap-static/': {'events': synthetic_events(num_gameweeks, current_gameweek), 'teams': teams,
+                              'elements': elements, 'element_types': []},
+        'fixtures/': synthetic_fixtures(num_teams, num_gameweeks, rng),
+    }
+    for team_id in range(1, managers + 1):
+        payloads[f"entry/{team_id}/"] = synthetic_entry(team_id, rng)
+        payloads[f"entry/{team_id}/event/{current_gameweek}/picks/"] = synthetic_picks(elements, rng)
+    return payloads
+
+def write_payloads(root, payloads):
+    for api_path, payload in payloads.items():
+        path = payload_path(root, api_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(payload, f)
+    return root
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic FPL API payloads for the stub server")
+    parser.add_argument('command', choices=['write'])
+    parser.add_argument('root', help="Directory to write payloads to")
+    parser.add_argument('--scale', type=float, default=1, help=f"Multiple of {SYNTHETIC_PLAYERS} players")
+    parser.add_argument('--managers', type=int, default=100, help="Entries with picks for the current gameweek")
+    parser.add_argument('--seed', type=int, default=SYNTHETIC_SEED)
+    args = parser.parse_args()
+
+    payloads = generate(args.scale, args.managers, args.seed)
+    write_payloads(args.root, payloads)
+    players = len(payloads['bootstrap-static/']['elements'])
+    print(f"Wrote {len(payloads)} payloads ({players} players, {args.managers} managers) to {args.root}")
+
+if __name__ == "__main__":
+    main()
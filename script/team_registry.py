@@ -0,0 +1,109 @@
+# script/team_registry.py
+
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Add the parent directory to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from config.snapshot_config import TEAMS_FILE, LEGACY_TEAM_MAPPING
+from fdr_index import get_fdr_index
+
+class TeamRegistry:
+    # Teams from the bootstrap-static teams array, in id order. `positions` maps a team id straight
+    # to its dense index (len(teams) for unknown ids), so enriching a player column is one take
+    # into `names` or into a per-team value array instead of a merge or a dict map.
+    def __init__(self, ids, names, short_names=None):
+        self.ids = np.asarray(ids, dtype=np.int16)
+        self.names = np.array(list(names), dtype=object)
+        self.short_names = np.array(list(short_names) if short_names is not None else list(names), dtype=object)
+        self.positions = np.full(int(self.ids.max()) + 1 if len(self.ids) else 0, len(self.ids), dtype=np.int16)
+        self.positions[self.ids] = np.arange(len(self.ids))
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def from_api(cls, teams):
+        teams = sorted(teams, key=lambda team: team['id'])
+        return cls(
+            [team['id'] for team in teams],
+            [team['name'] for team in teams],
+            [team.get('short_name', team['name']) for team in teams]
+        )
+
+    @classmethod
+    def load(cls, path=TEAMS_FILE):
+        with open(path) as f:
+            return cls.from_api(json.load(f))
+
+    @classmethod
+    def from_csv(cls, path=LEGACY_TEAM_MAPPING):
+        mapping = pd.read_csv(path).sort_values('id')
+        return cls(mapping['id'], mapping['name'])
+
+    def save(self, path=TEAMS_FILE):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        teams = [
+            {'id': int(team_id), 'name': name, 'short_name': short_name}
+            for team_id, name, short_name in zip(self.ids, self.names, self.short_names)
+        ]
+        with open(f"{path}.tmp{os.getpid()}", 'w') as f:
+            json.dump(teams, f)
+        os.replace(f"{path}.tmp{os.getpid()}", path)
+        return path
+
+    def index_of(self, team_ids):
+        # Dense index per team id; unknown or out-of-range ids map to len(self)
+        team_ids = np.asarray(team_ids, dtype=np.int64)
+        known = (team_ids >= 0) & (team_ids < len(self.positions))
+        return np.where(known, self.positions[np.where(known, team_ids, 0)], len(self.ids))
+
+    def take(self, values, team_ids, missing=None):
+        # values[i] belongs to the i-th registered team; returns one value per team id
+        return np.append(np.asarray(values, dtype=object), missing)[self.index_of(team_ids)]
+
+    def names_of(self, team_ids):
+        return self.take(self.names, team_ids)
+
+    def fdr_rows(self, fdr_index):
+        # Dense index -> row of `fdr_index`, -1 for teams the index does not know
+        return fdr_index.positions_of(self.names)
+
+    def fdr(self, team_ids, gameweek, horizon, fdr_index=None):
+        # Average fixture difficulty per team id, NaN for unknown teams
+        fdr_index = fdr_index or get_fdr_index()
+        averages = np.append(fdr_index.averages(gameweek, horizon), np.nan)
+        return averages[np.append(self.fdr_rows(fdr_index), -1)[self.index_of(team_ids)]]
+
+    def fixture_counts(self, team_ids, gameweek, horizon, fdr_index=None):
+        # Fixtures played in the window per team id, 0 for unknown teams
+        fdr_index = fdr_index or get_fdr_index()
+        counts = np.append(fdr_index.fixture_counts(gameweek, horizon), 0)
+        return counts[np.append(self.fdr_rows(fdr_index), -1)[self.index_of(team_ids)]]
+
+_default_registry = None
+
+def get_team_registry():
+    # Registry saved by the last fetch, or data_source/team_mapping.csv if none was fetched yet
+    global _default_registry
+    if _default_registry is None:
+        try:
+            _default_registry = TeamRegistry.load(TEAMS_FILE)
+        except FileNotFoundError:
+            _default_registry = TeamRegistry.from_csv(LEGACY_TEAM_MAPPING)
+    return _default_registry
+
+def reload_defaults():
+    # Forget the shared registry and FDR index so the next get_team_registry() / get_fdr_index()
+    # reads what the last fetch saved; for processes that outlive a fetch
+    global _default_registry
+    import fdr_index
+    _default_registry = None
+    fdr_index._default_index = None
@@ -1,33 +1,50 @@
 # script/team_watcher.py
 
+import argparse
+import json
+import logging
 import os
+import sqlite3
 import sys
+import time
 import requests
-from datetime import datetime
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
 
 # Add the parent directory to the Python path
 current_dir = os.path.dirname(os.path.abspath(__file__))
 parent_dir = os.path.dirname(current_dir)
 sys.path.append(parent_dir)
 
-from config.team_watcher_config import BASE_URL, TEAM_ID
+from config.team_watcher_config import (
+    TEAM_ID, WATCH_FAST_INTERVAL, WATCH_SLOW_INTERVAL, WATCH_FAST_WINDOW, WATCH_BATCH_SIZE,
+    WATCH_MAX_WORKERS, WATCH_STATE_FILE, WATCH_EVENTS_PATH
+)
+from fpl_client import FPLClient, get_client
+
+logger = logging.getLogger(__name__)
+
+SQUAD_SIZE = 15
 
 class TeamWatcher:
-    def __init__(self, team_id):
+    def __init__(self, team_id, client=None):
         self.team_id = team_id
-        self.base_url = BASE_URL
+        self.client = client or get_client()
 
     def get_team_data(self):
-        url = f"{self.base_url}entry/{self.team_id}/"
-        return self._make_request(url, "team data")
+        return self._make_request("entry", "team data", team_id=self.team_id)
 
     def get_team_history(self):
-        url = f"{self.base_url}entry/{self.team_id}/history/"
-        return self._make_request(url, "team history")
+        return self._make_request("entry_history", "team history", team_id=self.team_id)
 
-    def get_current_gameweek_picks(self):
-        bootstrap_url = f"{self.base_url}bootstrap-static/"
-        bootstrap_data = self._make_request(bootstrap_url, "bootstrap static data")
+    def get_bootstrap_data(self):
+        return self._make_request("bootstrap_static", "bootstrap static data")
+
+    def get_current_gameweek_picks(self, bootstrap_data=None):
+        if bootstrap_data is None:
+            bootstrap_data = self.get_bootstrap_data()
         if not bootstrap_data:
             return None
         
@@ -36,43 +53,275 @@ class TeamWatcher:
             print("No current gameweek found. The season might not have started or might be between gameweeks.")
             return None
 
-        url = f"{self.base_url}entry/{self.team_id}/event/{current_gameweek}/picks/"
-        return self._make_request(url, "current gameweek picks")
+        return self._make_request("entry_picks", "current gameweek picks", team_id=self.team_id, event_id=current_gameweek)
+
+    def get_all(self):
+        # Team data, history and bootstrap are independent, so fetch them concurrently
+        calls = [
+            ("entry", {"team_id": self.team_id}),
+            ("entry_history", {"team_id": self.team_id}),
+            ("bootstrap_static", {}),
+        ]
+        results = self.client.get_many(calls, return_exceptions=True)
+        team_data, team_history, bootstrap_data = (
+            self._handle_result(result, data_type)
+            for result, data_type in zip(results, ["team data", "team history", "bootstrap static data"])
+        )
+        return team_data, team_history, self.get_current_gameweek_picks(bootstrap_data)
 
-    def _make_request(self, url, data_type):
+    def _make_request(self, endpoint, data_type, **path_params):
         try:
-            response = requests.get(url)
-            response.raise_for_status()  # Raises an HTTPError for bad responses
-            return response.json()
-        except requests.exceptions.HTTPError as http_err:
-            if response.status_code == 404:
+            result = self.client.get(endpoint, **path_params)
+        except Exception as err:
+            result = err
+        return self._handle_result(result, data_type)
+
+    def _handle_result(self, result, data_type):
+        if isinstance(result, requests.exceptions.HTTPError):
+            if result.response is not None and result.response.status_code == 404:
                 print(f"Error 404: {data_type} not found. Please check if the team ID is correct.")
             else:
-                print(f"HTTP error occurred while fetching {data_type}: {http_err}")
-        except Exception as err:
-            print(f"An error occurred while fetching {data_type}: {err}")
+                print(f"HTTP error occurred while fetching {data_type}: {result}")
+        elif isinstance(result, Exception):
+            print(f"An error occurred while fetching {data_type}: {result}")
+        else:
+            return result
         return None
 
-def main():
-    watcher = TeamWatcher(TEAM_ID)
+class JSONLSink:
+    def __init__(self, path):
+        self.path = path
+
+    def write(self, events):
+        if not events:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, 'a') as f:
+            f.writelines(json.dumps(event) + '\n' for event in events)
+
+class SQLiteSink:
+    def __init__(self, path):
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS events (time TEXT, team_id INTEGER, type TEXT, payload TEXT)")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS events_team ON events (team_id, time)")
+
+    def write(self, events):
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO events VALUES (?, ?, ?, ?)",
+                [(event['time'], event['team_id'], event['type'], json.dumps(event)) for event in events]
+            )
+
+def open_sink(path):
+    if path.endswith(('.db', '.sqlite', '.sqlite3')):
+        return SQLiteSink(path)
+    return JSONLSink(path)
+
+class WatchState:
+    # Last seen values for every watched team as flat arrays (one row per team, 0 = not seen yet),
+    # plus the last bootstrap prices indexed by player id (NaN = unknown). Memory is a few dozen
+    # bytes per team; the file is an .npz rewritten after every poll.
+    def __init__(self, team_ids):
+        self.team_ids = np.asarray(team_ids, dtype=np.int64)
+        self.ranks = np.zeros(len(self.team_ids), dtype=np.int64)
+        self.points = np.zeros(len(self.team_ids), dtype=np.int64)
+        self.picks = np.zeros((len(self.team_ids), SQUAD_SIZE), dtype=np.int32)
+        self.captains = np.zeros(len(self.team_ids), dtype=np.int32)
+        self.picks_event = np.zeros(len(self.team_ids), dtype=np.int16)
+        self.prices = np.zeros(0, dtype=np.float32)
+        self.rank_cursor = 0
+
+    @classmethod
+    def load(cls, path, team_ids):
+        # Stored rows for teams still watched; teams added since start out unseen
+        state = cls(team_ids)
+        try:
+            with np.load(path) as data:
+                rows = pd.Index(data['team_ids']).get_indexer(state.team_ids)
+                found = rows >= 0
+                for name in ['ranks', 'points', 'picks', 'captains', 'picks_event']:
+                    getattr(state, name)[found] = data[name][rows[found]]
+                state.prices = data['prices']
+                state.rank_cursor = int(data['rank_cursor']) % max(len(state.team_ids), 1)
+        except (OSError, KeyError, ValueError):
+            pass
+        return state
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.tmp{os.getpid()}.npz"
+        np.savez(tmp_path, team_ids=self.team_ids, ranks=self.ranks, points=self.points, picks=self.picks,
+                 captains=self.captains, picks_event=self.picks_event, prices=self.prices,
+                 rank_cursor=self.rank_cursor)
+        os.replace(tmp_path, path)
+
+def parse_deadline(deadline_time):
+    return datetime.fromisoformat(deadline_time.replace('Z', '+00:00'))
+
+def poll_interval(events, now=None, fast=WATCH_FAST_INTERVAL, slow=WATCH_SLOW_INTERVAL, window=WATCH_FAST_WINDOW):
+    # Fast polling within `window` of any deadline (picks lock and become public there), slow
+    # otherwise, and never sleeping past the next deadline
+    now = now or datetime.now(timezone.utc)
+    offsets = [(parse_deadline(event['deadline_time']) - now).total_seconds()
+               for event in events if event.get('deadline_time')]
+    if any(abs(offset) < window for offset in offsets):
+        return fast
+    upcoming = [offset for offset in offsets if offset > 0]
+    return max(min([slow] + [offset - window for offset in upcoming]), fast)
+
+class TeamWatcherService:
+    # Polls many teams and emits only changes: overall rank moves, picks that differ from the
+    # team's previous gameweek, and price changes of players the team owns. Each poll makes one
+    # bootstrap request (response-cached) and at most batch_size rank and batch_size picks
+    # requests, walking the teams round-robin; picks are fetched once per team per gameweek.
+    def __init__(self, team_ids, sink, state_path=WATCH_STATE_FILE, batch_size=WATCH_BATCH_SIZE,
+                 max_workers=WATCH_MAX_WORKERS):
+        self.sink = sink
+        self.state_path = state_path
+        self.batch_size = batch_size
+        self.state = WatchState.load(state_path, team_ids)
+        # Team calls bypass the response cache: thousands of entries would only churn it
+        self.client = FPLClient(max_per_host=max_workers, use_cache=False)
+        self.watcher = TeamWatcher(None)
+        self.events = []
+
+    def event(self, row, kind, **fields):
+        return {'time': datetime.now().isoformat(timespec='seconds'), 'team_id': int(self.state.team_ids[row]),
+                'type': kind, **fields}
+
+    def fetch(self, rows, endpoint, **path_params):
+        calls = [(endpoint, {'team_id': int(team_id), **path_params}) for team_id in self.state.team_ids[rows]]
+        results = self.client.get_many(calls, return_exceptions=True)
+        failed = sum(isinstance(result, Exception) for result in results)
+        if failed:
+            logger.warning(f"{endpoint}: {failed} of {len(calls)} requests failed")
+        return [(row, result) for row, result in zip(rows, results) if not isinstance(result, Exception)]
+
+    def check_prices(self, elements):
+        ids = np.array([element['id'] for element in elements], dtype=np.int64)
+        prices = np.full(ids.max() + 1 if len(ids) else 0, np.nan, dtype=np.float32)
+        prices[ids] = [element['now_cost'] / 10 for element in elements]
+        old, self.state.prices = self.state.prices, prices
+        size = min(len(old), len(prices))
+        changed = np.flatnonzero(~np.isnan(old[:size]) & ~np.isnan(prices[:size]) & (old[:size] != prices[:size]))
+        if not len(changed):
+            return []
+        rows, slots = np.nonzero(np.isin(self.state.picks, changed))
+        return [
+            self.event(row, 'price', player=int(player), old=round(float(old[player]), 1),
+                       new=round(float(prices[player]), 1))
+            for row, player in zip(rows, self.state.picks[rows, slots])
+        ]
+
+    def check_picks(self, event_id):
+        rows = np.flatnonzero(self.state.picks_event != event_id)[:self.batch_size]
+        changes = []
+        for row, result in self.fetch(rows, 'entry_picks', event_id=event_id):
+            picks = np.zeros(SQUAD_SIZE, dtype=np.int32)
+            elements = [pick['element'] for pick in result['picks']][:SQUAD_SIZE]
+            picks[:len(elements)] = elements
+            captain = next((pick['element'] for pick in result['picks'] if pick.get('is_captain')), 0)
+            old, old_captain = self.state.picks[row].copy(), self.state.captains[row]
+            if self.state.picks_event[row]:
+                players_out = np.setdiff1d(old[old > 0], picks).tolist()
+                players_in = np.setdiff1d(picks[picks > 0], old).tolist()
+                if players_out or players_in or captain != old_captain:
+                    changes.append(self.event(row, 'picks', gameweek=event_id, out=players_out, **{'in': players_in},
+                                              captain=int(captain), previous_captain=int(old_captain)))
+            self.state.picks[row], self.state.captains[row] = picks, captain
+            self.state.picks_event[row] = event_id
+        return changes
+
+    def check_ranks(self):
+        count = len(self.state.team_ids)
+        rows = (self.state.rank_cursor + np.arange(min(self.batch_size, count))) % max(count, 1)
+        self.state.rank_cursor = int((self.state.rank_cursor + len(rows)) % max(count, 1))
+        changes = []
+        for row, result in self.fetch(rows, 'entry'):
+            rank = result.get('summary_overall_rank') or 0
+            points = result.get('summary_overall_points') or 0
+            if self.state.ranks[row] and rank and rank != self.state.ranks[row]:
+                changes.append(self.event(row, 'rank', old=int(self.state.ranks[row]), new=int(rank),
+                                          points=int(points)))
+            self.state.ranks[row], self.state.points[row] = rank, points
+        return changes
+
+    def poll(self):
+        # One polling round; returns the change events written to the sink and the next interval
+        bootstrap = self.watcher.get_bootstrap_data()
+        if not bootstrap:
+            return [], WATCH_FAST_INTERVAL
+        changes = self.check_prices(bootstrap['elements'])
+        current_event = next((event['id'] for event in bootstrap['events'] if event['is_current']), None)
+        if current_event:
+            changes += self.check_picks(current_event)
+        changes += self.check_ranks()
+        self.sink.write(changes)
+        self.state.save(self.state_path)
+        return changes, poll_interval(bootstrap['events'])
+
+    def run(self):
+        import schedule
+
+        def tick():
+            changes, interval = self.poll()
+            logger.info(f"{len(changes)} change events, next poll in {interval:.0f}s")
+            schedule.every(max(int(interval), 1)).seconds.do(tick)
+            return schedule.CancelJob
+
+        tick()
+        while True:
+            schedule.run_pending()
+            time.sleep(min(max(schedule.idle_seconds() or 0, 1), 60))
+
+def show_team(team_id=TEAM_ID):
+    watcher = TeamWatcher(team_id)
     
-    team_data = watcher.get_team_data()
+    team_data, team_history, current_picks = watcher.get_all()
     if team_data:
         print(f"Team name: {team_data['name']}")
         print(f"Overall rank: {team_data['summary_overall_rank']}")
         print(f"Total points: {team_data['summary_overall_points']}")
 
-    team_history = watcher.get_team_history()
     if team_history:
         print("\nSeason History:")
         for season in team_history['past']:
             print(f"Season {season['season_name']}: Rank {season['rank']}, Points {season['total_points']}")
 
-    current_picks = watcher.get_current_gameweek_picks()
     if current_picks:
         print("\nCurrent Gameweek Picks:")
         for pick in current_picks['picks']:
             print(f"Player ID: {pick['element']}, Position: {pick['position']}")
 
+def main():
+    parser = argparse.ArgumentParser(description="Show one team, or watch many teams for changes")
+    subparsers = parser.add_subparsers(dest='command')
+    watch_parser = subparsers.add_parser('watch', help="Poll teams on a schedule and emit change events")
+    watch_parser.add_argument('team_ids', nargs='*', type=int, help="Team IDs to watch")
+    watch_parser.add_argument('--teams-file', help="File with team IDs (whitespace, comma or newline separated)")
+    watch_parser.add_argument('--events', default=WATCH_EVENTS_PATH, help="Event sink (.jsonl or .db/.sqlite)")
+    watch_parser.add_argument('--state', default=WATCH_STATE_FILE, help="Where the last seen values are kept")
+    watch_parser.add_argument('--batch-size', type=int, default=WATCH_BATCH_SIZE,
+                              help="Rank and picks requests per poll")
+    watch_parser.add_argument('--once', action='store_true', help="Poll once and exit")
+    args = parser.parse_args()
+
+    if args.command != 'watch':
+        show_team()
+        return
+
+    from transfer_batch_recommender import read_team_ids
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    team_ids = read_team_ids(args.team_ids, args.teams_file) or [TEAM_ID]
+    service = TeamWatcherService(team_ids, open_sink(args.events), args.state, args.batch_size)
+    logger.info(f"Watching {len(team_ids)} teams, events to {args.events}")
+    if args.once:
+        changes, interval = service.poll()
+        logger.info(f"{len(changes)} change events, next poll due in {interval:.0f}s")
+        return
+    service.run()
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,118 @@
+# script/transfer_batch_recommender.py
+
+import argparse
+import os
+import sys
+from datetime import datetime
+
+import pandas as pd
+import requests
+
+# Add the parent directory to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from config.transfer_recommender_config import (
+    BATCH_MAX_WORKERS, BATCH_OUTPUT_PATH, TOP_RECOMMENDATIONS
+)
+from fpl_client import FPLClient
+from transfer_recommender import TransferRecommender, calculate_player_scores, rank_transfers
+
+OUTPUT_COLUMNS = ['team_id', 'rank', 'out', 'in', 'score_improvement']
+
+def read_team_ids(team_ids=None, teams_file=None):
+    ids = list(team_ids or [])
+    if teams_file:
+        with open(teams_file) as f:
+            for line in f:
+                line = line.split('#', 1)[0].strip()
+                ids.extend(int(token) for token in line.replace(',', ' ').split())
+    # Keep first occurrence order, drop duplicates
+    return list(dict.fromkeys(ids))
+
+def write_table(df, output_path):
+    if output_path.endswith('.parquet'):
+        df.to_parquet(output_path, index=False)
+    elif output_path.endswith('.jsonl'):
+        df.to_json(output_path, orient='records', lines=True)
+    else:
+        df.to_csv(output_path, index=False)
+
+class BatchTransferRecommender:
+    def __init__(self, team_ids, max_workers=BATCH_MAX_WORKERS):
+        self.team_ids = team_ids
+        self.max_workers = max_workers
+        # One shared recommender holds the player frame, FDR columns and current event
+        self.client = FPLClient(max_per_host=max_workers)
+        self.recommender = TransferRecommender(None, client=self.client)
+        self.scores = None
+        self.failed_team_ids = []
+
+    def load_shared_data(self):
+        try:
+            self.recommender.load_player_data(datetime.now().strftime("%Y%m%d"))
+            if not self.recommender.fetch_current_event():
+                print("No current or upcoming gameweek found. The season might be over or hasn't started yet.")
+                sys.exit(1)
+        except FileNotFoundError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        except requests.exceptions.RequestException as e:
+            print(f"Error fetching data: {e}")
+            sys.exit(1)
+
+        self.scores = calculate_player_scores(self.recommender.player_data)
+
+    def fetch_all_picks(self):
+        event_id = self.recommender.current_event['id']
+        calls = [('entry_picks', {'team_id': team_id, 'event_id': event_id}) for team_id in self.team_ids]
+        all_picks = {}
+        for team_id, team_picks in zip(self.team_ids, self.client.get_many(calls, return_exceptions=True)):
+            if isinstance(team_picks, Exception):
+                print(f"Unable to fetch picks for team {team_id}: {team_picks}")
+                team_picks = None
+            all_picks[team_id] = team_picks
+        return all_picks
+
+    def recommend_for_team(self, team_id, team_picks):
+        current_squad = [pick['element'] for pick in team_picks['picks']]
+        recommendations = rank_transfers(self.recommender.player_data, self.scores, current_squad)
+        return [{'team_id': team_id, 'rank': i, **rec} for i, rec in enumerate(recommendations, 1)]
+
+    def run(self):
+        self.load_shared_data()
+        print(f"Gameweek: {self.recommender.current_event['name']}")
+        print(f"Fetching picks for {len(self.team_ids)} teams with {self.max_workers} workers...")
+
+        rows = []
+        for team_id, team_picks in self.fetch_all_picks().items():
+            if not team_picks or 'picks' not in team_picks:
+                self.failed_team_ids.append(team_id)
+                continue
+            rows.extend(self.recommend_for_team(team_id, team_picks))
+
+        if self.failed_team_ids:
+            print(f"No picks available for {len(self.failed_team_ids)} teams: {self.failed_team_ids}")
+        return pd.DataFrame(rows, columns=OUTPUT_COLUMNS)
+
+def main():
+    parser = argparse.ArgumentParser(description="Transfer recommendations for many teams in one run")
+    parser.add_argument('team_ids', nargs='*', type=int, help="Team IDs to process")
+    parser.add_argument('--teams-file', help="File with team IDs (whitespace, comma or newline separated)")
+    parser.add_argument('--output', default=BATCH_OUTPUT_PATH.format(datetime.now().strftime("%Y%m%d")),
+                        help="Output path; format is chosen by extension (.csv, .jsonl, .parquet)")
+    parser.add_argument('--workers', type=int, default=BATCH_MAX_WORKERS, help="Concurrent picks requests")
+    args = parser.parse_args()
+
+    team_ids = read_team_ids(args.team_ids, args.teams_file)
+    if not team_ids:
+        parser.error("no team IDs given")
+
+    batch = BatchTransferRecommender(team_ids, max_workers=args.workers)
+    recommendations = batch.run()
+    write_table(recommendations, args.output)
+    print(f"Saved {len(recommendations)} recommendations (top {TOP_RECOMMENDATIONS} per team) to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+# script/transfer_planner.py
+
+import argparse
+import itertools
+import os
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# Add the parent directory to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from config.transfer_recommender_config import (
+    TEAM_ID, FUTURE_FIXTURES, MAX_PER_CLUB, XI_SIZE, XI_MIN_PLAYERS,
+    FREE_TRANSFERS, MAX_FREE_TRANSFERS, TRANSFER_HIT_COST, MAX_TRANSFERS_PER_WEEK,
+    PLANNER_BEAM_WIDTH, PLANNER_MOVES, PLANNER_TIME_BUDGET, PLANNER_OUTPUT_PATH,
+    BATCH_MAX_WORKERS
+)
+from squad_optimizer import SquadOptimizer, to_tenths
+from transfer_batch_recommender import BatchTransferRecommender, read_team_ids, write_table
+from transfer_recommender import calculate_player_scores
+
+OUTPUT_COLUMNS = ['team_id', 'gameweek', 'out', 'in', 'hit', 'expected_score']
+
+def gameweek_scores(player_data, teams, gameweek, horizon):
+    # (players x horizon) matrix of calculate_player_scores with each gameweek's own difficulty,
+    # times the fixtures played that week: blank gameweeks score 0, double gameweeks twice
+    columns = []
+    for week in range(gameweek, gameweek + horizon):
+        fdr = teams.fdr(player_data['team'], week, 1)
+        counts = teams.fixture_counts(player_data['team'], week, 1)
+        scores = calculate_player_scores(player_data.assign(avg_fdr=fdr))
+        columns.append(np.where(counts > 0, scores * counts, 0.0))
+    return np.nan_to_num(np.column_stack(columns)) if columns else np.zeros((len(player_data), 0))
+
+def selling_prices(now_costs, purchase_costs):
+    # Prices in tenths: a rise is shared half-and-half (rounded down), a fall is passed on in full
+    now_costs, purchase_costs = np.asarray(now_costs), np.asarray(purchase_costs)
+    return np.where(now_costs > purchase_costs, purchase_costs + (now_costs - purchase_costs) // 2, now_costs)
+
+class TransferPlanner:
+    # Weekly transfers over the next `horizon` gameweeks for any number of squads. The per-player,
+    # per-gameweek score matrix, its suffix sums and each week's candidate pool are computed once
+    # and shared by every plan. A plan is a beam search over weeks: each state rolls its free
+    # transfer or makes 1..MAX_TRANSFERS_PER_WEEK moves built from its best single swaps, and is
+    # ranked by the points banked so far plus what its squad scores if it is kept to the end.
+    def __init__(self, player_data, teams, gameweek, horizon=FUTURE_FIXTURES, beam_width=PLANNER_BEAM_WIDTH,
+                 moves=PLANNER_MOVES, max_transfers=MAX_TRANSFERS_PER_WEEK, hit_cost=TRANSFER_HIT_COST):
+        player_data = player_data.reset_index(drop=True)
+        self.gameweek = gameweek
+        self.horizon = horizon
+        self.beam_width = beam_width
+        self.moves = moves
+        self.max_transfers = max_transfers
+        self.hit_cost = hit_cost
+        self.ids = pd.Index(player_data['id'].to_numpy())
+        self.names = player_data['web_name'].to_numpy()
+        self.positions = player_data['element_type'].to_numpy(dtype=np.int64)
+        self.clubs = player_data['team'].to_numpy(dtype=np.int64)
+        self.now_costs = player_data['now_cost'].to_numpy(dtype=float)
+        self.costs = to_tenths(self.now_costs)
+        self.scores = gameweek_scores(player_data, teams, gameweek, horizon)
+        # suffix[:, w] is a player's score from week w to the end of the horizon
+        self.suffix = np.zeros((len(player_data), horizon + 1))
+        self.suffix[:, :horizon] = np.cumsum(self.scores[:, ::-1], axis=1)[:, ::-1]
+        self.pools = {}
+        self.club_ids, self.club_codes = np.unique(self.clubs, return_inverse=True)
+
+    def pool(self, week):
+        # Players worth buying from `week` on: those that survive the squad optimizer's dominance pruning
+        if week not in self.pools:
+            self.pools[week] = SquadOptimizer(self.positions, self.clubs, self.now_costs, self.suffix[:, week]).prune()
+        return self.pools[week]
+
+    def xi_scores(self, squads):
+        # (squads x horizon) starting XI score per week: one goalkeeper, the XI_MIN_PLAYERS floor
+        # per outfield position, then the best remaining outfielders. Squads are rows of player
+        # indices in a fixed position order, so every squad shares the same slot layout.
+        values = self.scores[squads]
+        slots = self.positions[squads[0]]
+        total = np.zeros((len(squads), self.horizon))
+        rest = []
+        for position, minimum in XI_MIN_PLAYERS.items():
+            ranked = -np.sort(-values[:, slots == position], axis=1)
+            total += ranked[:, :minimum].sum(axis=1)
+            if position != 1:
+                rest.append(ranked[:, minimum:])
+        rest = -np.sort(-np.concatenate(rest, axis=1), axis=1)
+        return total + rest[:, :XI_SIZE - sum(XI_MIN_PLAYERS.values())].sum(axis=1)
+
+    def single_moves(self, week, squad, sell, bank):
+        # Best affordable, club-legal swaps (slot, incoming player) ranked by score gain to the horizon
+        candidates = np.setdiff1d(self.pool(week), squad)
+        club_counts = np.bincount(self.club_codes[squad], minlength=len(self.club_ids))
+        gain = self.suffix[candidates, week][None, :] - self.suffix[squad, week][:, None]
+        legal = (self.positions[candidates][None, :] == self.positions[squad][:, None]) & \
+                (self.costs[candidates][None, :] <= bank + sell[:, None]) & \
+                ((club_counts[self.club_codes[candidates]] < MAX_PER_CLUB)[None, :] |
+                 (self.clubs[candidates][None, :] == self.clubs[squad][:, None])) & \
+                (gain > 0)
+        slots, columns = np.nonzero(legal)
+        order = np.argsort(-gain[slots, columns], kind='stable')[:self.moves]
+        return slots[order], candidates[columns[order]]
+
+    def expand(self, week, state):
+        # Every child of `state` for this week: roll, then each legal 1..max_transfers combination
+        banked, squad, sell, bank, free, history = state
+        slots, incoming = self.single_moves(week, squad, sell, bank)
+        club_counts = np.bincount(self.club_codes[squad], minlength=len(self.club_ids))
+
+        children = [(squad, sell, bank, ())]
+        for count in range(1, min(self.max_transfers, len(slots)) + 1):
+            for combo in itertools.combinations(range(len(slots)), count):
+                combo = list(combo)
+                out_slots, ins = slots[combo], incoming[combo]
+                if len(set(out_slots.tolist())) < count or len(set(ins.tolist())) < count:
+                    continue
+                new_bank = bank + sell[out_slots].sum() - self.costs[ins].sum()
+                if new_bank < 0:
+                    continue
+                counts = club_counts - np.bincount(self.club_codes[squad[out_slots]], minlength=len(club_counts)) + \
+                         np.bincount(self.club_codes[ins], minlength=len(club_counts))
+                if counts.max() > MAX_PER_CLUB:
+                    continue
+                new_squad, new_sell = squad.copy(), sell.copy()
+                new_squad[out_slots], new_sell[out_slots] = ins, self.costs[ins]
+                children.append((new_squad, new_sell, new_bank, tuple(zip(squad[out_slots].tolist(), ins.tolist()))))
+
+        xi = self.xi_scores(np.array([child[0] for child in children]))
+        expanded = []
+        for (new_squad, new_sell, new_bank, moves), weekly in zip(children, xi):
+            hit = max(len(moves) - free, 0) * self.hit_cost
+            new_free = min(max(free - len(moves), 0) + 1, MAX_FREE_TRANSFERS)
+            new_banked = banked - hit + weekly[week]
+            value = banked - hit + weekly[week:].sum()
+            expanded.append((value, (new_banked, new_squad, new_sell, new_bank, new_free, history + (moves,))))
+        return expanded
+
+    def search(self, squad, sell, bank, free, deadline):
+        # Returns the best state and whether every week was searched before the deadline
+        start = (0.0, squad, sell, bank, free, ())
+        beam = [(self.xi_scores(squad[None, :])[0].sum(), start)]
+        for week in range(self.horizon):
+            expanded = {}
+            for _, state in beam:
+                if time.perf_counter() > deadline:
+                    # Out of time: unfinished plans keep their squads for the remaining weeks
+                    candidates = list(expanded.values()) + beam
+                    return max(candidates, key=lambda item: item[0])[1], False
+                for value, child in self.expand(week, state):
+                    key = (tuple(np.sort(child[1]).tolist()), child[3], child[4])
+                    if key not in expanded or value > expanded[key][0]:
+                        expanded[key] = (value, child)
+            beam = sorted(expanded.values(), key=lambda item: item[0], reverse=True)[:self.beam_width]
+        return beam[0][1], True
+
+    def plan(self, squad_ids, bank=0.0, free_transfers=FREE_TRANSFERS, purchase_prices=None,
+             time_budget=PLANNER_TIME_BUDGET):
+        # Week-by-week transfers for one squad. `bank` and `purchase_prices` (player id -> price) are in £m;
+        # players without a purchase price are valued at their current price.
+        deadline = time.perf_counter() + time_budget
+        rows = self.ids.get_indexer(squad_ids)
+        if (rows < 0).any():
+            raise KeyError(f"Players not in the snapshot: {list(np.asarray(squad_ids)[rows < 0])}")
+        rows = rows[np.argsort(self.positions[rows], kind='stable')]
+        purchase_prices = purchase_prices or {}
+        purchase = to_tenths([purchase_prices.get(self.ids[row], self.now_costs[row]) for row in rows])
+        sell = selling_prices(self.costs[rows], purchase)
+
+        state, complete = self.search(rows, sell, int(to_tenths(bank)), free_transfers, deadline)
+        history = state[5]
+
+        weeks, squad, free = [], rows.copy(), free_transfers
+        for week in range(self.horizon):
+            moves = history[week] if week < len(history) else ()
+            for out_row, in_row in moves:
+                squad[squad == out_row] = in_row
+            hit = max(len(moves) - free, 0) * self.hit_cost
+            free = min(max(free - len(moves), 0) + 1, MAX_FREE_TRANSFERS)
+            weeks.append({
+                'gameweek': self.gameweek + week,
+                'transfers': [(self.names[out_row], self.names[in_row]) for out_row, in_row in moves],
+                'hit': hit,
+                'expected_score': float(self.xi_scores(squad[None, :])[0, week])
+            })
+        return {
+            'weeks': weeks,
+            'expected_score': sum(week['expected_score'] - week['hit'] for week in weeks),
+            'baseline_score': float(self.xi_scores(rows[None, :])[0].sum()),
+            'complete': complete
+        }
+
+def plan_rows(team_id, plan):
+    rows = []
+    for week in plan['weeks']:
+        for player_out, player_in in week['transfers'] or [(None, None)]:
+            rows.append({'team_id': team_id, 'gameweek': week['gameweek'], 'out': player_out, 'in': player_in,
+                         'hit': week['hit'], 'expected_score': week['expected_score']})
+    return rows
+
+def print_plan(team_id, plan):
+    print(f"Team {team_id}: expected score {plan['expected_score']:.2f} "
+          f"(no transfers: {plan['baseline_score']:.2f}){'' if plan['complete'] else ' [time budget reached]'}")
+    for week in plan['weeks']:
+        moves = ', '.join(f"{player_out} -> {player_in}" for player_out, player_in in week['transfers']) or 'roll'
+        hit = f" (-{week['hit']})" if week['hit'] else ''
+        print(f"  GW{week['gameweek']}: {moves}{hit}, XI score {week['expected_score']:.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Plan transfers over the next gameweeks for one or more teams")
+    parser.add_argument('team_ids', nargs='*', type=int, help=f"Team IDs to plan for (default {TEAM_ID})")
+    parser.add_argument('--teams-file', help="File with team IDs (whitespace, comma or newline separated)")
+    parser.add_argument('--horizon', type=int, default=FUTURE_FIXTURES, help="Gameweeks to plan over")
+    parser.add_argument('--free-transfers', type=int, default=FREE_TRANSFERS, help="Free transfers available now")
+    parser.add_argument('--time-budget', type=float, default=PLANNER_TIME_BUDGET, help="Seconds per plan")
+    parser.add_argument('--output', nargs='?', const=PLANNER_OUTPUT_PATH.format(datetime.now().strftime("%Y%m%d")),
+                        help="Also save all plans; format is chosen by extension (.csv, .jsonl, .parquet)")
+    parser.add_argument('--workers', type=int, default=BATCH_MAX_WORKERS, help="Concurrent picks requests")
+    args = parser.parse_args()
+
+    team_ids = read_team_ids(args.team_ids, args.teams_file) or [TEAM_ID]
+    batch = BatchTransferRecommender(team_ids, max_workers=args.workers)
+    batch.load_shared_data()
+    event = batch.recommender.current_event
+    # Transfers made now take effect from the next deadline
+    gameweek = event['id'] + 1 if event['is_current'] else event['id']
+
+    start = time.perf_counter()
+    planner = TransferPlanner(batch.recommender.player_data, batch.recommender.teams, gameweek, args.horizon)
+    print(f"Planning GW{gameweek}-GW{gameweek + args.horizon - 1} "
+          f"(scores built in {time.perf_counter() - start:.3f}s)")
+
+    rows = []
+    for team_id, team_picks in batch.fetch_all_picks().items():
+        if not team_picks or 'picks' not in team_picks:
+            print(f"Team {team_id}: no picks available")
+            continue
+        purchase_prices = {pick['element']: pick['purchase_price'] / 10
+                           for pick in team_picks['picks'] if 'purchase_price' in pick}
+        bank = team_picks.get('entry_history', {}).get('bank', 0) / 10
+        try:
+            plan = planner.plan([pick['element'] for pick in team_picks['picks']], bank, args.free_transfers,
+                                purchase_prices, args.time_budget)
+        except KeyError as e:
+            print(f"Team {team_id}: {e}")
+            continue
+        print_plan(team_id, plan)
+        rows.extend(plan_rows(team_id, plan))
+
+    if args.output:
+        write_table(pd.DataFrame(rows, columns=OUTPUT_COLUMNS), args.output)
+        print(f"Saved {len(rows)} planned weeks to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,5 @@
 # script/transfer_preseason_recommender.py
 
-import pandas as pd
-import numpy as np
 import sys
 from datetime import datetime
 import os
@@ -12,57 +10,67 @@ parent_dir = os.path.dirname(current_dir)
 sys.path.append(parent_dir)
 
 from config.transfer_recommender_config import (
-    DATA_SOURCE_PATH, TEAM_ID, POSITION_MAP, MAX_PRICES,
+    TEAM_ID, POSITION_MAP, MAX_PRICES,
     TOP_N_PLAYERS, DISPLAY_COLUMNS, FUTURE_FIXTURES
 )
-from config.analyzer_config import FIXTURE_DIFFICULTY
+from instrumentation import count, instrumented
+from snapshot_store import SnapshotStore
+from team_registry import get_team_registry
+
+SNAPSHOT_COLUMNS = ['id', 'web_name', 'team', 'element_type', 'now_cost', 'total_points', 'points_per_game']
+
+def preseason_values(total_points, now_cost, avg_fdr):
+    # Points per £m, and that value scaled by fixture ease (lower FDR is better)
+    value = total_points / now_cost
+    return value, value * (6 - avg_fdr)
+
+def affordable(now_cost, max_price):
+    # Snapshots store now_cost in £m, the unit MAX_PRICES is given in
+    return now_cost <= max_price
 
 class TransferPreseasonRecommender:
-    def __init__(self, team_id):
+    def __init__(self, team_id, data=None):
+        # `data` is an already loaded snapshot with at least SNAPSHOT_COLUMNS
         self.team_id = team_id
-        self.data = self.load_data()
-        self.team_id_to_name = self.create_team_mapping()
+        self.data = self.load_data() if data is None else data
+        self.teams = get_team_registry()
         self.add_fdr_data()
 
+    @instrumented('preseason.load')
     def load_data(self):
         try:
-            file_path = DATA_SOURCE_PATH.format(datetime.now().strftime("%Y%m%d"))
-            data = pd.read_csv(file_path)
-            return data
-        except FileNotFoundError:
-            print(f"Error: Data file not found at {file_path}")
+            return SnapshotStore().load(datetime.now().strftime("%Y%m%d"), columns=SNAPSHOT_COLUMNS)
+        except FileNotFoundError as e:
+            print(f"Error: {e}")
             sys.exit(1)
         except Exception as e:
             print(f"Error loading data: {e}")
             sys.exit(1)
 
-    def create_team_mapping(self):
-        unique_teams = self.data['team'].unique()
-        team_names = list(FIXTURE_DIFFICULTY.keys())
-        return dict(zip(unique_teams, team_names))
-
+    @instrumented('preseason.fdr')
     def add_fdr_data(self):
-        fdr_data = {}
-        for team_id, team_name in self.team_id_to_name.items():
-            if team_name in FIXTURE_DIFFICULTY:
-                fdr_data[team_id] = np.mean(FIXTURE_DIFFICULTY[team_name][:FUTURE_FIXTURES])
+        self.data['team_name'] = self.teams.names_of(self.data['team'])
+        self.data['avg_fdr'] = self.teams.fdr(self.data['team'], 1, FUTURE_FIXTURES)
 
-        self.data['avg_fdr'] = self.data['team'].map(fdr_data)
-        self.data['team_name'] = self.data['team'].map(self.team_id_to_name)
+    @instrumented('preseason.score')
+    def player_values(self):
+        players = self.data.copy()
+        count('rows_scored', len(players))
+        players['value'], players['adjusted_value'] = preseason_values(
+            players['total_points'], players['now_cost'], players['avg_fdr'])
+        return players
 
-    def get_player_recommendations(self, position, max_price):
-        position_players = self.data[
-            (self.data['element_type'] == position) &
-            (self.data['now_cost'] <= max_price * 10)
-        ].copy()
+    def recommendations(self, position, max_price, players=None):
+        players = self.player_values() if players is None else players
+        position_players = players[
+            (players['element_type'] == position) &
+            affordable(players['now_cost'], max_price)
+        ]
+        return position_players.nlargest(TOP_N_PLAYERS, 'adjusted_value')
 
-        position_players['now_cost'] = position_players['now_cost'] / 10
-        position_players['value'] = position_players['total_points'] / position_players['now_cost']
-        
-        # Adjust value based on FDR (lower FDR is better)
-        position_players['adjusted_value'] = position_players['value'] * (6 - position_players['avg_fdr'])
-        
-        top_players = position_players.nlargest(TOP_N_PLAYERS, 'adjusted_value')
+    @instrumented('preseason.report')
+    def get_player_recommendations(self, position, max_price):
+        top_players = self.recommendations(position, max_price)
         
         display_cols = DISPLAY_COLUMNS.copy()
         display_cols[display_cols.index('team')] = 'team_name'  # Replace 'team' with 'team_name' in display
@@ -1,5 +1,6 @@
 # script/transfer_recommender.py
 
+import numpy as np
 import pandas as pd
 import requests
 import sys
@@ -12,98 +13,191 @@ parent_dir = os.path.dirname(current_dir)
 sys.path.append(parent_dir)
 
 from config.transfer_recommender_config import (
-    DATA_SOURCE_PATH, TEAM_ID, BASE_URL, FUTURE_FIXTURES,
-    MAX_PRICE_INCREASE, TOP_RECOMMENDATIONS, DISPLAY_COLUMNS_2
+    TEAM_ID, FUTURE_FIXTURES,
+    MAX_PRICE_INCREASE, TOP_RECOMMENDATIONS, DISPLAY_COLUMNS_2,
+    VECTORIZED_SCORING, SCORE_WEIGHTS
 )
-from config.analyzer_config import FIXTURE_DIFFICULTY
+from fpl_client import get_client
+from instrumentation import count, instrumented
+from snapshot_store import SnapshotStore
+from team_registry import get_team_registry
+
+SNAPSHOT_COLUMNS = ['id', 'web_name', 'team', 'element_type', 'now_cost', 'total_points', 'points_per_game', 'form']
+
+def player_scores(form, now_cost, avg_fdr, weights=SCORE_WEIGHTS):
+    # calculate_player_score over arrays: form, price (£m, as snapshots store now_cost) and
+    # fixture ease weighted by `weights`
+    price = np.asarray(now_cost, dtype=float)
+    return weights['form'] * np.asarray(form, dtype=float) - weights['price'] * price + \
+        weights['fixtures'] * (5 - np.asarray(avg_fdr, dtype=float))
+
+def calculate_player_scores(player_data, weights=SCORE_WEIGHTS):
+    # Vectorized equivalent of TransferRecommender.calculate_player_score
+    form = player_data['form']
+    if not pd.api.types.is_numeric_dtype(form):
+        form = form.replace('', 0)
+    return player_scores(form.astype(float).to_numpy(), player_data['now_cost'].to_numpy(dtype=float),
+                         player_data['avg_fdr'].to_numpy(dtype=float), weights)
+
+def rank_transfer_rows(ids, costs, positions, scores, current_squad, max_price_increase=MAX_PRICE_INCREASE,
+                       top_n=TOP_RECOMMENDATIONS):
+    # (out rows, in rows, score improvements) of the best top_n same-position swaps, best first
+    in_squad = np.isin(ids, current_squad)
+
+    out_rows, in_rows, improvements = [], [], []
+    for position in range(1, 5):  # GK, DEF, MID, FWD
+        candidates = np.flatnonzero(positions == position)
+        squad = candidates[in_squad[candidates]]
+        if len(squad) == 0:
+            continue
+
+        # (squad x candidates) improvement matrix, masked by price and identity
+        improvement = scores[candidates][None, :] - scores[squad][:, None]
+        mask = (costs[candidates][None, :] <= costs[squad][:, None] + max_price_increase) & \
+               (ids[candidates][None, :] != ids[squad][:, None]) & \
+               (improvement > 0)
+        squad_idx, candidate_idx = np.nonzero(mask)
+        out_rows.append(squad[squad_idx])
+        in_rows.append(candidates[candidate_idx])
+        improvements.append(improvement[squad_idx, candidate_idx])
+
+    if not improvements:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, np.empty(0)
+    out_rows = np.concatenate(out_rows)
+    in_rows = np.concatenate(in_rows)
+    improvements = np.concatenate(improvements)
+
+    # Partial sort: keep everything at or above the k-th best value, in scan order,
+    # then a stable sort matches sorted(..., reverse=True) tie-breaking exactly
+    if len(improvements) > top_n:
+        kth = np.partition(improvements, len(improvements) - top_n)[len(improvements) - top_n]
+        keep = np.flatnonzero(improvements >= kth)
+    else:
+        keep = np.arange(len(improvements))
+    order = keep[np.argsort(-improvements[keep], kind='stable')][:top_n]
+    return out_rows[order], in_rows[order], improvements[order]
+
+def rank_transfers(player_data, scores, current_squad, max_price_increase=MAX_PRICE_INCREASE, top_n=TOP_RECOMMENDATIONS):
+    names = player_data['web_name'].to_numpy()
+    out_rows, in_rows, improvements = rank_transfer_rows(
+        player_data['id'].to_numpy(), player_data['now_cost'].to_numpy(dtype=float),
+        player_data['element_type'].to_numpy(), scores, current_squad, max_price_increase, top_n
+    )
+    return [{
+        'out': names[out_row],
+        'in': names[in_row],
+        'score_improvement': float(improvement)
+    } for out_row, in_row, improvement in zip(out_rows, in_rows, improvements)]
 
 class TransferRecommender:
-    def __init__(self, team_id):
+    def __init__(self, team_id, vectorized=VECTORIZED_SCORING, client=None):
         self.team_id = team_id
-        self.base_url = BASE_URL
+        self.vectorized = vectorized
+        self.client = client or get_client()
         self.player_data = None
         self.team_data = None
         self.fixtures = None
         self.current_event = None
-        self.team_id_to_name = None
+        self.teams = get_team_registry()
 
-    def fetch_data(self):
+    @instrumented('recommend.fetch')
+    def fetch_data(self, events=None):
         try:
-            # Load player data from local CSV
-            file_path = DATA_SOURCE_PATH.format(datetime.now().strftime("%Y%m%d"))
-            self.player_data = pd.read_csv(file_path)
+            # Load player data from the local snapshot store unless a caller already set it
+            if self.player_data is None:
+                self.load_player_data(datetime.now().strftime("%Y%m%d"))
             
-            # Create team ID to name mapping
-            self.team_id_to_name = dict(zip(self.player_data['team'].unique(), FIXTURE_DIFFICULTY.keys()))
-            
-            # Fetch team data
-            r = requests.get(f"{self.base_url}entry/{self.team_id}/")
-            r.raise_for_status()
-            self.team_data = r.json()
-            
-            # Fetch bootstrap-static for events data
-            r = requests.get(f"{self.base_url}bootstrap-static/")
-            r.raise_for_status()
-            events = r.json()['events']
-            
-            # Determine current or next event
-            self.current_event = next((event for event in events if event['is_current']), None)
-            if not self.current_event:
-                self.current_event = next((event for event in events if event['is_next']), None)
+            if events is None:
+                # Fetch team data and bootstrap-static (for events data) concurrently
+                self.team_data, bootstrap_data = self.client.get_many([
+                    ('entry', {'team_id': self.team_id}),
+                    ('bootstrap_static', {}),
+                ])
+                events = bootstrap_data['events']
+            else:
+                self.team_data = self.client.get('entry', team_id=self.team_id)
+            self.select_current_event(events)
             
             if self.current_event:
-                # Fetch picks for the current or next gameweek
-                try:
-                    r = requests.get(f"{self.base_url}entry/{self.team_id}/event/{self.current_event['id']}/picks/")
-                    r.raise_for_status()
-                    self.team_picks = r.json()
-                except requests.exceptions.RequestException:
-                    print("Unable to fetch team picks. The season might not have started yet.")
-                    self.team_picks = None
+                self.team_picks = self.fetch_team_picks(self.team_id)
             else:
                 print("No current or upcoming gameweek found. The season might be over or hasn't started yet.")
                 self.team_picks = None
             
-            # Add FDR data to player_data
-            self.add_fdr_data()
-            
         except requests.exceptions.RequestException as e:
             print(f"Error fetching data: {e}")
             sys.exit(1)
-        except FileNotFoundError:
-            print(f"Error: Data file not found at {file_path}")
+        except FileNotFoundError as e:
+            print(f"Error: {e}")
             sys.exit(1)
         except Exception as e:
             print(f"Error loading data: {e}")
             sys.exit(1)
 
-    def add_fdr_data(self):
-        fdr_data = {}
-        for team_id, team_name in self.team_id_to_name.items():
-            if team_name in FIXTURE_DIFFICULTY:
-                fdr_data[team_id] = sum(FIXTURE_DIFFICULTY[team_name][:FUTURE_FIXTURES]) / FUTURE_FIXTURES
+    @instrumented('recommend.load')
+    def load_player_data(self, date):
+        self.player_data = SnapshotStore().load(date, columns=SNAPSHOT_COLUMNS)
+        
+        # Add FDR data to player_data
+        self.add_fdr_data()
+
+    def fetch_current_event(self):
+        return self.select_current_event(self.client.get('bootstrap_static')['events'])
+
+    def select_current_event(self, events):
+        self.current_event = next((event for event in events if event['is_current']), None)
+        if not self.current_event:
+            self.current_event = next((event for event in events if event['is_next']), None)
+        if self.current_event and self.player_data is not None:
+            # Fixture difficulty from the gameweek being planned rather than the start of the season
+            self.add_fdr_data(self.current_event['id'])
+        return self.current_event
+
+    def fetch_team_picks(self, team_id):
+        # Fetch picks for the current or next gameweek
+        try:
+            return self.client.get('entry_picks', team_id=team_id, event_id=self.current_event['id'])
+        except requests.exceptions.RequestException:
+            print(f"Unable to fetch picks for team {team_id}. The season might not have started yet.")
+            return None
 
-        self.player_data['avg_fdr'] = self.player_data['team'].map(fdr_data)
+    @instrumented('recommend.fdr')
+    def add_fdr_data(self, gameweek=1):
+        self.player_data['avg_fdr'] = self.teams.fdr(self.player_data['team'], gameweek, FUTURE_FIXTURES)
 
     def calculate_player_score(self, player):
         form = float(player['form']) if player['form'] != '' else 0
-        price = player['now_cost'] / 10
+        price = player['now_cost']
         fixture_difficulty = player['avg_fdr']
         
-        score = form * 10 - price + (5 - fixture_difficulty)
+        score = SCORE_WEIGHTS['form'] * form - SCORE_WEIGHTS['price'] * price + \
+            SCORE_WEIGHTS['fixtures'] * (5 - fixture_difficulty)
         return score
 
+    @instrumented('recommend.top_players')
     def get_top_players(self):
-        self.player_data['score'] = self.player_data.apply(self.calculate_player_score, axis=1)
+        if self.vectorized:
+            self.player_data['score'] = calculate_player_scores(self.player_data)
+        else:
+            self.player_data['score'] = self.player_data.apply(self.calculate_player_score, axis=1)
         top_players = self.player_data.nlargest(TOP_RECOMMENDATIONS, 'score')
         return top_players[DISPLAY_COLUMNS_2 + ['score', 'avg_fdr']]
 
+    @instrumented('recommend.score')
     def recommend_transfers(self):
         if not self.team_picks or 'picks' not in self.team_picks:
             print("Unable to recommend transfers: No team picks available.")
             return []
+        count('rows_scored', len(self.player_data))
 
         current_squad = [pick['element'] for pick in self.team_picks['picks']]
+        if self.vectorized:
+            return rank_transfers(self.player_data, calculate_player_scores(self.player_data), current_squad)
+        return self._recommend_transfers_iterrows(current_squad)
+
+    def _recommend_transfers_iterrows(self, current_squad):
+        # Reference row-by-row implementation, kept for parity checks
         recommendations = []
 
         for position in range(1, 5):  # GK, DEF, MID, FWD
@@ -128,8 +222,8 @@ class TransferRecommender:
         
         return sorted(recommendations, key=lambda x: x['score_improvement'], reverse=True)[:TOP_RECOMMENDATIONS]
 
-    def run(self):
-        self.fetch_data()
+    def run(self, events=None):
+        self.fetch_data(events)
         if self.team_data:
             print(f"Team Name: {self.team_data['name']}")
             print(f"Overall Rank: {self.team_data['summary_overall_rank']}")